@@ -6,15 +6,14 @@ import uuid
 import json
 import base64
 import requests
-import certifi
 import pycountry
 import pytz
 import hmac
 import hashlib
-import jwt
 import concurrent.futures
+import threading
 from functools import wraps
-from flask import Flask, jsonify, request, g, Response, send_file, stream_with_context
+from flask import Flask, jsonify, request, g, Response, send_file, stream_with_context, has_request_context
 from flask_cors import CORS, cross_origin
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -25,13 +24,26 @@ import random
 import pandas as pd
 import io
 from i18n import i18n, gettext as _
-from gamepoint_service import GamePointService
+import gamepoint_service
+from gamepoint_service import get_gamepoint_service
 from error_handler import error_handler, log_execution_time
 from redis_cache import cache
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from game_config import GameConfigSnapshot
+from validation_cache import validation_cache, classify_result, OUTCOME_ERROR
+from circuit_breaker import circuit_protected, all_breakers, get_breaker
+import http_client
+from http_client import UpstreamRequest, run_flow
+import hedging
+import metrics
+import timeout_policy
 from email_service import send_order_update
-from bs4 import BeautifulSoup
+from pizzoshop_parser import parse_check_result
+from garena_client import GarenaClient
+from id_rules import check_id_format, merge_rules
+from catalog_sync import CatalogSync, iter_csv, sold_product_ids
+from catalog_index import CatalogIndex
+from json_stream import stream_json
+import repricing
 
 app = Flask(__name__)
 
@@ -39,7 +51,9 @@ limiter = Limiter(
     get_remote_address,
     app=app,
     default_limits=[os.environ.get("RATELIMIT_DEFAULT", "60 per minute")],
-    storage_uri="memory://"
+    # Shared across workers when Redis is configured; falls back to per-process memory if it goes away
+    storage_uri=os.environ.get("RATELIMIT_STORAGE_URI") or os.environ.get("REDIS_URL") or "memory://",
+    in_memory_fallback_enabled=True
 )
 
 allowed_origins_str = os.environ.get('ALLOWED_ORIGINS', "*")
@@ -49,6 +63,7 @@ else:
     allowed_origins = [origin.strip() for origin in allowed_origins_str.split(',')]
 
 CORS(app, resources={r"/*": {"origins": allowed_origins}}, supports_credentials=True)
+metrics.init_app(app)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 port = int(os.environ.get("PORT", 10000))
@@ -56,9 +71,7 @@ port = int(os.environ.get("PORT", 10000))
 SUPABASE_URL = os.environ.get('SUPABASE_URL')
 SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY')
 BACKEND_URL = os.environ.get('RENDER_EXTERNAL_URL')
-PROXY_URL = os.environ.get('PROXY_URL')
-
-PROXY_DICT = {"http": PROXY_URL, "https": PROXY_URL} if PROXY_URL else None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 if not all([SUPABASE_URL, SUPABASE_SERVICE_KEY, BACKEND_URL]):
     raise ValueError("CRITICAL: Supabase credentials and BACKEND_URL must be set.")
@@ -88,6 +101,32 @@ GAMINGNP_HEADERS = { "User-Agent": "Mozilla/5.0", "Accept": "*/*", "Content-Type
 GARENA_LOGIN_URL = "https://shop.garena.sg/api/auth/player_id_login"
 GARENA_ROLES_URL = "https://shop.garena.sg/api/shop/apps/roles"
 GARENA_HEADERS = { 'Accept': 'application/json', 'Content-Type': 'application/json', 'User-Agent': 'Mozilla/5.0' }
+PIZZOSHOP_CHECK_URL = "https://pizzoshop.com/mlchecker/check"
+PIZZOSHOP_HEADERS = { "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36", "Content-Type": "application/x-www-form-urlencoded", "Origin": "https://pizzoshop.com", "Referer": "https://pizzoshop.com/mlchecker", "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8" }
+CALIPH_VALIDATE_URL = "https://cekidml.caliph.dev/api/validasi"
+
+# MLBB provider strategy: "hedged" starts the next provider after MLBB_HEDGE_DELAY seconds,
+# "race" starts all of them at once, "sequential" waits for each one in turn.
+MLBB_CHECK_MODE = os.environ.get('MLBB_CHECK_MODE', 'hedged')
+MLBB_HEDGE_DELAY = float(os.environ.get('MLBB_HEDGE_DELAY', 1.5))
+MLBB_CHECK_TIMEOUT = float(os.environ.get('MLBB_CHECK_TIMEOUT', 12))
+
+# Outbound pools: one keep-alive session per validator host, with its default headers and proxy routing
+# rate/burst are calls per second across all workers, overridable with UPSTREAM_RATE_<NAME>.
+# pizzoshop sheds instead of queueing, so a hedged MLBB check moves on to the next provider.
+http_client.register_upstream("smile_one", "www.smile.one", headers=SMILE_ONE_HEADERS, pool_maxsize=20, rate=5, burst=10)
+http_client.register_upstream("bigo", "mobile.bigo.tv", headers=BIGO_NATIVE_HEADERS)
+http_client.register_upstream("spacegaming", "spacegaming.sg", headers=SPACEGAMING_HEADERS)
+http_client.register_upstream("netease", "pay.neteasegames.com", headers=NETEASE_HEADERS, use_proxy=True)
+http_client.register_upstream("razer", "gold.razer.com", headers=RAZER_HEADERS, pool_maxsize=20, rate=8, burst=16)
+http_client.register_upstream("nuverse", "pay.nvsgames.com", headers=NUVERSE_HEADERS)
+http_client.register_upstream("rom_xd", "xdsdk-intnl-6.xd.com", headers=ROM_XD_HEADERS)
+http_client.register_upstream("gamingnp", "gaming.com.np", headers=GAMINGNP_HEADERS, use_proxy=True)
+http_client.register_upstream("garena", "shop.garena.sg", headers=GARENA_HEADERS)
+http_client.register_upstream("pizzoshop", "pizzoshop.com", headers=PIZZOSHOP_HEADERS, use_proxy=True, pool_maxsize=20, rate=3, burst=6, rate_wait=0)
+http_client.register_upstream("caliph", "cekidml.caliph.dev", timeout=5)
+
+garena = GarenaClient(GARENA_LOGIN_URL, GARENA_ROLES_URL)
 
 @app.before_request
 def before_request():
@@ -95,14 +134,7 @@ def before_request():
 
 @cache.cached("exchange_rate_myr_sgd", expire_seconds=3600)
 def get_myr_to_sgd_rate():
-    try:
-        rate_setting = supabase.table('settings').select('value').eq('key', 'myr_sgd_rate').single().execute()
-        if rate_setting.data and rate_setting.data.get('value'):
-            return float(rate_setting.data['value'])
-    except Exception:
-        pass
-    logging.warning("MYR_SGD_RATE not found in settings. Using default 0.31 for price check.")
-    return 0.31
+    return repricing.myr_to_sgd_rate(supabase)
 
 def admin_required(f):
     @wraps(f)
@@ -139,83 +171,64 @@ def get_hitpay_config():
     else:
         return {'url': 'https://api.sandbox.hit-pay.com/v1/payment-requests', 'key': settings.get('hitpay_api_key_sandbox'), 'salt': settings.get('hitpay_salt_sandbox')}
 
-def check_mlbb_pizzoshop(user_id, zone_id):
+def validator_failed(result):
+    return classify_result(result) == OUTCOME_ERROR
+
+def validator_shed(result):
+    # Calls our own outbound limiter shed never reached the provider, so they say nothing about its health
+    return isinstance(result, dict) and result.get("message") == http_client.RATE_LIMITED["message"]
+
+def validator_unavailable():
+    return {"status": "error", "message": "Validator Unavailable"}
+
+def validator_breaker(provider):
+    """Fails fast with 'Validator Unavailable' while the provider's circuit is open."""
+    return circuit_protected(provider, validator_failed, validator_unavailable, validator_shed)
+
+# Each validator is written once as a "flow": a generator that yields the UpstreamRequest(s) it
+# needs and receives the responses back. http_client.run_flow drives it on the pooled sync
+# sessions, async_validation.run_flow_async on the shared async clients.
+
+def pizzoshop_flow(user_id, zone_id):
     """
     Scrapes pizzoshop.com to get the exact Region and Nickname.
     """
-    url = "https://pizzoshop.com/mlchecker/check"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Content-Type": "application/x-www-form-urlencoded",
-        "Origin": "https://pizzoshop.com",
-        "Referer": "https://pizzoshop.com/mlchecker",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
-    }
-    
     data = {
         "user_id": user_id,
         "zone_id": zone_id
     }
 
-    try:
-        response = requests.post(url, data=data, headers=headers, timeout=10, proxies=PROXY_DICT)
-
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
+    response = yield UpstreamRequest("POST", PIZZOSHOP_CHECK_URL, data=data)
 
-            if soup.find("h4", class_="text-success"):
-                nickname = "Unknown"
-                region = "Global"
-                
-                rows = soup.find_all("tr")
-                for row in rows:
-                    th = row.find("th")
-                    td = row.find("td")
-                    
-                    if th and td:
-                        header_text = th.get_text(strip=True)
-                        value_text = td.get_text(strip=True)
-                        
-                        if "Nickname" in header_text:
-                            nickname = value_text
-                        elif "Region ID" in header_text:
-                            region = value_text
-                
-                return {
-                    "status": "success",
-                    "username": nickname,
-                    "region": region
-                }
-    except Exception as e:
-        logging.error(f"PizzoShop Scrape Error: {e}")
+    if response.status_code == 200:
+        found = parse_check_result(response.text)
+        if found:
+            return {
+                "status": "success",
+                "username": found["nickname"],
+                "region": found["region"]
+            }
+        return {"status": "error", "message": "Invalid ID"}
 
-    return None
+    return {"status": "error", "message": "API Error"}
 
-def perform_ml_check(user_id, zone_id):
-    pizzo_result = check_mlbb_pizzoshop(user_id, zone_id)
-    if pizzo_result:
-        return pizzo_result
+def caliph_flow(user_id, zone_id):
+    params = {'id': user_id, 'serverid': zone_id}
+    response = yield UpstreamRequest("GET", CALIPH_VALIDATE_URL, params=params)
+    
+    if response.status_code == 200:
+        data = response.json()
+        if data.get("status") == "success" and data.get("result", {}).get("nickname"):
+            return {
+                'status': 'success', 
+                'username': data["result"]["nickname"], 
+                'region': 'Global/Unknown'
+            }
+        return {"status": "error", "message": "Invalid ID"}
 
-    try:
-        api_url = "https://cekidml.caliph.dev/api/validasi"
-        params = {'id': user_id, 'serverid': zone_id}
-        response = requests.get(api_url, params=params, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == "success" and data.get("result", {}).get("nickname"):
-                return {
-                    'status': 'success', 
-                    'username': data["result"]["nickname"], 
-                    'region': 'Global/Unknown'
-                }
-    except Exception:
-        pass
-
-    return check_smile_one_api("mobilelegends", user_id, zone_id)
+    return {"status": "error", "message": "API Error"}
 
-def check_smile_one_api(game_code, uid, server_id=None):
+def smile_one_flow(game_code, uid, server_id=None):
     endpoints = { "mobilelegends": "https://www.smile.one/merchant/mobilelegends/checkrole", "bloodstrike": "https://www.smile.one/br/merchant/game/checkrole?product=bloodstrike", "loveanddeepspace": "https://www.smile.one/merchant/loveanddeepspace/checkrole/", "magicchessgogo": "https://www.smile.one/br/merchant/game/checkrole?product=magicchessgogo" }
     pids = {"mobilelegends": "25", "bloodstrike": "20294"}
     target_endpoint = endpoints.get(game_code)
@@ -236,65 +249,51 @@ def check_smile_one_api(game_code, uid, server_id=None):
         params.update({"uid": uid, "sid": server_id})
     else:
         params.update({"uid": uid, "sid": server_id, "pid": pid_to_use})
-    try:
-        response = requests.post(target_endpoint, data=params, headers=SMILE_ONE_HEADERS, timeout=10, verify=certifi.where(), proxies=None)
-        if "text/html" in response.headers.get('content-type', ''):
-             return {"status": "error", "message": "API Format Error"}
-        data = response.json()
-        if data.get("code") == 200:
-            username = data.get("username") or data.get("nickname")
-            if username: return {"status": "success", "username": username.strip()}
-        return {"status": "error", "message": data.get("message", "Invalid ID")}
-    except Exception:
-        return {"status": "error", "message": "API Error"}
-
-def check_bigo_native_api(uid):
-    try:
-        response = requests.get(BIGO_NATIVE_VALIDATE_URL, params={"isFromApp": "0", "bigoId": uid}, headers=BIGO_NATIVE_HEADERS, timeout=10, verify=certifi.where(), proxies=None)
-        data = response.json()
-        if data.get("result") == 0: return {"status": "success", "username": data.get("data", {}).get("nick_name")}
-        return {"status": "error", "message": "Invalid Bigo ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
-
-def check_gamingnp_api(game_code, uid):
+    response = yield UpstreamRequest("POST", target_endpoint, data=params)
+    if "text/html" in response.headers.get('content-type', ''):
+         return {"status": "error", "message": "API Format Error"}
+    data = response.json()
+    if data.get("code") == 200:
+        username = data.get("username") or data.get("nickname")
+        if username: return {"status": "success", "username": username.strip()}
+    return {"status": "error", "message": data.get("message", "Invalid ID")}
+
+def bigo_native_flow(uid):
+    response = yield UpstreamRequest("GET", BIGO_NATIVE_VALIDATE_URL, params={"isFromApp": "0", "bigoId": uid})
+    data = response.json()
+    if data.get("result") == 0: return {"status": "success", "username": data.get("data", {}).get("nick_name")}
+    return {"status": "error", "message": "Invalid Bigo ID"}
+
+def gamingnp_flow(game_code, uid):
     params = { "hok": {"id": "3898", "url": "https://gaming.com.np/topup/honor-of-kings"}, "pubgm": {"id": "3920", "url": "https://gaming.com.np/topup/pubg-mobile-global"} }
     target_id = "0"
     target_url = "https://gaming.com.np"
     if game_code in params:
         target_id = params[game_code]["id"]
         target_url = params[game_code]["url"]
-    headers = GAMINGNP_HEADERS.copy()
-    headers["Referer"] = target_url
-    try:
-        response = requests.post(GAMINGNP_VALIDATE_URL, data={"userid": uid, "game": game_code, "categoryId": target_id}, headers=headers, timeout=10, proxies=PROXY_DICT)
-        data = response.json()
-        if data.get("success") and data.get("detail", {}).get("valid") == "valid":
-            return {"status": "success", "username": data["detail"].get("name")}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
-
-def check_spacegaming_api(game_id, uid):
-    try:
-        response = requests.post(SPACEGAMING_VALIDATE_URL, json={"username": uid, "game_id": game_id}, headers=SPACEGAMING_HEADERS, timeout=10, proxies=None)
-        data = response.json()
-        if data.get("status") == "true": return {"status": "success", "username": data.get("message").strip()}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
-
-def check_netease_api(game_path, server_id, role_id):
-    try:
-        params = {"deviceid": str(uuid.uuid4()), "traceid": str(uuid.uuid4()), "timestamp": int(time.time()*1000), "roleid": role_id, "client_type": "gameclub"}
-        headers = NETEASE_HEADERS.copy()
-        headers["Referer"] = f"https://pay.neteasegames.com/{game_path}/topup"
-        url = f"{NETEASE_BASE_URL}/{game_path}/{server_id}/login-role"
-        response = requests.get(url, params=params, headers=headers, timeout=10, proxies=PROXY_DICT)
-        data = response.json()
-        if data.get("code") == "0000": 
-            return {"status": "success", "username": data.get("data", {}).get("rolename")}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
-
-def check_ace_racer_api(uid, gp_server_id):
+    response = yield UpstreamRequest("POST", GAMINGNP_VALIDATE_URL, data={"userid": uid, "game": game_code, "categoryId": target_id}, headers={"Referer": target_url})
+    data = response.json()
+    if data.get("success") and data.get("detail", {}).get("valid") == "valid":
+        return {"status": "success", "username": data["detail"].get("name")}
+    return {"status": "error", "message": "Invalid ID"}
+
+def spacegaming_flow(game_id, uid):
+    response = yield UpstreamRequest("POST", SPACEGAMING_VALIDATE_URL, json={"username": uid, "game_id": game_id})
+    data = response.json()
+    if data.get("status") == "true": return {"status": "success", "username": data.get("message").strip()}
+    return {"status": "error", "message": "Invalid ID"}
+
+def netease_flow(game_path, server_id, role_id):
+    params = {"deviceid": str(uuid.uuid4()), "traceid": str(uuid.uuid4()), "timestamp": int(time.time()*1000), "roleid": role_id, "client_type": "gameclub"}
+    headers = {"Referer": f"https://pay.neteasegames.com/{game_path}/topup"}
+    url = f"{NETEASE_BASE_URL}/{game_path}/{server_id}/login-role"
+    response = yield UpstreamRequest("GET", url, params=params, headers=headers)
+    data = response.json()
+    if data.get("code") == "0000": 
+        return {"status": "success", "username": data.get("data", {}).get("rolename")}
+    return {"status": "error", "message": "Invalid ID"}
+
+def ace_racer_server(gp_server_id):
     mapping = {
         "10501": "10001",
         "10511": "10011",
@@ -302,59 +301,130 @@ def check_ace_racer_api(uid, gp_server_id):
         "10531": "10031",
         "10541": "10041"
     }
-    real_sid = mapping.get(str(gp_server_id), str(gp_server_id))
-    return check_netease_api("aceracer", real_sid, uid)
+    return mapping.get(str(gp_server_id), str(gp_server_id))
 
-def check_razer_hoyoverse_api(api_path, referer, server_map, uid, server_name):
+def razer_hoyoverse_flow(api_path, referer, server_map, uid, server_name):
     sid = server_map.get(server_name)
     if not sid: return {"status": "error", "message": "Invalid Server"}
     url = f"https://gold.razer.com/api/ext/{api_path}/users/{uid}" if api_path == "genshinimpact" else f"{RAZER_BASE_URL}/{api_path}/users/{uid}"
-    headers = RAZER_HEADERS.copy()
-    headers["Referer"] = f"https://gold.razer.com/my/en/gold/catalog/{referer}"
-    try:
-        response = requests.get(url, params={"serverId": sid}, headers=headers, timeout=10, proxies=None)
+    headers = {"Referer": f"https://gold.razer.com/my/en/gold/catalog/{referer}"}
+    response = yield UpstreamRequest("GET", url, params={"serverId": sid}, headers=headers)
+    data = response.json()
+    if response.status_code == 200 and data.get("username"): return {"status": "success", "username": data.get("username")}
+    return {"status": "error", "message": "Invalid ID"}
+
+def razer_flow(game_path, uid, server_id):
+    headers = {"Referer": f"https://gold.razer.com/my/en/gold/catalog/{game_path.split('/')[-1]}"}
+    response = yield UpstreamRequest("GET", f"{RAZER_BASE_URL}/{game_path}/users/{uid}", params={"serverId": server_id}, headers=headers)
+    data = response.json()
+    if response.status_code == 200 and data.get("username"): return {"status": "success", "username": data.get("username")}
+    return {"status": "error", "message": "Invalid ID"}
+
+def nuverse_flow(aid, role_id):
+    response = yield UpstreamRequest("GET", NUVERSE_VALIDATE_URL, params={"tab": "purchase", "aid": aid, "role_id": role_id})
+    data = response.json()
+    if data.get("code") == 0:
+        info = data.get("data", [{}])[0]
+        return {"status": "success", "username": f"{info.get('role_name')} ({info.get('server_name')})"}
+    return {"status": "error", "message": "Invalid ID"}
+
+def rom_xd_flow(role_id):
+    response = yield UpstreamRequest("GET", ROM_XD_VALIDATE_URL, params={"source": "webpay", "appId": "2079001", "serverId": "50001", "roleId": role_id})
+    data = response.json()
+    if data.get("code") == 200: return {"status": "success", "username": data.get("data", {}).get("name")}
+    return {"status": "error", "message": "Invalid ID"}
+
+def ro_origin_razer_flow(uid, server_id):
+    response = yield UpstreamRequest("GET", f"{RAZER_RO_ORIGIN_VALIDATE_URL}/{uid}", params={"serverId": server_id}, headers=RAZER_RO_ORIGIN_HEADERS)
+    if response.status_code == 200:
         data = response.json()
-        if response.status_code == 200 and data.get("username"): return {"status": "success", "username": data.get("username")}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
+        if data.get("roles"):
+            return {"status": "success", "roles": [{"roleId": r.get("CharacterId"), "roleName": r.get("Name")} for r in data["roles"]]}
+    return {"status": "error", "message": "Invalid ID"}
+
+def garena_flow(app_id, uid):
+    return (yield from garena.flow(app_id, uid))
+
+@validator_breaker("pizzoshop")
+def check_mlbb_pizzoshop(user_id, zone_id):
+    return run_flow(pizzoshop_flow(user_id, zone_id))
+
+@validator_breaker("caliph")
+def check_mlbb_caliph(user_id, zone_id):
+    return run_flow(caliph_flow(user_id, zone_id))
+
+@validator_breaker("smile_one")
+def check_smile_one_api(game_code, uid, server_id=None):
+    return run_flow(smile_one_flow(game_code, uid, server_id))
+
+@validator_breaker("bigo")
+def check_bigo_native_api(uid):
+    return run_flow(bigo_native_flow(uid))
+
+@validator_breaker("gamingnp")
+def check_gamingnp_api(game_code, uid):
+    return run_flow(gamingnp_flow(game_code, uid))
 
+@validator_breaker("spacegaming")
+def check_spacegaming_api(game_id, uid):
+    return run_flow(spacegaming_flow(game_id, uid))
+
+@validator_breaker("netease")
+def check_netease_api(game_path, server_id, role_id):
+    return run_flow(netease_flow(game_path, server_id, role_id))
+
+def check_ace_racer_api(uid, gp_server_id):
+    return check_netease_api("aceracer", ace_racer_server(gp_server_id), uid)
+
+@validator_breaker("razer")
+def check_razer_hoyoverse_api(api_path, referer, server_map, uid, server_name):
+    return run_flow(razer_hoyoverse_flow(api_path, referer, server_map, uid, server_name))
+
+@validator_breaker("razer")
 def check_razer_api(game_path, uid, server_id):
-    headers = RAZER_HEADERS.copy()
-    headers["Referer"] = f"https://gold.razer.com/my/en/gold/catalog/{game_path.split('/')[-1]}"
-    try:
-        response = requests.get(f"{RAZER_BASE_URL}/{game_path}/users/{uid}", params={"serverId": server_id}, headers=headers, timeout=10, proxies=None)
-        data = response.json()
-        if response.status_code == 200 and data.get("username"): return {"status": "success", "username": data.get("username")}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
+    return run_flow(razer_flow(game_path, uid, server_id))
 
+@validator_breaker("nuverse")
 def check_nuverse_api(aid, role_id):
-    try:
-        response = requests.get(NUVERSE_VALIDATE_URL, params={"tab": "purchase", "aid": aid, "role_id": role_id}, headers=NUVERSE_HEADERS, timeout=10, proxies=None)
-        data = response.json()
-        if data.get("code") == 0:
-            info = data.get("data", [{}])[0]
-            return {"status": "success", "username": f"{info.get('role_name')} ({info.get('server_name')})"}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
+    return run_flow(nuverse_flow(aid, role_id))
 
+@validator_breaker("rom_xd")
 def check_rom_xd_api(role_id):
-    try:
-        response = requests.get(ROM_XD_VALIDATE_URL, params={"source": "webpay", "appId": "2079001", "serverId": "50001", "roleId": role_id}, headers=ROM_XD_HEADERS, timeout=10, proxies=None)
-        data = response.json()
-        if data.get("code") == 200: return {"status": "success", "username": data.get("data", {}).get("name")}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
+    return run_flow(rom_xd_flow(role_id))
 
+@validator_breaker("razer")
 def check_ro_origin_razer_api(uid, server_id):
-    try:
-        response = requests.get(f"{RAZER_RO_ORIGIN_VALIDATE_URL}/{uid}", params={"serverId": server_id}, headers=RAZER_RO_ORIGIN_HEADERS, timeout=10, proxies=None)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("roles"):
-                return {"status": "success", "roles": [{"roleId": r.get("CharacterId"), "roleName": r.get("Name")} for r in data["roles"]]}
-        return {"status": "error", "message": "Invalid ID"}
-    except Exception: return {"status": "error", "message": "API Error"}
+    return run_flow(ro_origin_razer_flow(uid, server_id))
+
+@validator_breaker("garena")
+def check_garena_api(app_id, uid):
+    return run_flow(garena_flow(app_id, uid))
+
+# In preference order: pizzoshop is the only one that returns the real region
+MLBB_PROVIDERS = [
+    ("pizzoshop", lambda user_id, zone_id: check_mlbb_pizzoshop(user_id, zone_id)),
+    ("caliph", lambda user_id, zone_id: check_mlbb_caliph(user_id, zone_id)),
+    ("smile_one", lambda user_id, zone_id: check_smile_one_api("mobilelegends", user_id, zone_id)),
+]
+
+def perform_ml_check(user_id, zone_id):
+    if MLBB_CHECK_MODE == "race":
+        hedge_delay = 0
+    elif MLBB_CHECK_MODE == "sequential":
+        hedge_delay = None
+    else:
+        hedge_delay = MLBB_HEDGE_DELAY
+
+    providers = [(name, lambda func=func: func(user_id, zone_id)) for name, func in MLBB_PROVIDERS]
+    winner, result = hedging.first_success(providers, hedge_delay=hedge_delay, timeout=MLBB_CHECK_TIMEOUT)
+
+    if winner:
+        logging.info(f"MLBB check for {user_id}/{zone_id} answered by {winner} ({MLBB_CHECK_MODE})")
+        try:
+            cache.redis_client.hincrby("mlbb_provider_wins", winner, 1)
+        except Exception:
+            pass
+    return result or {"status": "error", "message": "API Error"}
 
 def get_ro_origin_servers():
     return {"status": "success", "servers": [
@@ -370,19 +440,6 @@ def get_ro_origin_servers():
         {"server_id": 107, "server_name": "Hugel"}
     ]}
 
-def check_garena_api(app_id, uid):
-    with requests.Session() as s:
-        s.headers.update(GARENA_HEADERS)
-        try:
-            s.headers["Referer"] = f"https://shop.garena.sg/?app={app_id}"
-            login = s.post(GARENA_LOGIN_URL, json={"app_id": int(app_id), "login_id": uid}, timeout=10)
-            if login.status_code != 200: return {"status": "error", "message": "Invalid ID"}
-            roles = s.get(GARENA_ROLES_URL, params={'app_id': app_id, 'region': 'SG', 'language': 'en', 'source': 'pc'}, timeout=10)
-            data = roles.json().get(str(app_id), [])
-            if data: return {"status": "success", "username": data[0].get("role")}
-            return {"status": "error", "message": "No player found"}
-        except Exception: return {"status": "error", "message": "API Error"}
-
 genshin_servers = {"Asia": "os_asia", "America": "os_usa", "Europe": "os_euro", "TW,HK,MO": "os_cht"}
 hsr_servers = {"Asia": "prod_official_asia", "America": "prod_official_usa", "Europe": "prod_official_eur", "TW/HK/MO": "prod_official_cht"}
 zzz_servers = {"Asia": "prod_gf_jp", "America": "prod_gf_us", "Europe": "prod_gf_eu", "TW/HK/MO": "prod_gf_sg"}
@@ -436,6 +493,41 @@ HANDLER_METADATA = {
     "marvel_rivals": { "label": "Legacy: Marvel Rivals", "server": False, "region": False, "default_target": "marvelrivals" }
 }
 
+MLBB_ID_RULES = {"uid_pattern": r"\d+", "uid_length": [5, 12], "server_required": True, "server_pattern": r"\d{1,6}"}
+
+# Format checks run before any upstream call (see id_rules.py); a games row's
+# validation_rules JSON is merged over these
+HANDLER_ID_RULES = {
+    "genshin_impact": {
+        "uid_pattern": r"\d+", "uid_length": [9, 10], "server_required": True, "servers": list(genshin_servers),
+        "uid_prefix_servers": {"6": "America", "7": "Europe", "8": "Asia", "18": "Asia", "9": "TW,HK,MO"}
+    },
+    "honkai_star_rail": {
+        "uid_pattern": r"\d+", "uid_length": [9, 10], "server_required": True, "servers": list(hsr_servers),
+        "uid_prefix_servers": {"6": "America", "7": "Europe", "8": "Asia", "9": "TW/HK/MO"}
+    },
+    "zenless_zone_zero": { "uid_pattern": r"\d+", "uid_length": [8, 10], "server_required": True, "servers": list(zzz_servers) },
+    "snowbreak": { "server_required": True, "servers": list(snowbreak_servers) },
+    "identity_v": { "uid_pattern": r"\d+", "server_required": True, "servers": ["Asia", "NA-EU"] },
+    "ace_racer": { "uid_pattern": r"\d+", "server_required": True, "server_pattern": r"\d+" },
+    "universal_mlbb": MLBB_ID_RULES,
+    "mobile_legends_global": MLBB_ID_RULES,
+    "mobile_legends_brazil": MLBB_ID_RULES,
+    "pubgm_global": { "uid_pattern": r"\d+", "uid_length": [5, 15] },
+    "bigo_live": { "uid_length": [1, 64], "uid_pattern": r"\S+" }
+}
+
+def id_format_error(game_data, uid, server_id):
+    """Returns an error result if uid/server_id fail the game's format rules, else None."""
+    rules = merge_rules(HANDLER_ID_RULES.get(game_data.get('api_handler')), game_data.get('validation_rules'))
+    message = check_id_format(rules, uid, server_id)
+    if message is None:
+        return None
+    # Answered locally, so it doesn't spend the client's /check-id rate limit either
+    if has_request_context():
+        g.id_prefiltered = True
+    return {"status": "error", "message": message}
+
 def get_validation_target(handler_key, db_param):
     if db_param and db_param.strip():
         return db_param.strip()
@@ -469,6 +561,110 @@ VALIDATION_HANDLERS = {
     "mobile_legends_brazil": lambda uid, sid, cfg: perform_ml_check(uid, sid)
 }
 
+# Upstream group each handler talks to; batch checks cap their parallelism per group
+HANDLER_PROVIDERS = {
+    "bigo_live": "bigo",
+    "arena_breakout_sg": "spacegaming",
+    "genshin_impact": "razer",
+    "honkai_star_rail": "razer",
+    "zenless_zone_zero": "razer",
+    "ace_racer": "netease",
+    "universal_mlbb": "mlbb",
+    "universal_netease": "netease",
+    "universal_smile_one": "smile_one",
+    "universal_gamingnp": "gamingnp",
+    "universal_spacegaming": "spacegaming",
+    "universal_razer": "razer",
+    "pubgm_global": "gamingnp",
+    "honor_of_kings": "gamingnp",
+    "identity_v": "netease",
+    "marvel_rivals": "netease",
+    "delta_force": "garena",
+    "snowbreak": "razer",
+    "ragnarok_m_classic": "rom_xd",
+    "ragnarok_x_next_gen": "nuverse",
+    "blood_strike": "smile_one",
+    "mobile_legends_global": "mlbb",
+    "mobile_legends_brazil": "mlbb"
+}
+
+GAME_CHECK_COLUMNS = 'api_handler,supplier,supplier_pid,validation_param,requires_user_id'
+# Per-game ID format overrides; until the column is migrated every game uses its handler's rules
+GAME_RULES_COLUMN = 'validation_rules'
+
+def load_check_games():
+    columns = 'game_key,' + GAME_CHECK_COLUMNS
+    try:
+        return supabase.table('games').select(f"{columns},{GAME_RULES_COLUMN}").execute().data
+    except Exception as e:
+        logging.warning(f"games.{GAME_RULES_COLUMN} unavailable, using the default ID rules: {e}")
+        return supabase.table('games').select(columns).execute().data
+
+game_config = GameConfigSnapshot(load_check_games)
+
+CHECK_ID_BATCH_MAX_ITEMS = int(os.environ.get('CHECK_ID_BATCH_MAX_ITEMS', 50))
+CHECK_ID_BATCH_PER_PROVIDER = int(os.environ.get('CHECK_ID_BATCH_PER_PROVIDER', 4))
+_batch_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get('CHECK_ID_BATCH_WORKERS', 16)),
+    thread_name_prefix="check-id-batch"
+)
+_provider_slots = {}
+_provider_slots_lock = threading.Lock()
+
+def provider_slot(provider):
+    with _provider_slots_lock:
+        if provider not in _provider_slots:
+            _provider_slots[provider] = threading.BoundedSemaphore(CHECK_ID_BATCH_PER_PROVIDER)
+        return _provider_slots[provider]
+
+def collapse_single_role(result):
+    if result.get("status") == "success" and "roles" in result and len(result["roles"]) == 1:
+        result["username"] = result["roles"][0].get("roleName")
+        del result["roles"]
+    return result
+
+def validate_ragnarok_origin(uid, server_id):
+    result = validation_cache.get_or_call("ragnarok_origin", None, uid, server_id, lambda: check_ro_origin_razer_api(uid, server_id))
+    return result, 200 if result.get("status") == "success" else 400
+
+def validate_with_gamepoint(game_data, uid, server_id):
+    gp = get_gamepoint_service(supabase)
+    inputs = {"input1": uid}
+    if server_id: inputs["input2"] = server_id
+    supplier_pid = game_data.get('supplier_pid')
+    if not supplier_pid: return {"status": "error", "message": "Game config missing supplier PID"}, 500
+    resp = gp.validate_id(supplier_pid, inputs)
+    if resp.get('code') == 200:
+        return {"status": "success", "username": "Validated User", "roles": [], "validation_token": resp.get('validation_token')}, 200
+    else:
+        return {"status": "error", "message": resp.get('message', 'Invalid ID')}, 400
+
+def validate_game_id(game_data, uid, server_id):
+    """Runs the validation configured for a games row. Returns (result, status_code)."""
+    if game_data.get('requires_user_id') == False:
+        return {"status": "success", "username": "Voucher/GiftCard", "roles": []}, 200
+
+    format_error = id_format_error(game_data, uid, server_id)
+    if format_error:
+        return format_error, 400
+
+    api_handler_key = game_data.get('api_handler')
+
+    if api_handler_key and api_handler_key in VALIDATION_HANDLERS:
+        resolved_target = get_validation_target(api_handler_key, game_data.get('validation_param')) or game_data.get('supplier_pid')
+        result = collapse_single_role(run_validation_handler(api_handler_key, resolved_target, uid, server_id))
+        return result, 200 if result.get("status") == "success" else 400
+
+    if game_data.get('supplier') == 'gamepoint':
+        return validate_with_gamepoint(game_data, uid, server_id)
+
+    return {"status": "error", "message": "No handler configured"}, 400
+
+def run_validation_handler(handler_key, resolved_target, uid, server_id):
+    handler_func = VALIDATION_HANDLERS[handler_key]
+    config_for_handler = {'target_id': resolved_target}
+    return validation_cache.get_or_call(handler_key, resolved_target, uid, server_id, lambda: handler_func(uid, server_id, config_for_handler))
+
 @app.route('/api/admin/config/handlers', methods=['GET'])
 def get_api_handlers():
     return jsonify(HANDLER_METADATA)
@@ -476,66 +672,76 @@ def get_api_handlers():
 @app.route('/api/admin/gamepoint/catalog', methods=['GET'])
 @admin_required
 @error_handler
+@log_execution_time("gamepoint_catalog")
 def admin_get_gp_catalog():
-    cached_catalog = cache.get("admin_gp_full_catalog")
-    if cached_catalog:
-        return jsonify(cached_catalog)
-    gp = GamePointService(supabase_client=supabase)
-    token = gp.get_token()
-    try:
-        list_resp = gp._request("product/list", {"token": token})
-        products = list_resp.get('detail', [])
-    except Exception as e:
-        logging.error(f"Failed to fetch product list: {e}")
-        return jsonify([])
-    full_catalog = []
-    session = requests.Session()
-    adapter = HTTPAdapter(pool_connections=30, pool_maxsize=30, max_retries=Retry(total=3, backoff_factor=0.5))
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    session.headers.update({'Content-Type': 'application/json', 'partnerid': gp.partner_id, 'User-Agent': 'GameVault/1.0'})
-    proxies = gp.proxies
-    base_url = gp.base_url
-    secret_key = gp.secret_key
-    def fetch_detail_optimized(product):
-        try:
-            payload = {"token": token, "productid": product['id'], "timestamp": int(time.time())}
-            encoded_payload = jwt.encode(payload, secret_key, algorithm='HS256')
-            body = json.dumps({"payload": encoded_payload})
-            resp = session.post(f"{base_url}/product/detail", data=body, proxies=proxies, timeout=15, verify=certifi.where())
-            detail_data = resp.json()
-            if detail_data.get('code') == 200:
-                product['packages'] = detail_data.get('package', [])
-                product['fields'] = detail_data.get('fields', [])
-                product['server'] = detail_data.get('server', [])
-                return product
-        except Exception as e:
-            logging.error(f"Error fetching product {product['id']}: {e}")
+    # Served from the shared snapshot the catalog job keeps current; never calls the supplier
+    sync = CatalogSync(get_gamepoint_service(supabase))
+    meta = sync.meta()
+    headers = {'X-Catalog-Synced-At': str(int(meta['synced_at']))} if meta.get('synced_at') else None
+    return stream_json(sync.iter_products(meta=meta), headers=headers)
+
+catalog_index = CatalogIndex(lambda: CatalogSync(get_gamepoint_service(supabase)))
+
+def _float_arg(name):
+    value = request.args.get(name)
+    if value in (None, ''):
         return None
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-        futures = {executor.submit(fetch_detail_optimized, p): p for p in products}
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                full_catalog.append(result)
-    cache.set("admin_gp_full_catalog", full_catalog, expire_seconds=3600)
-    return jsonify(full_catalog)
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+@app.route('/api/admin/gamepoint/catalog/search', methods=['GET'])
+@admin_required
+@error_handler
+@log_execution_time("gamepoint_catalog_search")
+def admin_gp_catalog_search():
+    """Package-level search over the catalog snapshot: ?q=&product_id=&min_price=&max_price=&cursor=&limit="""
+    try:
+        result = catalog_index.search(
+            query=request.args.get('q'),
+            product_id=request.args.get('product_id') or None,
+            min_price=_float_arg('min_price'),
+            max_price=_float_arg('max_price'),
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', type=int),
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify({"status": "success", "data": result['items'], "next_cursor": result['next_cursor'], "total": result['total']})
+
+@app.route('/api/admin/gamepoint/catalog/sync', methods=['GET', 'POST'])
+@admin_required
+@error_handler
+def admin_gp_catalog_sync():
+    sync = CatalogSync(get_gamepoint_service(supabase))
+    if request.method == 'POST':
+        full = bool((request.get_json(silent=True) or {}).get('full'))
+        hot_ids = sold_product_ids(supabase)
+        def run():
+            try:
+                sync.sync(hot_ids=hot_ids, progress=gamepoint_service.log_progress("GamePoint catalog"), full=full)
+            except Exception as e:
+                logging.error(f"Catalog sync failed: {e}")
+        threading.Thread(target=run, name="gamepoint-catalog-sync", daemon=True).start()
+        return jsonify({"status": "success", "message": "Catalog sync started", "data": sync.status()}), 202
+    return jsonify({"status": "success", "data": sync.status()})
 
 @app.route('/api/admin/gamepoint/list', methods=['GET'])
 @admin_required
 @error_handler
 def admin_get_gp_game_list():
-    gp = GamePointService(supabase_client=supabase)
+    gp = get_gamepoint_service(supabase)
     token = gp.get_token()
     list_resp = gp._request("product/list", {"token": token})
     products = list_resp.get('detail', [])
-    return jsonify(products)
+    return stream_json(products)
 
 @app.route('/api/admin/gamepoint/detail/<int:product_id>', methods=['GET'])
 @admin_required
 @error_handler
 def admin_get_gp_game_detail(product_id):
-    gp = GamePointService(supabase_client=supabase)
+    gp = get_gamepoint_service(supabase)
     token = gp.get_token()
     detail_resp = gp._request("product/detail", {"token": token, "productid": product_id})
     if detail_resp.get('code') != 200:
@@ -550,34 +756,11 @@ def admin_get_gp_game_detail(product_id):
 @admin_required
 def admin_download_gp_csv():
     try:
-        gp = GamePointService(supabase_client=supabase)
-        token = gp.get_token()
-        list_resp = gp._request("product/list", {"token": token})
-        products = list_resp.get('detail', [])
+        gp = get_gamepoint_service(supabase)
+        products = CatalogSync(gp).products()
         if not products:
             return jsonify({"status": "error", "message": "No products found"}), 404
-        def fetch_detail_safe(product):
-            try:
-                detail_resp = gp._request("product/detail", {"token": token, "productid": product['id']})
-                if detail_resp.get('code') == 200:
-                    return { "parent": product, "packages": detail_resp.get('package', []) }
-            except Exception as e:
-                logging.error(f"Error fetching product {product['id']}: {e}")
-            return None
-        def generate_csv():
-            yield u'\ufeff' 
-            yield "Product ID,Product Name,Package ID,Package Name,Cost Price\n"
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = {executor.submit(fetch_detail_safe, p): p for p in products}
-                for future in concurrent.futures.as_completed(futures):
-                    result = future.result()
-                    if result:
-                        p = result['parent']
-                        p_name = p['name'].replace(',', ' ')
-                        for pkg in result['packages']:
-                            row = [str(p['id']), p_name, str(pkg['id']), pkg['name'].replace(',', ' '), str(pkg['price'])]
-                            yield ",".join(row) + "\n"
-        return Response(stream_with_context(generate_csv()), mimetype="text/csv", headers={"Content-Disposition": f"attachment; filename=gamepoint_catalog_{gp.config['mode']}.csv", "Cache-Control": "no-cache"})
+        return Response(iter_csv(products), mimetype="text/csv", headers={"Content-Disposition": f"attachment; filename=gamepoint_catalog_{gp.config['mode']}.csv", "Cache-Control": "no-cache"})
     except Exception as e:
         logging.error(f"CSV Download Failed: {str(e)}")
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -595,8 +778,9 @@ def admin_gamepoint_config():
                 updates.append({'key': key, 'value': val})
         if updates:
             supabase.table('settings').upsert(updates, on_conflict='key').execute()
-            from redis_cache import cache
-            cache.delete(f"gamepoint_token_{data.get('gamepoint_mode', 'sandbox')}")
+            # Mode or credentials may have changed; reload settings and fetch a fresh token everywhere
+            gamepoint_service.invalidate_config()
+            gamepoint_service.invalidate_tokens()
         return jsonify({"status": "success", "message": "Settings updated"})
     response = supabase.table('settings').select('key,value').ilike('key', 'gamepoint%').execute()
     settings = {item['key']: item['value'] for item in response.data}
@@ -608,56 +792,75 @@ def admin_gamepoint_config():
 @admin_required
 @error_handler
 def admin_gamepoint_balance():
-    gp = GamePointService(supabase_client=supabase)
+    gp = get_gamepoint_service(supabase)
     balance = gp.check_balance()
     return jsonify({"status": "success", "mode": gp.config['mode'], "balance": balance})
 
+@app.route('/api/admin/check-id/cache', methods=['GET', 'DELETE'])
+@admin_required
+@error_handler
+def admin_check_id_cache():
+    if request.method == 'DELETE':
+        validation_cache.invalidate(request.args.get('handler'))
+        return jsonify({"status": "success", "message": "Validation cache cleared"})
+    return jsonify({"status": "success", "data": validation_cache.stats()})
+
+@app.route('/api/admin/game-config', methods=['GET', 'POST'])
+@admin_required
+@error_handler
+def admin_game_config():
+    if request.method == 'POST':
+        # Reloads this worker and broadcasts to the others; call after editing the games table
+        game_config.invalidate()
+        return jsonify({"status": "success", "message": "Game config reloaded", "data": game_config.status()})
+    return jsonify({"status": "success", "data": game_config.status()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    # Scrapers can't sign in, so a static METRICS_TOKEN bearer is accepted alongside admin tokens
+    if METRICS_TOKEN and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}"):
+        return metrics_response()
+    return admin_required(metrics_response)()
+
+def metrics_response():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+@app.route('/api/admin/upstreams/health', methods=['GET'])
+@admin_required
+@error_handler
+def admin_upstream_health():
+    return jsonify({"status": "success", "data": [breaker.status() for breaker in all_breakers()]})
+
+@app.route('/api/admin/upstreams/timeouts', methods=['GET'])
+@admin_required
+@error_handler
+def admin_upstream_timeouts():
+    return jsonify({"status": "success", "data": [policy.status() for policy in timeout_policy.all_policies()]})
+
+@app.route('/api/admin/upstreams/<provider>/reset', methods=['POST'])
+@admin_required
+@error_handler
+def admin_reset_upstream(provider):
+    get_breaker(provider).reset()
+    return jsonify({"status": "success", "message": f"Circuit for {provider} reset"})
+
 @app.route('/check-id/<game_slug>/<uid>/', defaults={'server_id': None})
 @app.route('/check-id/<game_slug>/<uid>/<server_id>')
-@limiter.limit("10/minute")
+@limiter.limit("10/minute", deduct_when=lambda response: not g.get('id_prefiltered'))
 @error_handler
 def check_game_id(game_slug, uid, server_id):
     if not uid: return jsonify({"status": "error", "message": _("user_id_required")}), 400
     
     if game_slug == "ragnarok-origin":
-        result = check_ro_origin_razer_api(uid, server_id)
-        status_code = 200 if result.get("status") == "success" else 400
+        result, status_code = validate_ragnarok_origin(uid, server_id)
         return jsonify(result), status_code
 
     try:
-        game_res = supabase.table('games').select('api_handler,supplier,supplier_pid,validation_param,requires_user_id').eq('game_key', game_slug).single().execute()
-        if game_res.data:
-            game_data = game_res.data
-            
-            if game_data.get('requires_user_id') == False:
-                return jsonify({"status": "success", "username": "Voucher/GiftCard", "roles": []})
-            
-            api_handler_key = game_data.get('api_handler')
-            
-            if api_handler_key and api_handler_key in VALIDATION_HANDLERS:
-                handler_func = VALIDATION_HANDLERS[api_handler_key]
-                resolved_target = get_validation_target(api_handler_key, game_data.get('validation_param')) or game_data.get('supplier_pid')
-                config_for_handler = {'target_id': resolved_target}
-                
-                result = handler_func(uid, server_id, config_for_handler)
-                
-                if result.get("status") == "success" and "roles" in result and len(result["roles"]) == 1:
-                    result["username"] = result["roles"][0].get("roleName")
-                    del result["roles"]
-                    
-                return jsonify(result), 200 if result.get("status") == "success" else 400
-
-            if game_data.get('supplier') == 'gamepoint':
-                gp = GamePointService(supabase_client=supabase)
-                inputs = {"input1": uid}
-                if server_id: inputs["input2"] = server_id
-                supplier_pid = game_data.get('supplier_pid')
-                if not supplier_pid: return jsonify({"status": "error", "message": "Game config missing supplier PID"}), 500
-                resp = gp.validate_id(supplier_pid, inputs)
-                if resp.get('code') == 200:
-                    return jsonify({"status": "success", "username": "Validated User", "roles": [], "validation_token": resp.get('validation_token')})
-                else:
-                    return jsonify({"status": "error", "message": resp.get('message', 'Invalid ID')}), 400
+        game_data = game_config.get(game_slug)
+        if game_data:
+            result, status_code = validate_game_id(game_data, uid, server_id)
+            return jsonify(result), status_code
 
     except Exception as e:
         logging.error(f"Error checking game ID: {e}")
@@ -665,6 +868,68 @@ def check_game_id(game_slug, uid, server_id):
     
     return jsonify({"status": "error", "message": "No handler configured"}), 400
 
+def check_batch_item(index, item, games):
+    game_slug = str(item.get('game_slug') or '').strip()
+    uid = str(item.get('uid') or '').strip()
+    server_id = item.get('server_id')
+    server_id = str(server_id).strip() or None if server_id is not None else None
+    entry = {"index": index, "game_slug": game_slug, "uid": uid, "server_id": server_id}
+
+    if not uid:
+        return {**entry, "status_code": 400, "result": {"status": "error", "message": _("user_id_required")}}
+    try:
+        if game_slug == "ragnarok-origin":
+            with provider_slot("razer"):
+                result, status_code = validate_ragnarok_origin(uid, server_id)
+        elif game_slug in games:
+            game_data = games[game_slug]
+            provider = HANDLER_PROVIDERS.get(game_data.get('api_handler')) or game_data.get('supplier') or 'other'
+            with provider_slot(provider):
+                result, status_code = validate_game_id(game_data, uid, server_id)
+        else:
+            result, status_code = {"status": "error", "message": "No handler configured"}, 400
+    except Exception as e:
+        logging.error(f"Error checking game ID in batch: {e}")
+        result, status_code = {"status": "error", "message": "Validation Error"}, 500
+    return {**entry, "status_code": status_code, "result": result}
+
+@app.route('/check-id/batch', methods=['POST'])
+@limiter.limit(os.environ.get('CHECK_ID_BATCH_LIMIT', "5/minute"))
+@error_handler
+@log_execution_time("check_id_batch")
+def check_game_id_batch():
+    """
+    Validates many (game_slug, uid, server_id) items in one call. Results come back in
+    input order, or as NDJSON lines in completion order with ?stream=1.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return jsonify({"status": "error", "message": "items must be a non-empty list"}), 400
+    if len(items) > CHECK_ID_BATCH_MAX_ITEMS:
+        return jsonify({"status": "error", "message": f"At most {CHECK_ID_BATCH_MAX_ITEMS} items per batch"}), 400
+    items = [item if isinstance(item, dict) else {} for item in items]
+
+    slugs = sorted({str(item.get('game_slug') or '').strip() for item in items} - {'', 'ragnarok-origin'})
+    games = game_config.get_many(slugs) if slugs else {}
+
+    # Handlers run on worker threads, which don't inherit the request's g.language
+    language = g.language
+    def run_item(index, item):
+        with app.app_context():
+            g.language = language
+            return check_batch_item(index, item, games)
+
+    futures = [_batch_executor.submit(run_item, i, item) for i, item in enumerate(items)]
+
+    if request.args.get('stream') in ('1', 'true'):
+        def generate():
+            for future in concurrent.futures.as_completed(futures):
+                yield json.dumps(future.result()) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers={"Cache-Control": "no-cache"})
+
+    return jsonify({"status": "success", "results": [future.result() for future in futures]})
+
 @app.route('/api/create-payment', methods=['POST'])
 @limiter.limit("10/minute")
 def create_hitpay_payment():
@@ -701,7 +966,8 @@ def create_hitpay_payment():
             'channel': 'api_custom', 'email': email or 'customer@example.com', 'name': data.get('name', 'GameVault Customer')
         }
         headers = {'X-BUSINESS-API-KEY': config['key'], 'Content-Type': 'application/json', 'X-Requested-With': 'XMLHttpRequest'}
-        response = requests.post(config['url'], headers=headers, json=payload, timeout=15, proxies=None)
+        with metrics.timed_upstream("hitpay") as timer:
+            timer.response = response = requests.post(config['url'], headers=headers, json=payload, timeout=15, proxies=None)
         response_data = response.json()
         if response.status_code == 201:
             return jsonify({'status': 'success', 'payment_url': response_data['url']})
@@ -744,7 +1010,7 @@ def hitpay_webhook_handler():
                     game_name = game.get('name', 'GameVault Product')
                     customer_email = order.get('email') or form_data.get('customer_email')
                     customer_name = order.get('remitter_name') or form_data.get('customer_name')
-                    gp_api = GamePointService(supabase_client=supabase)
+                    gp_api = get_gamepoint_service(supabase)
                     supplier_config = product.get('supplier_config')
                     
                     if supplier_config:
@@ -767,10 +1033,11 @@ def hitpay_webhook_handler():
                         else:
                             inputs["input1"] = "GIFT_CARD"
                             
+                        live_costs = cache.get_many(f"gp_price:{item.get('packageId')}" for item in supplier_config)
                         for item in supplier_config:
                             gp_pack_id = item.get('packageId')
                             try:
-                                live_cost_myr_str = cache.get(f"gp_price:{gp_pack_id}")
+                                live_cost_myr_str = live_costs.get(f"gp_price:{gp_pack_id}")
                                 if live_cost_myr_str:
                                     live_cost_myr, db_cost_sgd = float(live_cost_myr_str), float(product.get('original_price'))
                                     exchange_rate = get_myr_to_sgd_rate()
@@ -894,7 +1161,7 @@ def admin_sync_order(order_id):
                  "message": "Cannot sync: Missing 'supplier_ref'. Please manually update the database with the GamePoint Transaction ID (GP...) first."
              }), 400
 
-        gp = GamePointService(supabase_client=supabase)
+        gp = get_gamepoint_service(supabase)
         
         resp = gp.check_order_status(supplier_ref)
         
@@ -941,7 +1208,7 @@ def admin_process_manual_order(order_id):
         product = order['order_items'][0]['products']
         game = product.get('games', {})
         
-        gp_api = GamePointService(supabase_client=supabase)
+        gp_api = get_gamepoint_service(supabase)
         supplier_config = product.get('supplier_config')
         
         if supplier_config:
@@ -0,0 +1,120 @@
+# asgi.py
+#
+# ASGI entry point. GET /check-id/... is answered by the asyncio engine in
+# async_validation.py; every other route is handed to the Flask app unchanged.
+#
+# Run it with uvicorn workers under gunicorn:
+#   gunicorn asgi:app -k uvicorn.workers.UvicornWorker -w 2
+# or with uvicorn directly (local development):
+#   uvicorn asgi:app --port 10000
+#
+# The sync entry point (gunicorn app:app) keeps working; this one only changes how
+# /check-id is executed.
+
+import json
+import time
+import asyncio
+import logging
+from urllib.parse import parse_qs
+from asgiref.wsgi import WsgiToAsgi
+from limits import parse as parse_limit
+
+import app as core
+import async_validation
+import metrics
+
+logger = logging.getLogger(__name__)
+
+flask_asgi = WsgiToAsgi(core.app)
+CHECK_ID_LIMIT = parse_limit("10/minute")
+CHECK_ID_ROUTE = "/check-id/<game_slug>/<uid>/<server_id>"
+
+
+def match_check_id(scope):
+    """Returns (game_slug, uid, server_id) for GET /check-id/<game>/<uid>[/<server>], else None."""
+    if scope["method"] != "GET" or not scope["path"].startswith("/check-id/"):
+        return None
+    parts = scope["path"][len("/check-id/"):].rstrip("/").split("/")
+    if len(parts) not in (2, 3) or not all(parts):
+        return None
+    return parts[0], parts[1], parts[2] if len(parts) == 3 else None
+
+
+def request_language(headers, query_string):
+    lang = parse_qs(query_string).get("lang", [None])[0]
+    if lang in core.i18n.translations:
+        return lang
+    preferred = headers.get("accept-language", "en").split(",")[0].split("-")[0]
+    return preferred if preferred in core.i18n.translations else "en"
+
+
+def cors_headers(origin):
+    # Same policy flask-cors applies to the Flask routes (supports_credentials=True)
+    if not origin or (core.allowed_origins != "*" and origin not in core.allowed_origins):
+        return []
+    return [
+        (b"access-control-allow-origin", origin.encode()),
+        (b"access-control-allow-credentials", b"true"),
+        (b"vary", b"Origin"),
+    ]
+
+
+async def send_json(send, status, payload, extra_headers=()):
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *extra_headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def handle_check_id(scope, send, game_slug, uid, server_id):
+    started = time.monotonic()
+    headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+    extra_headers = cors_headers(headers.get("origin"))
+    client_ip = (scope.get("client") or ("127.0.0.1", 0))[0]
+
+    format_error = await async_validation.id_prefilter(game_slug, uid, server_id)
+    if format_error:
+        await send_json(send, 400, format_error, extra_headers)
+        metrics.observe_route("GET", CHECK_ID_ROUTE, 400, time.monotonic() - started)
+        return
+
+    # The limiter talks to Redis synchronously; keep it off the event loop
+    if core.limiter.enabled and not await asyncio.to_thread(core.limiter.limiter.hit, CHECK_ID_LIMIT, "check_id", client_ip):
+        await send_json(send, 429, {"status": "error", "message": "Rate limit exceeded"}, extra_headers)
+        metrics.observe_route("GET", CHECK_ID_ROUTE, 429, time.monotonic() - started)
+        return
+
+    lang = request_language(headers, scope.get("query_string", b"").decode())
+    try:
+        result, status = await async_validation.check_game_id(game_slug, uid, server_id, lang=lang)
+    except Exception as e:
+        logger.error(f"Async check-id failed: {e}", exc_info=True)
+        result, status = {"status": "error", "message": "Internal server error", "error_code": "INTERNAL_ERROR"}, 500
+    await send_json(send, status, result, extra_headers)
+    metrics.observe_route("GET", CHECK_ID_ROUTE, status, time.monotonic() - started)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await async_validation.aclose_all()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] == "http":
+        match = match_check_id(scope)
+        if match:
+            await handle_check_id(scope, send, *match)
+            return
+    await flask_asgi(scope, receive, send)
@@ -0,0 +1,245 @@
+# async_validation.py
+#
+# asyncio path for /check-id. It runs the same validator flows as app.py, but on shared
+# httpx.AsyncClients, so one process can hold thousands of upstream calls in flight
+# instead of one per sync worker. asgi.py serves it; everything else stays on Flask.
+
+import os
+import time
+import asyncio
+import logging
+import certifi
+import httpx
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import app as core
+import hedging
+import http_client
+import metrics
+from circuit_breaker import get_breaker
+from rate_limiter import OutboundRateLimited
+from validation_cache import validation_cache
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MAX_CONNECTIONS = int(os.environ.get('ASYNC_HTTP_MAX_CONNECTIONS', 200))
+
+# host -> httpx.AsyncClient, created lazily on the serving event loop
+_clients = {}
+
+
+def get_client(url):
+    host = urlparse(url).hostname
+    client = _clients.get(host)
+    if client is None:
+        upstream = http_client.get_upstream(host)
+        proxy = http_client.PROXY_URL if upstream["use_proxy"] and http_client.PROXY_URL else None
+        transport = httpx.AsyncHTTPTransport(
+            verify=certifi.where(),
+            proxy=proxy,
+            retries=upstream["retries"],
+            limits=httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=upstream["pool_maxsize"]),
+        )
+        client = httpx.AsyncClient(
+            transport=transport,
+            headers={**http_client.DEFAULT_HEADERS, **upstream["headers"]},
+            timeout=upstream["timeout"],
+        )
+        # Same rule as the sync pools: no cookies carried between customers
+        client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        _clients[host] = client
+    return client
+
+
+async def aclose_all():
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
+
+
+async def run_flow_async(flow, error_result=http_client.API_ERROR):
+    """Async driver for the validator flows in app.py (see http_client.run_flow)."""
+    req = None
+    try:
+        req = next(flow)
+        while True:
+            policy = http_client.get_timeout_policy(req.url)
+            kwargs = dict(req.kwargs)
+            if "timeout" not in kwargs:
+                connect, read = policy.timeouts()
+                kwargs["timeout"] = httpx.Timeout(read, connect=connect)
+            upstream = http_client.get_upstream(req.url)
+            if upstream["bucket"] and not await upstream["bucket"].acquire_async(upstream["rate_wait"]):
+                raise OutboundRateLimited(upstream["name"])
+            start = time.monotonic()
+            with metrics.timed_upstream(upstream["name"]) as timer:
+                try:
+                    timer.response = response = await get_client(req.url).request(req.method, req.url, **kwargs)
+                except httpx.TimeoutException:
+                    policy.record_timeout(kwargs["timeout"].read if isinstance(kwargs["timeout"], httpx.Timeout) else kwargs["timeout"])
+                    raise
+            policy.record(time.monotonic() - start)
+            req = flow.send(response)
+    except StopIteration as stop:
+        return stop.value
+    except OutboundRateLimited as e:
+        logger.info(str(e))
+        return dict(http_client.RATE_LIMITED)
+    except Exception as e:
+        upstream = http_client.upstream_name(req.url) if req else "validator"
+        logger.warning(f"{upstream} check failed: {e}")
+        return dict(error_result)
+
+
+def async_validator(provider, flow_factory):
+    """Builds the async counterpart of a breaker-protected check_* function."""
+    breaker = get_breaker(provider)
+    async def check(*args):
+        return await breaker.call_async(lambda: run_flow_async(flow_factory(*args)), core.validator_failed, core.validator_unavailable, core.validator_shed)
+    check.__name__ = f"check_{provider}_async"
+    return check
+
+
+check_mlbb_pizzoshop = async_validator("pizzoshop", core.pizzoshop_flow)
+check_mlbb_caliph = async_validator("caliph", core.caliph_flow)
+check_smile_one_api = async_validator("smile_one", core.smile_one_flow)
+check_bigo_native_api = async_validator("bigo", core.bigo_native_flow)
+check_gamingnp_api = async_validator("gamingnp", core.gamingnp_flow)
+check_spacegaming_api = async_validator("spacegaming", core.spacegaming_flow)
+check_netease_api = async_validator("netease", core.netease_flow)
+check_razer_hoyoverse_api = async_validator("razer", core.razer_hoyoverse_flow)
+check_razer_api = async_validator("razer", core.razer_flow)
+check_nuverse_api = async_validator("nuverse", core.nuverse_flow)
+check_rom_xd_api = async_validator("rom_xd", core.rom_xd_flow)
+check_ro_origin_razer_api = async_validator("razer", core.ro_origin_razer_flow)
+check_garena_api = async_validator("garena", core.garena_flow)
+
+
+def check_ace_racer_api(uid, gp_server_id):
+    return check_netease_api("aceracer", core.ace_racer_server(gp_server_id), uid)
+
+
+MLBB_PROVIDERS = [
+    ("pizzoshop", check_mlbb_pizzoshop),
+    ("caliph", check_mlbb_caliph),
+    ("smile_one", lambda user_id, zone_id: check_smile_one_api("mobilelegends", user_id, zone_id)),
+]
+
+
+async def perform_ml_check(user_id, zone_id):
+    if core.MLBB_CHECK_MODE == "race":
+        hedge_delay = 0
+    elif core.MLBB_CHECK_MODE == "sequential":
+        hedge_delay = None
+    else:
+        hedge_delay = core.MLBB_HEDGE_DELAY
+
+    providers = [(name, lambda func=func: func(user_id, zone_id)) for name, func in MLBB_PROVIDERS]
+    winner, result = await hedging.first_success_async(providers, hedge_delay=hedge_delay, timeout=core.MLBB_CHECK_TIMEOUT)
+
+    if winner:
+        logger.info(f"MLBB check for {user_id}/{zone_id} answered by {winner} ({core.MLBB_CHECK_MODE}, async)")
+        try:
+            await asyncio.to_thread(core.cache.redis_client.hincrby, "mlbb_provider_wins", winner, 1)
+        except Exception:
+            pass
+    return result or {"status": "error", "message": "API Error"}
+
+
+# Mirrors app.VALIDATION_HANDLERS key for key
+ASYNC_VALIDATION_HANDLERS = {
+    "bigo_live": lambda uid, sid, cfg: check_bigo_native_api(uid),
+    "arena_breakout_sg": lambda uid, sid, cfg: check_spacegaming_api(cfg['target_id'], uid),
+    "genshin_impact": lambda uid, sid, cfg: check_razer_hoyoverse_api(cfg['target_id'], "genshin-impact", core.genshin_servers, uid, sid),
+    "honkai_star_rail": lambda uid, sid, cfg: check_razer_hoyoverse_api(cfg['target_id'], "hsr", core.hsr_servers, uid, sid),
+    "zenless_zone_zero": lambda uid, sid, cfg: check_razer_hoyoverse_api(cfg['target_id'], "zenless-zone-zero", core.zzz_servers, uid, sid),
+    "ace_racer": lambda uid, sid, cfg: check_ace_racer_api(uid, sid),
+    "universal_mlbb": lambda uid, sid, cfg: perform_ml_check(uid, sid),
+    "universal_netease": lambda uid, sid, cfg: check_netease_api(cfg['target_id'], sid, uid),
+    "universal_smile_one": lambda uid, sid, cfg: check_smile_one_api(cfg['target_id'], uid, sid),
+    "universal_gamingnp": lambda uid, sid, cfg: check_gamingnp_api(cfg['target_id'], uid),
+    "universal_spacegaming": lambda uid, sid, cfg: check_spacegaming_api(cfg['target_id'], uid),
+    "universal_razer": lambda uid, sid, cfg: check_razer_api(cfg['target_id'], uid, sid),
+    "pubgm_global": lambda uid, sid, cfg: check_gamingnp_api(cfg['target_id'], uid),
+    "honor_of_kings": lambda uid, sid, cfg: check_gamingnp_api(cfg['target_id'], uid),
+    "identity_v": lambda uid, sid, cfg: check_netease_api(cfg['target_id'], {"Asia": "2001", "NA-EU": "2011"}.get(sid), uid),
+    "marvel_rivals": lambda uid, sid, cfg: check_netease_api(cfg['target_id'], "11001", uid),
+    "delta_force": lambda uid, sid, cfg: check_garena_api("100151", uid),
+    "snowbreak": lambda uid, sid, cfg: check_razer_api("seasun-games-snowbreak-containment-zone", uid, core.snowbreak_servers.get(sid)),
+    "ragnarok_m_classic": lambda uid, sid, cfg: check_rom_xd_api(uid),
+    "ragnarok_x_next_gen": lambda uid, sid, cfg: check_nuverse_api("3402", uid),
+    "blood_strike": lambda uid, sid, cfg: check_smile_one_api("bloodstrike", uid),
+    "mobile_legends_global": lambda uid, sid, cfg: perform_ml_check(uid, sid),
+    "mobile_legends_brazil": lambda uid, sid, cfg: perform_ml_check(uid, sid)
+}
+
+
+async def cached_call(handler_key, target, uid, server_id, coro_func):
+    return await validation_cache.get_or_call_async(handler_key, target, uid, server_id, coro_func)
+
+
+async def run_validation_handler(handler_key, resolved_target, uid, server_id):
+    handler_func = ASYNC_VALIDATION_HANDLERS[handler_key]
+    config_for_handler = {'target_id': resolved_target}
+    return await cached_call(handler_key, resolved_target, uid, server_id, lambda: handler_func(uid, server_id, config_for_handler))
+
+
+async def validate_game_id(game_data, uid, server_id):
+    """Async app.validate_game_id. Returns (result, status_code)."""
+    if game_data.get('requires_user_id') == False:
+        return {"status": "success", "username": "Voucher/GiftCard", "roles": []}, 200
+
+    format_error = core.id_format_error(game_data, uid, server_id)
+    if format_error:
+        return format_error, 400
+
+    api_handler_key = game_data.get('api_handler')
+
+    if api_handler_key and api_handler_key in ASYNC_VALIDATION_HANDLERS:
+        resolved_target = core.get_validation_target(api_handler_key, game_data.get('validation_param')) or game_data.get('supplier_pid')
+        result = core.collapse_single_role(await run_validation_handler(api_handler_key, resolved_target, uid, server_id))
+        return result, 200 if result.get("status") == "success" else 400
+
+    if game_data.get('supplier') == 'gamepoint':
+        # GamePoint stays on the sync service; it is order-path traffic, not the hot validators
+        return await asyncio.to_thread(core.validate_with_gamepoint, game_data, uid, server_id)
+
+    return {"status": "error", "message": "No handler configured"}, 400
+
+
+async def id_prefilter(game_slug, uid, server_id):
+    """
+    The format error /check-id would answer locally for this ID, else None. Checked before
+    the rate limit, so like the Flask route such answers don't spend the client's quota.
+    """
+    if game_slug == "ragnarok-origin":
+        return None
+    try:
+        game_data = await asyncio.to_thread(core.game_config.get, game_slug)
+    except Exception:
+        return None
+    if not game_data or game_data.get('requires_user_id') == False:
+        return None
+    return core.id_format_error(game_data, uid, server_id)
+
+
+async def check_game_id(game_slug, uid, server_id, lang='en'):
+    """Async /check-id. Returns (result, status_code)."""
+    if not uid:
+        return {"status": "error", "message": core.i18n.get_text("user_id_required", lang)}, 400
+
+    if game_slug == "ragnarok-origin":
+        result = await cached_call("ragnarok_origin", None, uid, server_id, lambda: check_ro_origin_razer_api(uid, server_id))
+        return result, 200 if result.get("status") == "success" else 400
+
+    try:
+        # Usually a dict lookup; to_thread only matters when the snapshot is due a reload
+        game_data = await asyncio.to_thread(core.game_config.get, game_slug)
+        if game_data:
+            return await validate_game_id(game_data, uid, server_id)
+    except Exception as e:
+        logger.error(f"Error checking game ID: {e}")
+        return {"status": "error", "message": "Validation Error"}, 500
+
+    return {"status": "error", "message": "No handler configured"}, 400
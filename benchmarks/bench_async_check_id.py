@@ -0,0 +1,93 @@
+# benchmarks/bench_async_check_id.py
+#
+# Fires N concurrent /check-id requests at the ASGI app (asgi.py) in one process, against
+# a local upstream that takes --upstream-ms to answer each call. A sync worker handles one
+# of these at a time; the async engine overlaps them all, so wall time is a small multiple
+# of one upstream round trip (the rest is httpx's own per-connection overhead).
+# Supabase, the validation cache and the circuit breakers are stubbed out.
+#
+#   python benchmarks/bench_async_check_id.py --concurrency 2000 --upstream-ms 500
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'bench')
+os.environ.setdefault('RENDER_EXTERNAL_URL', 'http://localhost')
+
+import httpx  # noqa: E402
+import app as app_module  # noqa: E402
+import asgi  # noqa: E402
+import async_validation  # noqa: E402
+import http_client  # noqa: E402
+from circuit_breaker import CircuitBreaker  # noqa: E402
+
+
+async def fake_upstream(reader, writer, delay):
+    # Minimal keep-alive HTTP/1.1 server answering every request like Razer would
+    body = json.dumps({"username": "BenchPlayer"}).encode()
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            await asyncio.sleep(delay)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionResetError):
+        pass
+    finally:
+        writer.close()
+
+
+async def main(concurrency, upstream_ms):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server = await asyncio.start_server(lambda r, w: fake_upstream(r, w, upstream_ms / 1000), "127.0.0.1", 0, backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+
+    app_module.RAZER_BASE_URL = f"http://127.0.0.1:{port}/api/ext/custom"
+    http_client.register_upstream("razer", "127.0.0.1", headers=app_module.RAZER_HEADERS)
+    async_validation.ASYNC_MAX_CONNECTIONS = concurrency
+    app_module.limiter.enabled = False
+
+    game_row = {"api_handler": "universal_razer", "validation_param": "bench-game", "supplier": None, "supplier_pid": None, "requires_user_id": True}
+    fake_supabase = MagicMock()
+    fake_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value.data = game_row
+
+    async def passthrough(self, coro_func, is_failure, fallback):
+        return await coro_func()
+
+    async def no_cache(handler_key, target, uid, server_id, coro_func):
+        return await coro_func()
+
+    with patch.object(app_module, "supabase", fake_supabase), \
+         patch.object(async_validation, "cached_call", no_cache), \
+         patch.object(CircuitBreaker, "call_async", passthrough):
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            start = time.perf_counter()
+            responses = await asyncio.gather(*[client.get(f"/check-id/bench-game/{100000 + i}/2001") for i in range(concurrency)])
+            elapsed = time.perf_counter() - start
+
+    ok = sum(1 for r in responses if r.status_code == 200)
+    await async_validation.aclose_all()
+    server.close()
+    print(f"{concurrency} concurrent /check-id, upstream latency {upstream_ms:.0f} ms")
+    print(f"  succeeded     : {ok}/{concurrency}")
+    print(f"  wall time     : {elapsed:.2f} s")
+    print(f"  sync estimate : {concurrency * upstream_ms / 1000:.0f} s per sync worker")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--upstream-ms", type=float, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.upstream_ms))
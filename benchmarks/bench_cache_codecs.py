@@ -0,0 +1,120 @@
+# benchmarks/bench_cache_codecs.py
+#
+# Stored size and encode/decode latency of the redis_cache codecs on a synthetic
+# catalog-shaped value, with and without compression, plus the cost of reading a few
+# products from a per-product hash against loading the whole catalog blob.
+# Store timings use --redis-url (or REDIS_URL) when given, else fakeredis if installed.
+#
+#   python benchmarks/bench_cache_codecs.py --products 600 --packages 15
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis  # noqa: E402
+from redis_cache import RedisCache, encode, decode  # noqa: E402
+
+
+def make_catalog(products, packages):
+    rng = random.Random(42)
+    return [{
+        "id": pid,
+        "name": f"Game {pid} Top Up",
+        "fields": [{"name": "userid", "type": "text"}, {"name": "zoneid", "type": "text"}],
+        "server": [],
+        "packages": [{"id": pid * 1000 + n, "name": f"{rng.randint(10, 5000)} Diamonds",
+                      "price": f"{rng.uniform(0.2, 120):.2f}"} for n in range(packages)],
+    } for pid in range(1, products + 1)]
+
+
+def p50_ms(func, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def bench_codecs(catalog, iterations):
+    print(f"{'codec':<18}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    for codec in ("pickle", "json"):
+        for threshold, label in ((None, codec), (0, f"{codec}+zlib")):
+            data = encode(catalog, codec, compress_threshold=threshold)
+            enc = p50_ms(lambda: encode(catalog, codec, compress_threshold=threshold), iterations)
+            dec = p50_ms(lambda: decode(data), iterations)
+            print(f"{label:<18}{len(data):>12,}{enc:>12.2f}{dec:>12.2f}")
+
+
+def store_client(url):
+    if url:
+        return redis.Redis.from_url(url)
+    try:
+        import fakeredis
+    except ImportError:
+        return None
+    return fakeredis.FakeRedis()
+
+
+def memory_usage(client, key):
+    try:
+        return client.memory_usage(key)
+    except Exception:
+        return None
+
+
+def bench_store(client, catalog, iterations, slice_size):
+    store = RedisCache.__new__(RedisCache)
+    store.redis_client = client
+    blob_key, hash_key = "bench:catalog:blob", "bench:catalog:hash"
+    ids = [p["id"] for p in catalog]
+    wanted = ids[:slice_size]
+
+    store.set(blob_key, catalog, codec="pickle")
+    store.set_hash(hash_key, {p["id"]: p for p in catalog}, codec="pickle")
+    print()
+    print(f"{'read':<34}{'ms':>10}")
+    rows = [
+        ("full blob get (pickle)", lambda: store.get(blob_key)),
+        ("full hash get (pickle)", lambda: store.get_hash(hash_key)),
+        (f"{slice_size} products from blob", lambda: [p for p in store.get(blob_key) if p["id"] in wanted]),
+        (f"{slice_size} products from hash", lambda: store.get_hash(hash_key, wanted)),
+    ]
+    for label, func in rows:
+        print(f"{label:<34}{p50_ms(func, iterations):>10.2f}")
+    print(f"stored bytes: blob {client.strlen(blob_key):,}, "
+          f"hash {sum(len(v) for v in client.hvals(hash_key)):,} (per-field compression only above the threshold)")
+    for key in (blob_key, hash_key):
+        usage = memory_usage(client, key)
+        if usage:
+            print(f"redis MEMORY USAGE {key}: {usage:,} bytes")
+    client.delete(blob_key, hash_key)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=600)
+    parser.add_argument("--packages", type=int, default=15)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--slice", type=int, default=20)
+    parser.add_argument("--redis-url", default=os.environ.get("REDIS_URL"))
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.products, args.packages)
+    print(f"{args.products} products x {args.packages} packages, {args.iterations} iterations")
+    bench_codecs(catalog, args.iterations)
+
+    client = store_client(args.redis_url)
+    if client is None:
+        print("\nNo --redis-url and fakeredis not installed; skipping store timings")
+        return
+    bench_store(client, catalog, args.iterations, args.slice)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/bench_check_id.py
+#
+# Measures /check-id latency with pooled keep-alive sessions (http_client) versus a bare
+# requests call per validation. The upstream is a local HTTP server that sleeps for
+# --handshake-ms on every *new* connection, standing in for the TCP + TLS setup we pay
+# against the real validators. Supabase, the validation cache and the circuit breakers are
+# stubbed out so only the outbound HTTP path is measured.
+#
+#   python benchmarks/bench_check_id.py --requests 200 --handshake-ms 150
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SUPABASE_URL', 'http://localhost')
+os.environ.setdefault('SUPABASE_SERVICE_KEY', 'bench')
+os.environ.setdefault('RENDER_EXTERNAL_URL', 'http://localhost')
+
+import app as app_module  # noqa: E402
+import http_client  # noqa: E402
+from circuit_breaker import CircuitBreaker  # noqa: E402
+
+
+class FakeRazerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1  # one write per response, avoids Nagle/delayed-ACK stalls on keep-alive
+    handshake_seconds = 0.15
+
+    def setup(self):
+        time.sleep(self.handshake_seconds)
+        super().setup()
+
+    def do_GET(self):
+        body = json.dumps({"username": "BenchPlayer"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def bare_request(method, url, **kwargs):
+    # What every handler did before: a fresh connection per call
+    headers = {**app_module.RAZER_HEADERS, **kwargs.pop("headers", {})}
+    return requests.request(method, url, headers=headers, **kwargs)
+
+
+def run(client, n):
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        resp = client.get(f"/check-id/bench-game/{100000 + i}/2001")
+        samples.append((time.perf_counter() - start) * 1000)
+        assert resp.status_code == 200, resp.get_json()
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p90_ms": round(samples[int(len(samples) * 0.9) - 1], 2),
+        "mean_ms": round(statistics.mean(samples), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    FakeRazerHandler.handshake_seconds = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeRazerHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    app_module.RAZER_BASE_URL = f"http://127.0.0.1:{port}/api/ext/custom"
+    http_client.register_upstream("razer", "127.0.0.1", headers=app_module.RAZER_HEADERS)
+    app_module.limiter.enabled = False
+
+    game_row = {"api_handler": "universal_razer", "validation_param": "bench-game", "supplier": None, "supplier_pid": None, "requires_user_id": True}
+    fake_supabase = MagicMock()
+    fake_supabase.table.return_value.select.return_value.eq.return_value.single.return_value.execute.return_value.data = game_row
+
+    with patch.object(app_module, "supabase", fake_supabase), \
+         patch.object(app_module.validation_cache, "get_or_call", lambda *a: a[-1]()), \
+         patch.object(CircuitBreaker, "call", lambda self, func, is_failure, fallback: func()):
+        client = app_module.app.test_client()
+        with patch("http_client.request", bare_request):
+            bare = run(client, args.requests)
+        pooled = run(client, args.requests)
+
+    server.shutdown()
+    print(f"/check-id over {args.requests} requests, simulated handshake {args.handshake_ms:.0f} ms")
+    print(f"  bare requests : {bare}")
+    print(f"  pooled session: {pooled}")
+    print(f"  p50 reduction : {bare['p50_ms'] - pooled['p50_ms']:.2f} ms ({(1 - pooled['p50_ms'] / bare['p50_ms']) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
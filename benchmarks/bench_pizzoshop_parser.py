@@ -0,0 +1,99 @@
+# benchmarks/bench_pizzoshop_parser.py
+#
+# Times pizzoshop_parser.parse_check_result against the full BeautifulSoup parse it
+# replaced (and a SoupStrainer variant for reference) over the saved pages in
+# benchmarks/samples. Every run first checks that all three agree on every sample.
+# With --min-speedup it exits non-zero when the scanner is not at least that many times
+# faster than the full parse, so it can run in CI as a regression guard.
+#
+#   python benchmarks/bench_pizzoshop_parser.py --iterations 200 --min-speedup 20
+
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+from bs4 import BeautifulSoup, SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pizzoshop_parser import parse_check_result  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+
+def extract_rows(soup, found):
+    if not found:
+        return None
+    nickname, region = "Unknown", "Global"
+    for row in soup.find_all("tr"):
+        th, td = row.find("th"), row.find("td")
+        if th and td:
+            header_text, value_text = th.get_text(strip=True), td.get_text(strip=True)
+            if "Nickname" in header_text:
+                nickname = value_text
+            elif "Region ID" in header_text:
+                region = value_text
+    return {"nickname": nickname, "region": region}
+
+
+def soup_full(html):
+    soup = BeautifulSoup(html, "html.parser")
+    return extract_rows(soup, soup.find("h4", class_="text-success"))
+
+
+def soup_strained(html):
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(["h4", "tr"]))
+    return extract_rows(soup, soup.find("h4", class_="text-success"))
+
+
+PARSERS = [("beautifulsoup", soup_full), ("soupstrainer", soup_strained), ("scanner", parse_check_result)]
+
+
+def time_parser(func, pages, iterations):
+    timings = []
+    for _ in range(iterations):
+        for html in pages:
+            start = time.perf_counter()
+            func(html)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--min-speedup", type=float, default=None,
+                        help="fail unless scanner p50 is this many times faster than beautifulsoup")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(SAMPLES_DIR, "pizzoshop_*.html")))
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    if not pages:
+        sys.exit(f"No samples found in {SAMPLES_DIR}")
+
+    for path, html in zip(paths, pages):
+        results = {name: func(html) for name, func in PARSERS}
+        if len({repr(r) for r in results.values()}) != 1:
+            sys.exit(f"Parsers disagree on {os.path.basename(path)}: {results}")
+
+    print(f"{len(pages)} sample pages, {args.iterations} iterations each")
+    p50s = {}
+    for name, func in PARSERS:
+        timings = time_parser(func, pages, args.iterations)
+        p50s[name] = statistics.median(timings)
+        p99 = sorted(timings)[int(len(timings) * 0.99) - 1]
+        print(f"  {name:<14} p50 {p50s[name] * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+
+    speedup = p50s["beautifulsoup"] / p50s["scanner"]
+    print(f"scanner speedup over beautifulsoup: {speedup:.1f}x")
+    if args.min_speedup and speedup < args.min_speedup:
+        sys.exit(f"Regression: speedup {speedup:.1f}x is below --min-speedup {args.min_speedup}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# catalog_index.py
+
+import os
+import re
+import time
+import bisect
+import itertools
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# How often a search checks the shared snapshot for a newer sync
+CHECK_SECONDS = int(os.environ.get('CATALOG_INDEX_CHECK_SECONDS', 10))
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def _price(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_cursor(ids):
+    return f"{ids[0]}:{ids[1]}"
+
+
+def decode_cursor(cursor):
+    try:
+        product_id, package_id = cursor.split(":", 1)
+        return _sort_id(product_id), _sort_id(package_id)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def _sort_id(value):
+    """Numeric ids sort numerically, and before any non-numeric ones."""
+    text = str(value)
+    return (0, int(text), "") if text.isdigit() else (1, 0, text)
+
+
+class CatalogIndex:
+    """
+    Per-worker search index over the shared catalog snapshot (catalog_sync.CatalogSync), one
+    row per package. Searches match every query token as a prefix of a word in the product
+    or package name, and page through results in (product id, package id) order with a
+    cursor that stays valid across rebuilds.
+
+    sync_provider() returns the CatalogSync to read. When the snapshot's sync time moves,
+    only products whose content hash changed are fetched and re-indexed.
+    """
+
+    def __init__(self, sync_provider, check_seconds=CHECK_SECONDS):
+        self.sync_provider = sync_provider
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._source = None
+        self._synced_at = None
+        self._checked_at = 0.0
+        self._hashes = {}
+        self._rows = {}            # (product sort id, package sort id) -> row
+        self._product_keys = {}    # product id -> its row keys
+        self._postings = {}        # token -> row keys
+        self._tokens = None        # sorted tokens, rebuilt lazily after changes
+        self._ordered = None       # sorted row keys, rebuilt lazily after changes
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+        sync = self.sync_provider()
+        meta = sync.meta()
+        if not force and sync.snapshot_key == self._source and meta.get("synced_at") == self._synced_at:
+            return
+        if meta.get("synced_at") is None and sync.snapshot_key == self._source:
+            # Snapshot unreadable (e.g. Redis is down): keep answering from what we have
+            return
+        with self._lock:
+            if sync.snapshot_key != self._source:
+                self._clear()
+                self._source = sync.snapshot_key
+            hashes = meta.get("hashes") or {}
+            changed = [pid for pid in meta.get("order", []) if self._hashes.get(pid) != hashes.get(pid)]
+            removed = [pid for pid in self._hashes if pid not in hashes]
+            for pid in removed:
+                self._remove_product(pid)
+            for product in sync.get_products(changed):
+                self._remove_product(product['id'])
+                self._add_product(product)
+            self._hashes = {pid: hashes[pid] for pid in hashes if pid in self._product_keys}
+            self._synced_at = meta.get("synced_at")
+        logger.info(f"Catalog index: {len(changed)} products re-indexed, {len(removed)} removed, {len(self._rows)} packages")
+
+    def _clear(self):
+        self._hashes, self._rows, self._product_keys, self._postings = {}, {}, {}, {}
+        self._tokens = self._ordered = None
+
+    def _add_product(self, product):
+        keys = []
+        product_tokens = set(tokenize(product.get('name')))
+        for pkg in product.get('packages', []):
+            key = (_sort_id(product['id']), _sort_id(pkg['id']))
+            self._rows[key] = {
+                "product_id": product['id'],
+                "product_name": product.get('name'),
+                "package_id": pkg['id'],
+                "package_name": pkg.get('name'),
+                "price": pkg.get('price'),
+                "_price": _price(pkg.get('price')),
+            }
+            for token in product_tokens | set(tokenize(pkg.get('name'))):
+                self._postings.setdefault(token, set()).add(key)
+            keys.append(key)
+        self._product_keys[product['id']] = keys
+        self._tokens = self._ordered = None
+
+    def _remove_product(self, product_id):
+        for key in self._product_keys.pop(product_id, []):
+            row = self._rows.pop(key)
+            for token in set(tokenize(row['product_name'])) | set(tokenize(row['package_name'])):
+                posting = self._postings.get(token)
+                if posting is not None:
+                    posting.discard(key)
+                    if not posting:
+                        del self._postings[token]
+        self._tokens = self._ordered = None
+
+    def _prefix_matches(self, prefix):
+        if self._tokens is None:
+            self._tokens = sorted(self._postings)
+        matches = set()
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self._postings[token]
+        return matches
+
+    def search(self, query=None, product_id=None, min_price=None, max_price=None, cursor=None, limit=DEFAULT_LIMIT):
+        """Returns {"items", "next_cursor", "total"}; raises ValueError on a bad cursor."""
+        self.refresh()
+        limit = max(1, min(int(limit or DEFAULT_LIMIT), MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else None
+        with self._lock:
+            keys = None
+            for token in tokenize(query):
+                matches = self._prefix_matches(token)
+                keys = matches if keys is None else keys & matches
+                if not keys:
+                    break
+            if product_id is not None:
+                wanted = _sort_id(product_id)
+                keys = {key for key in (self._rows if keys is None else keys) if key[0] == wanted}
+            if min_price is not None or max_price is not None:
+                keys = {key for key in (self._rows if keys is None else keys)
+                        if self._in_range(self._rows[key]['_price'], min_price, max_price)}
+            if keys is None:
+                keys = self._rows
+            if self._ordered is None:
+                self._ordered = sorted(self._rows)
+            # Walk the presorted keys from the cursor instead of sorting every match
+            page, more = [], False
+            start = bisect.bisect_right(self._ordered, after) if after else 0
+            for key in itertools.islice(self._ordered, start, None):
+                if key in keys:
+                    if len(page) == limit:
+                        more = True
+                        break
+                    page.append(key)
+            items = [{k: v for k, v in self._rows[key].items() if k != '_price'} for key in page]
+        next_cursor = encode_cursor((items[-1]['product_id'], items[-1]['package_id'])) if more else None
+        return {"items": items, "next_cursor": next_cursor, "total": len(keys)}
+
+    @staticmethod
+    def _in_range(price, min_price, max_price):
+        if price is None:
+            return False
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+
+    def status(self):
+        return {"source": self._source, "synced_at": self._synced_at, "products": len(self._product_keys),
+                "packages": len(self._rows), "tokens": len(self._postings)}
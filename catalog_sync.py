@@ -0,0 +1,230 @@
+# catalog_sync.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Products we sell, or whose detail changed recently, are re-fetched this often...
+HOT_SECONDS = int(os.environ.get('CATALOG_HOT_SECONDS', 900))
+# ...everything else this often
+COLD_SECONDS = int(os.environ.get('CATALOG_COLD_SECONDS', 86400))
+# A product stays hot this long after its detail last changed
+RECENT_CHANGE_SECONDS = int(os.environ.get('CATALOG_RECENT_CHANGE_SECONDS', 86400))
+SNAPSHOT_TTL = 7 * 86400
+# Longest a sync may hold the lock; a crashed job's lock frees itself after this
+LOCK_SECONDS = int(os.environ.get('CATALOG_SYNC_LOCK_SECONDS', 1800))
+# gp_price:* keys outlive a few missed runs of the job that writes them
+PRICE_TTL = int(os.environ.get('CATALOG_PRICE_TTL', 7200))
+
+
+def content_hash(product):
+    """Stable hash of the parts of a product detail we care about."""
+    content = {key: product.get(key) for key in ("name", "fields", "packages", "server")}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def iter_csv(products):
+    """The catalog CSV export, one line at a time (BOM first, so Excel reads it as UTF-8)."""
+    yield u'\ufeff'
+    yield "Product ID,Product Name,Package ID,Package Name,Cost Price\n"
+    for p in products:
+        p_name = p['name'].replace(',', ' ')
+        for pkg in p.get('packages', []):
+            row = [str(p['id']), p_name, str(pkg['id']), pkg['name'].replace(',', ' '), str(pkg['price'])]
+            yield ",".join(row) + "\n"
+
+
+def sold_product_ids(supabase_client):
+    """GamePoint products behind our own store products; a sync keeps these hot."""
+    try:
+        rows = supabase_client.table('products').select('gamepoint_product_id').execute().data or []
+        return {row['gamepoint_product_id'] for row in rows if row.get('gamepoint_product_id')}
+    except Exception as e:
+        logger.warning(f"Could not load sold products, treating all as cold: {e}")
+        return set()
+
+
+def diff_packages(old_products, new_products):
+    """New, removed and repriced packages between two {product_id: product} maps."""
+    def packages(products):
+        return {(pid, pkg['id']): pkg for pid, product in products.items() for pkg in product.get('packages', [])}
+
+    old, new = packages(old_products), packages(new_products)
+    def entry(key, pkg):
+        return {"product_id": key[0], "package_id": pkg['id'], "name": pkg.get('name'), "price": pkg.get('price')}
+
+    return {
+        "new": [entry(key, pkg) for key, pkg in new.items() if key not in old],
+        "removed": [entry(key, pkg) for key, pkg in old.items() if key not in new],
+        "repriced": [
+            {**entry(key, pkg), "old_price": old[key].get('price')}
+            for key, pkg in new.items()
+            if key in old and str(old[key].get('price')) != str(pkg.get('price'))
+        ],
+    }
+
+
+class CatalogSync:
+    """
+    Incremental copy of the GamePoint catalog, persisted in Redis per mode: one hash field
+    per product under products_key, plus the list order and sync time under
+    snapshot_key, so a few products can be read without decoding the whole catalog.
+
+    Each run lists products (one call) and fetches details only for products that are new,
+    or due: hot ones (hot_ids, or changed within RECENT_CHANGE_SECONDS) every HOT_SECONDS,
+    the rest every COLD_SECONDS. Every entry keeps its product data, content hash,
+    fetched_at and changed_at. A product whose detail fails keeps its previous entry and is
+    retried next run. The run's package diff is returned and kept under diff_key.
+    """
+
+    def __init__(self, gp, redis_cache=None, hot_seconds=HOT_SECONDS, cold_seconds=COLD_SECONDS,
+                 recent_change_seconds=RECENT_CHANGE_SECONDS):
+        self.gp = gp
+        self.cache = redis_cache or cache
+        self.hot_seconds = hot_seconds
+        self.cold_seconds = cold_seconds
+        self.recent_change_seconds = recent_change_seconds
+        self.snapshot_key = f"gp_catalog:{gp.config['mode']}:snapshot"
+        self.products_key = f"gp_catalog:{gp.config['mode']}:products"
+        self.diff_key = f"gp_catalog:{gp.config['mode']}:diff"
+        self.lock_key = f"gp_catalog:{gp.config['mode']}:lock"
+
+    def meta(self):
+        """Product order, content hashes and sync time, without any product data."""
+        return self.cache.get(self.snapshot_key) or {"order": [], "hashes": {}, "synced_at": None}
+
+    def load(self):
+        """{"entries": {product_id: entry} in product/list order, "synced_at": ...}"""
+        meta = self.meta()
+        order = meta.get("order", [])
+        stored = self.cache.get_hash(self.products_key) if order else {}
+        entries = {pid: stored[str(pid)] for pid in order if str(pid) in stored}
+        return {"entries": entries, "synced_at": meta.get("synced_at")}
+
+    def products(self):
+        """The last synced catalog in product/list order."""
+        return [entry['product'] for entry in self.load()['entries'].values()]
+
+    def iter_products(self, batch_size=100, meta=None):
+        """The last synced catalog in product/list order, read batch_size products at a time."""
+        order = (meta or self.meta()).get("order", [])
+        for start in range(0, len(order), batch_size):
+            yield from self.get_products(order[start:start + batch_size])
+
+    def get_products(self, product_ids):
+        """Just the given products from the last sync, decoding nothing else."""
+        stored = self.cache.get_hash(self.products_key, product_ids)
+        return [stored[str(pid)]['product'] for pid in product_ids if str(pid) in stored]
+
+    def status(self):
+        snapshot = self.load()
+        products = [entry['product'] for entry in snapshot['entries'].values()]
+        diff = self.cache.get(self.diff_key) or {}
+        return {
+            "mode": self.gp.config['mode'],
+            "synced_at": snapshot['synced_at'],
+            "products": len(products),
+            "packages": sum(len(p.get('packages', [])) for p in products),
+            "syncing": bool(self._lock_holder()),
+            "last_run": {key: value for key, value in diff.items() if not isinstance(value, list)},
+        }
+
+    def _lock_holder(self):
+        try:
+            return self.cache.redis_client.get(self.lock_key)
+        except Exception:
+            return None
+
+    def publish_prices(self, products=None):
+        """Writes gp_price:<package id> for every package in the snapshot. Returns the count."""
+        prices = {}
+        for product in self.iter_products() if products is None else products:
+            for pkg in product.get('packages', []):
+                # Key: "gp_price:12345", Value: "10.50"
+                prices[f"gp_price:{pkg['id']}"] = str(pkg['price'])
+        return self.cache.set_many(prices, expire_seconds=PRICE_TTL)
+
+    def sync(self, hot_ids=(), progress=None, full=False):
+        """
+        The background job's entry point: run() and publish_prices() under a Redis lock, so
+        only one process syncs a mode at a time. Returns the diff, or None if another sync
+        holds the lock.
+        """
+        token = None
+        try:
+            token = self.cache.acquire_lock(self.lock_key, LOCK_SECONDS)
+            locked = token is not None
+        except Exception as e:
+            logger.warning(f"Catalog sync lock unavailable, syncing anyway: {e}")
+            locked = True
+        if not locked:
+            logger.info(f"Catalog sync already running for {self.gp.config['mode']}, skipping")
+            return None
+        try:
+            diff = self.run(hot_ids=hot_ids, progress=progress, full=full)
+            diff["prices_published"] = self.publish_prices()
+            return diff
+        finally:
+            if token:
+                self.cache.release_lock(self.lock_key, token)
+
+    def _is_due(self, entry, hot_ids, now):
+        if entry is None:
+            return True
+        hot = str(entry['product']['id']) in hot_ids or now - entry['changed_at'] < self.recent_change_seconds
+        return now - entry['fetched_at'] >= (self.hot_seconds if hot else self.cold_seconds)
+
+    def run(self, hot_ids=(), progress=None, full=False):
+        """Syncs once and returns the diff; full=True re-fetches every product."""
+        hot_ids = {str(pid) for pid in hot_ids}
+        snapshot = self.load()
+        entries = snapshot['entries']
+        now = time.time()
+
+        listed = self.gp.list_products()
+        if not listed:
+            # An empty list is far more likely a supplier hiccup than an empty catalog
+            raise RuntimeError("GamePoint returned no products; keeping the previous snapshot")
+        due = [p for p in listed if full or self._is_due(entries.get(p['id']), hot_ids, now)]
+        fetched = {p['id']: p for p in self.gp.iter_full_catalog(due, progress=progress)}
+
+        new_entries, changed = {}, {}
+        for product in listed:
+            pid, entry = product['id'], entries.get(product['id'])
+            if pid not in fetched:
+                if entry:
+                    new_entries[pid] = entry
+                continue
+            digest = content_hash(fetched[pid])
+            if entry and entry['hash'] == digest:
+                new_entries[pid] = {**entry, "product": fetched[pid], "fetched_at": now}
+                continue
+            new_entries[pid] = {"product": fetched[pid], "hash": digest, "fetched_at": now, "changed_at": now}
+            changed[pid] = fetched[pid]
+
+        removed = {pid: entry['product'] for pid, entry in entries.items() if pid not in new_entries}
+        before = {pid: entries[pid]['product'] for pid in list(changed) + list(removed) if pid in entries}
+        diff = diff_packages(before, changed)
+        diff.update({
+            "synced_at": now,
+            "listed": len(listed),
+            "fetched": len(fetched),
+            "changed_products": len(changed),
+            "removed_products": len(removed),
+        })
+
+        self.cache.set_hash(self.products_key, new_entries, expire_seconds=SNAPSHOT_TTL)
+        meta = {"order": list(new_entries), "hashes": {pid: e['hash'] for pid, e in new_entries.items()}, "synced_at": now}
+        self.cache.set(self.snapshot_key, meta, expire_seconds=SNAPSHOT_TTL)
+        self.cache.set(self.diff_key, diff, expire_seconds=SNAPSHOT_TTL)
+        logger.info(
+            f"Catalog sync: {len(fetched)}/{len(listed)} details fetched, {len(changed)} products changed, "
+            f"{len(removed)} removed; packages +{len(diff['new'])} -{len(diff['removed'])} "
+            f"~{len(diff['repriced'])} repriced"
+        )
+        return diff
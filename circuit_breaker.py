@@ -0,0 +1,234 @@
+# circuit_breaker.py
+
+import os
+import time
+import asyncio
+import logging
+from functools import wraps
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_RATE = float(os.environ.get('CB_FAILURE_RATE', 0.5))
+SLOW_CALL_SECONDS = float(os.environ.get('CB_SLOW_CALL_SECONDS', 5))
+SLOW_CALL_RATE = float(os.environ.get('CB_SLOW_CALL_RATE', 0.8))
+MIN_CALLS = int(os.environ.get('CB_MIN_CALLS', 10))
+WINDOW_SECONDS = int(os.environ.get('CB_WINDOW_SECONDS', 60))
+BUCKET_SECONDS = int(os.environ.get('CB_BUCKET_SECONDS', 10))
+OPEN_SECONDS = int(os.environ.get('CB_OPEN_SECONDS', 30))
+
+
+class CircuitBreaker:
+    """
+    Failure-rate / slow-call circuit breaker whose state lives in Redis, so every gunicorn
+    worker sees the same picture. Calls are counted in fixed buckets over a rolling window.
+    If Redis is unreachable the breaker stays out of the way and lets calls through.
+    """
+
+    def __init__(self, name, redis_client=None, failure_rate=FAILURE_RATE, slow_call_seconds=SLOW_CALL_SECONDS,
+                 slow_call_rate=SLOW_CALL_RATE, min_calls=MIN_CALLS, window_seconds=WINDOW_SECONDS,
+                 bucket_seconds=BUCKET_SECONDS, open_seconds=OPEN_SECONDS):
+        self.name = name
+        self._redis = redis_client
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.open_seconds = open_seconds
+        self.state_key = f"cb:{name}:state"
+        self.probe_key = f"cb:{name}:probe"
+
+    @property
+    def redis(self):
+        return self._redis or cache.redis_client
+
+    def _bucket_key(self, bucket):
+        return f"cb:{self.name}:w:{bucket}"
+
+    def _current_bucket(self, now=None):
+        return int((now or time.time()) // self.bucket_seconds)
+
+    def _read_state(self):
+        raw = self.redis.hgetall(self.state_key)
+        data = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v) for k, v in raw.items()}
+        return data.get("state", CLOSED), float(data.get("opened_at", 0))
+
+    def _open(self, reason):
+        now = time.time()
+        pipe = self.redis.pipeline()
+        pipe.hset(self.state_key, mapping={"state": OPEN, "opened_at": now, "reason": reason})
+        pipe.delete(self.probe_key)
+        pipe.execute()
+        logger.warning(f"Circuit for {self.name} opened: {reason}")
+
+    def _close(self):
+        current = self._current_bucket()
+        pipe = self.redis.pipeline()
+        pipe.delete(self.state_key, self.probe_key)
+        # Start the window afresh so the failures that opened the circuit don't reopen it
+        for bucket in range(current - self.window_seconds // self.bucket_seconds, current + 1):
+            pipe.delete(self._bucket_key(bucket))
+        pipe.execute()
+        logger.info(f"Circuit for {self.name} closed")
+
+    def allow(self):
+        """Returns (allowed, is_probe)."""
+        try:
+            state, opened_at = self._read_state()
+            if state == CLOSED:
+                return True, False
+            if state == OPEN and time.time() - opened_at < self.open_seconds:
+                return False, False
+            # Open long enough (or already half-open): exactly one caller gets to probe
+            if self.redis.set(self.probe_key, 1, nx=True, ex=max(int(self.slow_call_seconds * 2), 1)):
+                self.redis.hset(self.state_key, "state", HALF_OPEN)
+                return True, True
+            return False, False
+        except Exception as e:
+            logger.debug(f"Circuit breaker {self.name} unavailable, allowing call: {e}")
+            return True, False
+
+    def release_probe(self):
+        try:
+            self.redis.delete(self.probe_key)
+        except Exception as e:
+            logger.debug(f"Circuit breaker {self.name} probe release error: {e}")
+
+    def window_stats(self):
+        current = self._current_bucket()
+        buckets = range(current - self.window_seconds // self.bucket_seconds + 1, current + 1)
+        pipe = self.redis.pipeline()
+        for bucket in buckets:
+            pipe.hgetall(self._bucket_key(bucket))
+        totals = {"calls": 0, "failures": 0, "slow": 0}
+        for raw in pipe.execute():
+            for k, v in raw.items():
+                field = k.decode() if isinstance(k, bytes) else k
+                if field in totals:
+                    totals[field] += int(v)
+        calls = totals["calls"]
+        totals["error_rate"] = round(totals["failures"] / calls, 4) if calls else 0.0
+        totals["slow_rate"] = round(totals["slow"] / calls, 4) if calls else 0.0
+        return totals
+
+    def record(self, failed, elapsed, is_probe=False):
+        slow = elapsed >= self.slow_call_seconds
+        try:
+            key = self._bucket_key(self._current_bucket())
+            pipe = self.redis.pipeline()
+            pipe.hincrby(key, "calls", 1)
+            if failed:
+                pipe.hincrby(key, "failures", 1)
+            if slow:
+                pipe.hincrby(key, "slow", 1)
+            pipe.expire(key, self.window_seconds + self.bucket_seconds)
+            pipe.execute()
+
+            if is_probe:
+                if failed or slow:
+                    self._open("half-open probe failed")
+                else:
+                    self._close()
+                return
+
+            if failed or slow:
+                stats = self.window_stats()
+                if stats["calls"] >= self.min_calls:
+                    if stats["error_rate"] >= self.failure_rate:
+                        self._open(f"error rate {stats['error_rate']:.0%} over {stats['calls']} calls")
+                    elif stats["slow_rate"] >= self.slow_call_rate:
+                        self._open(f"slow call rate {stats['slow_rate']:.0%} over {stats['calls']} calls")
+        except Exception as e:
+            logger.debug(f"Circuit breaker {self.name} record error: {e}")
+
+    def call(self, func, is_failure, fallback, is_skipped=None):
+        """
+        Runs func() if the circuit allows it, otherwise returns fallback() straight away.
+        Results for which is_skipped(result) is true never reached the provider: they aren't
+        recorded, and a probe slot they held is handed back for the next real call.
+        """
+        allowed, is_probe = self.allow()
+        if not allowed:
+            return fallback()
+        start = time.monotonic()
+        try:
+            result = func()
+        except Exception:
+            self.record(True, time.monotonic() - start, is_probe)
+            raise
+        if is_skipped and is_skipped(result):
+            if is_probe:
+                self.release_probe()
+            return result
+        self.record(is_failure(result), time.monotonic() - start, is_probe)
+        return result
+
+    async def call_async(self, coro_func, is_failure, fallback, is_skipped=None):
+        """call() for coroutines; the Redis bookkeeping runs in a worker thread."""
+        allowed, is_probe = await asyncio.to_thread(self.allow)
+        if not allowed:
+            return fallback()
+        start = time.monotonic()
+        try:
+            result = await coro_func()
+        except asyncio.CancelledError:
+            # A hedged call that lost the race says nothing about the provider's health
+            if is_probe:
+                await asyncio.to_thread(self.release_probe)
+            raise
+        except Exception:
+            await asyncio.to_thread(self.record, True, time.monotonic() - start, is_probe)
+            raise
+        if is_skipped and is_skipped(result):
+            if is_probe:
+                await asyncio.to_thread(self.release_probe)
+            return result
+        await asyncio.to_thread(self.record, is_failure(result), time.monotonic() - start, is_probe)
+        return result
+
+    def status(self):
+        try:
+            state, opened_at = self._read_state()
+            stats = self.window_stats()
+        except Exception as e:
+            return {"provider": self.name, "state": "unknown", "error": str(e)}
+        return {
+            "provider": self.name,
+            "state": state,
+            "opened_at": opened_at or None,
+            "window_seconds": self.window_seconds,
+            **stats,
+        }
+
+    def reset(self):
+        self._close()
+
+
+_breakers = {}
+
+
+def get_breaker(name):
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+def all_breakers():
+    return [_breakers[name] for name in sorted(_breakers)]
+
+
+def circuit_protected(name, is_failure, fallback, is_skipped=None):
+    """Decorator form of CircuitBreaker.call for upstream handler functions."""
+    breaker = get_breaker(name)
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return breaker.call(lambda: f(*args, **kwargs), is_failure, fallback, is_skipped)
+        return decorated_function
+    return decorator
@@ -3,12 +3,13 @@
 import logging
 import traceback
 from functools import wraps
-from flask import jsonify, request, g
+from flask import jsonify, request, g, has_app_context
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 import os
 from datetime import datetime
 import uuid # Import uuid
+import metrics
 
 # Initialize Sentry for error monitoring
 if os.environ.get('SENTRY_DSN'):
@@ -113,8 +114,8 @@ def log_execution_time(operation_name):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             start_time = datetime.now()
-            # Note: Using g.request_id here as well for consistency
-            extra = {'request_id': getattr(g, 'request_id', 'unknown'), 'operation': operation_name}
+            # Note: Using g.request_id here as well for consistency (g only exists inside a request/app context)
+            extra = {'request_id': getattr(g, 'request_id', 'unknown') if has_app_context() else 'unknown', 'operation': operation_name}
             
             logger.info(f"Starting {operation_name}", extra=extra)
             
@@ -125,6 +126,7 @@ def log_execution_time(operation_name):
                     f"Completed {operation_name} in {execution_time:.2f}s", 
                     extra={**extra, 'execution_time': execution_time}
                 )
+                metrics.OPERATION_LATENCY.labels(operation=operation_name, outcome="success").observe(execution_time)
                 return result
             except Exception as e:
                 execution_time = (datetime.now() - start_time).total_seconds()
@@ -133,6 +135,7 @@ def log_execution_time(operation_name):
                     extra={**extra, 'execution_time': execution_time},
                     exc_info=True
                 )
+                metrics.OPERATION_LATENCY.labels(operation=operation_name, outcome="error").observe(execution_time)
                 raise
         return decorated_function
     return decorator
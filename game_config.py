@@ -0,0 +1,147 @@
+# game_config.py
+
+import os
+import time
+import uuid
+import logging
+import threading
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = int(os.environ.get('GAME_CONFIG_REFRESH_SECONDS', 300))
+# A slug we don't know triggers a reload at most this often (new games show up without an admin refresh)
+MISS_RELOAD_SECONDS = int(os.environ.get('GAME_CONFIG_MISS_RELOAD_SECONDS', 30))
+RETRY_SECONDS = 10
+INVALIDATE_CHANNEL = "game_config:invalidate"
+
+
+class GameConfigSnapshot:
+    """
+    In-memory copy of the games rows /check-id needs, keyed by game_key.
+
+    loader() returns the rows. The snapshot is replaced wholesale on every load and carries
+    a version number, so readers always see one consistent set. It reloads when older than
+    refresh_seconds, and right away when an invalidation is published on INVALIDATE_CHANNEL.
+    """
+
+    def __init__(self, loader, redis_cache=None, refresh_seconds=REFRESH_SECONDS,
+                 miss_reload_seconds=MISS_RELOAD_SECONDS, channel=INVALIDATE_CHANNEL, listen=True):
+        self.loader = loader
+        self.cache = redis_cache or cache
+        self.refresh_seconds = refresh_seconds
+        self.miss_reload_seconds = miss_reload_seconds
+        self.channel = channel
+        self.listen = listen
+        self.version = 0
+        self.loaded_at = 0.0
+        self._games = None
+        self._load_lock = threading.Lock()
+        self._listener_pid = None
+        self._retry_at = 0.0
+
+    def load(self):
+        """Fetches every row and swaps the snapshot in. Returns the new version."""
+        with self._load_lock:
+            return self._load()
+
+    def _load(self):
+        rows = self.loader() or []
+        self._games = {row['game_key']: row for row in rows if row.get('game_key')}
+        self.loaded_at = time.time()
+        self.version += 1
+        logger.info(f"Game config snapshot v{self.version} loaded ({len(self._games)} games)")
+        return self.version
+
+    def _is_fresh(self, min_age):
+        return self._games is not None and (time.time() - self.loaded_at < min_age or time.time() < self._retry_at)
+
+    def _refresh(self, min_age):
+        """Reloads if the snapshot is older than min_age; only one thread does the work."""
+        if self._is_fresh(min_age):
+            return
+        if self._games is None:
+            # Nothing to serve yet, so callers have to wait for the first load
+            with self._load_lock:
+                if self._games is None:
+                    self._load()
+            return
+        # Another thread is already reloading; keep serving the current snapshot meanwhile
+        if not self._load_lock.acquire(blocking=False):
+            return
+        try:
+            if not self._is_fresh(min_age):
+                self._load()
+        except Exception as e:
+            self._retry_at = time.time() + RETRY_SECONDS
+            logger.error(f"Game config refresh failed, serving v{self.version}: {e}")
+        finally:
+            self._load_lock.release()
+
+    def _games_fresh(self):
+        self.ensure_listener()
+        self._refresh(self.refresh_seconds)
+        return self._games
+
+    def get(self, game_key):
+        """Returns the games row for game_key, or None."""
+        game = self._games_fresh().get(game_key)
+        if game is None:
+            self._refresh(self.miss_reload_seconds)
+            game = self._games.get(game_key)
+        return game
+
+    def get_many(self, game_keys):
+        """Returns {game_key: row} for the keys that exist."""
+        games = self._games_fresh()
+        if any(key not in games for key in game_keys):
+            self._refresh(self.miss_reload_seconds)
+            games = self._games
+        return {key: games[key] for key in game_keys if key in games}
+
+    def invalidate(self):
+        """Reloads here and tells every other worker to reload too."""
+        self.load()
+        try:
+            self.cache.redis_client.publish(self.channel, uuid.uuid4().hex)
+        except Exception as e:
+            logger.error(f"Game config invalidation publish failed: {e}")
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.cache.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        try:
+                            self.load()
+                        except Exception as e:
+                            logger.error(f"Game config reload after invalidation failed: {e}")
+            except Exception as e:
+                logger.debug(f"Game config listener error, retrying: {e}")
+                time.sleep(5)
+
+    def ensure_listener(self):
+        # Started per process, so forked workers each get their own subscriber
+        if not self.listen or self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        threading.Thread(target=self._listen, name="game-config-listener", daemon=True).start()
+
+    def warm(self):
+        """Loads the snapshot and starts the invalidation listener (gunicorn worker start)."""
+        self.ensure_listener()
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Game config warm-up failed, will retry on first request: {e}")
+
+    def status(self):
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at or None,
+            "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+            "games": len(self._games or {}),
+            "refresh_seconds": self.refresh_seconds,
+        }
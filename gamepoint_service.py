@@ -4,14 +4,137 @@ import json
 import jwt
 import requests
 import logging
-import certifi
+import threading
+import hashlib
+import random
+import concurrent.futures
 from supabase import create_client
 from error_handler import ExternalAPIError, AppError
+from singleflight import SingleFlight
+import redis_cache
+from redis_cache import cache
+import metrics
+import timeout_policy
+import http_client
+from rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# Last token seen per mode; only used when Redis can't be reached
 _token_cache = {}
 
+TOKEN_TTL = 3600
+# Tokens are renewed in the background once they have less than this long left
+TOKEN_REFRESH_SECONDS = int(os.environ.get('GAMEPOINT_TOKEN_REFRESH_SECONDS', 300))
+TOKEN_LOCK_SECONDS = 30
+TOKEN_WAIT_SECONDS = 10
+_background_refresh = threading.Lock()
+
+# Settings are re-read at most this often, or as soon as CONFIG_VERSION_KEY moves
+CONFIG_CACHE_SECONDS = int(os.environ.get('GAMEPOINT_CONFIG_CACHE_SECONDS', 300))
+CONFIG_VERSION_KEY = "gamepoint_config_version"
+_service = {"instance": None, "version": None, "loaded_at": 0.0}
+_service_lock = threading.Lock()
+
+
+def token_key(mode):
+    return f"gamepoint_token_{mode}"
+
+
+def invalidate_tokens():
+    """Drops the shared tokens for both modes, e.g. after credentials change."""
+    _token_cache.clear()
+    for mode in ('live', 'sandbox'):
+        cache.delete(token_key(mode))
+
+# Read-only endpoints: identical concurrent calls share one request (see singleflight.py)
+IDEMPOTENT_ENDPOINTS = {"product/list", "product/detail", "merchant/balance"}
+_flight = SingleFlight("gamepoint")
+
+REQUEST_TIMEOUT = 20
+# Not retried and not safe to give up on early: a client-side timeout here can still leave a
+# placed order behind, so it keeps the full fixed timeout
+FIXED_TIMEOUT_ENDPOINTS = {"order/create"}
+timeouts = timeout_policy.get_policy("gamepoint", REQUEST_TIMEOUT)
+
+# Sized for the product/detail fan-outs so every worker thread keeps its own warm connection
+POOL_MAXSIZE = int(os.environ.get('GAMEPOINT_POOL_MAXSIZE', 30))
+RETRIES = int(os.environ.get('GAMEPOINT_RETRIES', 2))
+# Also retried on 502/503/504; everything else (order/create above all) only on connect failures
+RETRYABLE_ENDPOINTS = IDEMPOTENT_ENDPOINTS | {"merchant/token"}
+
+# Catalog fetches: product/detail calls per second across all processes, and per-fetch threads
+CATALOG_RATE = float(os.environ.get('GAMEPOINT_CATALOG_RATE', 10))
+CATALOG_CONCURRENCY = int(os.environ.get('GAMEPOINT_CATALOG_CONCURRENCY', 10))
+CATALOG_RETRIES = int(os.environ.get('GAMEPOINT_CATALOG_RETRIES', 3))
+THROTTLE_BACKOFF_SECONDS = 1.0
+THROTTLE_BACKOFF_MAX_SECONDS = 30.0
+
+class GamePointThrottled(ExternalAPIError):
+    """GamePoint answered 429. retry_after is its Retry-After in seconds, if it sent one."""
+
+    def __init__(self, retry_after=None):
+        super().__init__("GamePoint rate limit reached", service_name="GamePoint")
+        self.retry_after = retry_after
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def log_progress(label, every=50):
+    """A progress callback for iter_full_catalog that logs every `every` products."""
+    def progress(done, total):
+        if done % every == 0 or done == total:
+            logger.info(f"{label}: {done}/{total} products")
+    return progress
+
+
+def _config_version():
+    try:
+        version = cache.redis_client.get(CONFIG_VERSION_KEY)
+        return int(version) if version else 0
+    except Exception as e:
+        logger.debug(f"GamePoint config version unavailable: {e}")
+        return None
+
+
+def get_gamepoint_service(supabase_client=None):
+    """
+    Process-wide GamePointService. Its settings are loaded once and reused until
+    invalidate_config() bumps the shared version (or CONFIG_CACHE_SECONDS pass), instead of
+    a settings query per construction.
+    """
+    version = _config_version()
+    with _service_lock:
+        current = _service["instance"]
+        stale = (current is None
+                 or (version is not None and version != _service["version"])
+                 or time.time() - _service["loaded_at"] > CONFIG_CACHE_SECONDS)
+        if stale:
+            if current is not None:
+                current.close()
+            _service["instance"] = GamePointService(supabase_client=supabase_client)
+            _service["version"] = version
+            _service["loaded_at"] = time.time()
+        return _service["instance"]
+
+
+def invalidate_config():
+    """Makes every process reload GamePoint settings on its next get_gamepoint_service()."""
+    with _service_lock:
+        if _service["instance"] is not None:
+            _service["instance"].close()
+        _service["instance"] = None
+    try:
+        cache.redis_client.incr(CONFIG_VERSION_KEY)
+    except Exception as e:
+        logger.error(f"GamePoint config invalidation failed: {e}")
+
+
 class GamePointService:
     def __init__(self, supabase_client=None):
         if supabase_client:
@@ -40,6 +163,26 @@ class GamePointService:
                 "http": proxy_url,
                 "https": proxy_url
             }
+        self.session = self._build_session()
+
+    def _build_session(self):
+        """
+        Keep-alive session for every GamePoint call, so requests reuse the proxy tunnel and
+        TLS connection instead of paying a CONNECT and handshake each time.
+        """
+        headers = {'Content-Type': 'application/json', 'partnerid': self.partner_id, 'User-Agent': 'GameVault/1.0'}
+        session = http_client.build_session(
+            http_client.build_adapter(POOL_MAXSIZE, RETRIES, backoff_factor=0.3, status_methods=()),
+            headers=headers)
+        # requests picks the longest matching mount prefix; both adapters pool to the same host
+        retrying = http_client.build_adapter(POOL_MAXSIZE, RETRIES, backoff_factor=0.3, status_methods=("POST",))
+        for endpoint in RETRYABLE_ENDPOINTS:
+            session.mount(f"{self.base_url}/{endpoint}", retrying)
+        return session
+
+    def close(self):
+        """Closes the pooled session's connections; for when this instance is being replaced."""
+        self.session.close()
 
     def _load_config(self):
         keys = [
@@ -79,26 +222,30 @@ class GamePointService:
         return json.dumps({"payload": token})
 
     def _request(self, endpoint, data):
+        if endpoint in IDEMPOTENT_ENDPOINTS:
+            params = json.dumps({k: v for k, v in data.items() if k != 'token'}, sort_keys=True)
+            key = f"{self.config['mode']}:{endpoint}:{hashlib.md5(params.encode()).hexdigest()}"
+            return _flight.do(key, lambda: self._send(endpoint, data))
+        return self._send(endpoint, data)
+
+    def _send(self, endpoint, data):
         url = f"{self.base_url}/{endpoint}"
         body = self._generate_payload(data)
-        
-        headers = {
-            'Content-Type': 'application/json',
-            'partnerid': self.partner_id,
-            'User-Agent': 'GameVault/1.0'
-        }
+        timeout = REQUEST_TIMEOUT if endpoint in FIXED_TIMEOUT_ENDPOINTS else timeouts.timeouts()
 
         try:
             logger.info(f"GamePoint Request [{self.config['mode']}]: {endpoint}")
             
-            response = requests.post(
-                url, 
-                data=body, 
-                headers=headers, 
-                proxies=self.proxies, 
-                timeout=20,
-                verify=certifi.where()
-            )
+            start = time.monotonic()
+            # Proxies go per call: session-level proxies lose to HTTP(S)_PROXY in the environment
+            with metrics.timed_upstream("gamepoint") as timer:
+                timer.response = response = self.session.post(url, data=body, proxies=self.proxies, timeout=timeout)
+            timeouts.record(time.monotonic() - start)
+
+            # Order endpoints keep handling a 429 body the way they always have
+            if response.status_code == 429 and endpoint in IDEMPOTENT_ENDPOINTS:
+                logger.warning(f"GamePoint throttled {endpoint}")
+                raise GamePointThrottled(_retry_after(response))
             
             try:
                 resp_json = response.json()
@@ -115,6 +262,10 @@ class GamePointService:
                 
             return resp_json
 
+        except requests.exceptions.Timeout as e:
+            timeouts.record_timeout(timeout if isinstance(timeout, (int, float)) else timeout[1])
+            logger.error(f"GamePoint request timed out: {str(e)}")
+            raise ExternalAPIError("Failed to connect to GamePoint Supplier", service_name="GamePoint")
         except requests.exceptions.ProxyError as e:
             logger.error(f"Proxy Connection Failed: {str(e)}")
             raise ExternalAPIError("Proxy Connection Failed (407). Password might contain special chars.", service_name="AlibabaProxy")
@@ -122,62 +273,149 @@ class GamePointService:
             logger.error(f"Network Error connecting to GamePoint: {str(e)}")
             raise ExternalAPIError("Failed to connect to GamePoint Supplier", service_name="GamePoint")
 
-    def get_token(self):
-        mode = self.config['mode']
-        current_time = time.time()
-        
-        if mode in _token_cache:
-            cached_data = _token_cache[mode]
-            if cached_data['expires'] > current_time:
-                return cached_data['token']
+    def _shared_token(self):
+        """The current token entry from Redis (or the local fallback), if it belongs to our partner id."""
+        try:
+            entry = cache.redis_client.get(token_key(self.config['mode']))
+            entry = redis_cache.decode(entry) if entry else None
+        except Exception as e:
+            logger.debug(f"GamePoint token cache unavailable: {e}")
+            entry = _token_cache.get(self.config['mode'])
+        if entry and entry.get('partner_id') == self.partner_id and entry['expires'] > time.time():
+            return entry
+        return None
 
+    def _fetch_token(self):
         response = self._request("merchant/token", {})
         token = response.get('token')
-        
-        if token:
-            _token_cache[mode] = {
-                'token': token,
-                'expires': current_time + 3600
-            }
-            return token
-        else:
+        if not token:
             raise ExternalAPIError("Failed to retrieve GamePoint Token", service_name="GamePoint")
+        entry = {'token': token, 'expires': time.time() + TOKEN_TTL, 'partner_id': self.partner_id}
+        _token_cache[self.config['mode']] = entry
+        cache.set(token_key(self.config['mode']), entry, expire_seconds=TOKEN_TTL)
+        return entry
+
+    def _refresh_token(self, wait):
+        """
+        Fetches a new token under a Redis lock so only one process calls merchant/token.
+        With wait=True, a process that loses the lock waits for the winner's token.
+        """
+        lock_key = f"{token_key(self.config['mode'])}:lock"
+        lock_token = None
+        try:
+            lock_token = cache.acquire_lock(lock_key, TOKEN_LOCK_SECONDS)
+            locked = lock_token is not None
+        except Exception:
+            locked = True  # No Redis to coordinate through; just fetch
+        if locked:
+            try:
+                return self._fetch_token()
+            finally:
+                if lock_token:
+                    cache.release_lock(lock_key, lock_token)
+        if not wait:
+            return None
+        deadline = time.monotonic() + TOKEN_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            entry = self._shared_token()
+            if entry:
+                return entry
+        return self._fetch_token()
+
+    def _refresh_in_background(self):
+        # One refresh thread per process at a time
+        if not _background_refresh.acquire(blocking=False):
+            return
+        def refresh():
+            try:
+                self._refresh_token(wait=False)
+            except Exception as e:
+                logger.warning(f"Background GamePoint token refresh failed: {e}")
+            finally:
+                _background_refresh.release()
+        threading.Thread(target=refresh, name="gamepoint-token-refresh", daemon=True).start()
+
+    def get_token(self):
+        entry = self._shared_token()
+        if entry:
+            if entry['expires'] - time.time() < TOKEN_REFRESH_SECONDS:
+                # Still valid: hand it out and renew it before anyone has to wait
+                self._refresh_in_background()
+            return entry['token']
+        return self._refresh_token(wait=True)['token']
 
     def check_balance(self):
         token = self.get_token()
         response = self._request("merchant/balance", {"token": token})
         return response.get('balance')
 
-    def get_full_catalog(self):
+    def list_products(self, token=None):
+        response = self._request("product/list", {"token": token or self.get_token()})
+        return response.get('detail', [])
+
+    def _fetch_detail(self, token, product, bucket, retries):
+        """product/detail for one product, retried with exponential backoff while throttled."""
+        for attempt in range(retries + 1):
+            bucket.acquire(max_wait=float("inf"))
+            try:
+                detail_resp = self._request("product/detail", {"token": token, "productid": product['id']})
+            except GamePointThrottled as e:
+                if attempt == retries:
+                    break
+                delay = e.retry_after or min(THROTTLE_BACKOFF_MAX_SECONDS, THROTTLE_BACKOFF_SECONDS * 2 ** attempt)
+                time.sleep(delay * random.uniform(1, 1.25))
+                continue
+            except Exception as e:
+                logger.warning(f"Failed to fetch detail for {product.get('name', 'Unknown')}: {e}")
+                return None
+            if detail_resp.get('code') != 200:
+                return None
+            return {
+                **product,
+                "fields": detail_resp.get('fields', []),
+                "packages": detail_resp.get('package', []),
+                "server": detail_resp.get('server', []),
+            }
+        logger.warning(f"Gave up on detail for {product.get('name', 'Unknown')} after {retries + 1} throttled attempts")
+        return None
+
+    def iter_full_catalog(self, products=None, rate=None, concurrency=None, retries=CATALOG_RETRIES, progress=None):
+        """
+        Yields each product with its fields, packages and server list as its detail arrives.
+        At most `concurrency` details are in flight, and all catalog fetches share one Redis
+        token bucket of `rate` requests per second. progress(done, total) is called after
+        each product; products whose detail can't be fetched are skipped.
+        """
         token = self.get_token()
-        
+        if products is None:
+            products = self.list_products(token)
+        bucket = TokenBucket("gamepoint_catalog", rate or CATALOG_RATE)
+        total = len(products)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency or CATALOG_CONCURRENCY,
+                                                         thread_name_prefix="gamepoint-catalog")
         try:
-            list_resp = self._request("product/list", {"token": token})
-            products = list_resp.get('detail', [])
+            futures = [executor.submit(self._fetch_detail, token, p, bucket, retries) for p in products]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                if progress:
+                    progress(done, total)
+                result = future.result()
+                if result:
+                    yield result
+        finally:
+            # A consumer that stops early (e.g. a dropped CSV download) shouldn't keep fetching
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_full_catalog(self, progress=None, **kwargs):
+        """The whole catalog in product/list order; see iter_full_catalog for the options."""
+        try:
+            products = self.list_products()
         except Exception as e:
             logger.error(f"Failed to fetch product list: {e}")
             return []
-        
-        full_catalog = []
-        
-        for p in products:
-            try:
-                time.sleep(0.2)
-                detail_resp = self._request("product/detail", {"token": token, "productid": p['id']})
-                
-                if detail_resp.get('code') == 200:
-                    p_data = {
-                        "id": p['id'],
-                        "name": p['name'],
-                        "fields": detail_resp.get('fields', []),
-                        "packages": detail_resp.get('package', [])
-                    }
-                    full_catalog.append(p_data)
-            except Exception as e:
-                logger.warning(f"Failed to fetch detail for {p.get('name', 'Unknown')}: {e}")
-                continue
-                
-        return full_catalog
+        order = {p['id']: i for i, p in enumerate(products)}
+        catalog = list(self.iter_full_catalog(products, progress=progress, **kwargs))
+        return sorted(catalog, key=lambda p: order[p['id']])
 
     def validate_id(self, product_id, inputs):
         token = self.get_token()
@@ -0,0 +1,102 @@
+# garena_client.py
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from http_client import UpstreamRequest
+
+SESSION_SECONDS = int(os.environ.get('GARENA_SESSION_SECONDS', 900))
+ROLE_CACHE_SECONDS = int(os.environ.get('GARENA_ROLE_CACHE_SECONDS', 1800))
+MAX_ENTRIES = int(os.environ.get('GARENA_CACHE_MAX_ENTRIES', 5000))
+
+
+class _TTLCache:
+    """Small thread-safe LRU with per-entry expiry, local to the worker."""
+
+    def __init__(self, ttl, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class GarenaClient:
+    """
+    shop.garena.sg player lookups. A lookup is a player_id_login POST, whose cookie then
+    authorises the roles GET for that player; the roles call can't start before the login
+    answers, so a first lookup is always two round trips on the pooled keep-alive connection.
+    Repeat lookups are cheaper: the login cookie is kept per (app_id, uid) for
+    SESSION_SECONDS, so the roles call goes out alone, and found roles are remembered
+    for ROLE_CACHE_SECONDS and need no round trip at all.
+    """
+
+    def __init__(self, login_url, roles_url, session_seconds=SESSION_SECONDS, role_cache_seconds=ROLE_CACHE_SECONDS):
+        self.login_url = login_url
+        self.roles_url = roles_url
+        self.sessions = _TTLCache(session_seconds)
+        self.roles = _TTLCache(role_cache_seconds)
+
+    def _roles_request(self, app_id, cookie):
+        headers = {"Referer": f"https://shop.garena.sg/?app={app_id}", "Cookie": cookie}
+        params = {'app_id': app_id, 'region': 'SG', 'language': 'en', 'source': 'pc'}
+        return UpstreamRequest("GET", self.roles_url, params=params, headers=headers)
+
+    def _parse_roles(self, app_id, response):
+        if response.status_code != 200:
+            return []
+        return response.json().get(str(app_id), [])
+
+    def flow(self, app_id, uid):
+        """Validator flow (see http_client.run_flow) returning the player's first role name."""
+        key = (str(app_id), str(uid))
+        role = self.roles.get(key)
+        if role is not None:
+            return {"status": "success", "username": role}
+
+        cookie = self.sessions.get(key)
+        data = []
+        if cookie:
+            data = self._parse_roles(app_id, (yield self._roles_request(app_id, cookie)))
+            if not data:
+                # Expired or revoked session: log in again rather than report a missing player
+                self.sessions.delete(key)
+
+        if not data:
+            headers = {"Referer": f"https://shop.garena.sg/?app={app_id}"}
+            login = yield UpstreamRequest("POST", self.login_url, json={"app_id": int(app_id), "login_id": uid}, headers=headers)
+            if login.status_code != 200: return {"status": "error", "message": "Invalid ID"}
+            # The pooled session keeps no cookies, so the login cookie is carried explicitly
+            cookie = "; ".join(f"{name}={value}" for name, value in login.cookies.items())
+            roles = yield self._roles_request(app_id, cookie)
+            data = roles.json().get(str(app_id), [])
+            if data:
+                self.sessions.set(key, cookie)
+
+        if data:
+            role = data[0].get("role")
+            self.roles.set(key, role)
+            return {"status": "success", "username": role}
+        return {"status": "error", "message": "No player found"}
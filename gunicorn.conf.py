@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+#
+# Picked up automatically by `gunicorn app:app` (and `gunicorn asgi:app -k ...`) from the
+# project root. Settings stay on the command line / GUNICORN_CMD_ARGS; this file only hooks
+# into the worker lifecycle.
+
+import os
+import shutil
+import tempfile
+
+# Workers write Prometheus samples here and /metrics merges them (see metrics.py). It has
+# to be in the environment before any worker imports prometheus_client.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "gamevault-metrics"))
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be merged into the new one
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # Load the games snapshot before the worker takes traffic, so the first /check-id
+    # requests don't each wait on Supabase
+    import app
+    app.game_config.warm()
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
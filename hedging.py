@@ -0,0 +1,145 @@
+# hedging.py
+
+import os
+import time
+import asyncio
+import logging
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for hedged upstream calls. Stragglers keep running here after a winner is
+# returned, so size it for (concurrent checks x providers per check).
+_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.environ.get('HEDGE_MAX_WORKERS', 32)),
+    thread_name_prefix="hedge"
+)
+
+
+def is_success(result):
+    return bool(result) and result.get("status") == "success"
+
+
+def first_success(providers, hedge_delay=None, timeout=None, success=is_success):
+    """
+    Runs (name, func) providers until one returns a successful result.
+
+    hedge_delay=None tries them strictly in order, 0 races them all at once, and any other
+    value starts the next provider after that many seconds (or as soon as the running ones fail).
+    Returns (winner_name, result). If nobody succeeds, winner_name is None and result is the
+    last non-empty result in provider order.
+    """
+    pending = list(providers)
+    order = [name for name, _ in providers]
+    futures = {}
+    results = {}
+    deadline = time.monotonic() + timeout if timeout else None
+
+    def launch():
+        name, func = pending.pop(0)
+        futures[_executor.submit(func)] = name
+
+    launch()
+    while pending and hedge_delay == 0:
+        launch()
+
+    processed = set()
+    while True:
+        running = set(futures) - processed
+        if not running:
+            if not pending:
+                break
+            launch()
+            continue
+
+        wait_for = hedge_delay if pending else None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+        done, _ = concurrent.futures.wait(running, timeout=wait_for, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            processed.add(future)
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.warning(f"Hedged provider {name} raised: {e}")
+                results[name] = None
+            if success(results[name]):
+                # Not-yet-started calls are dropped; running ones finish in the background and are ignored
+                for straggler in set(futures) - processed:
+                    straggler.cancel()
+                return name, results[name]
+
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        if pending:
+            launch()
+
+    for straggler in set(futures) - processed:
+        straggler.cancel()
+    fallback = next((results[name] for name in reversed(order) if results.get(name)), None)
+    return None, fallback
+
+
+async def first_success_async(providers, hedge_delay=None, timeout=None, success=is_success):
+    """
+    asyncio counterpart of first_success for (name, coroutine_function) providers.
+    Losing calls are cancelled outright instead of being left to finish.
+    """
+    pending = list(providers)
+    order = [name for name, _ in providers]
+    tasks = {}
+    results = {}
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+
+    def launch():
+        name, func = pending.pop(0)
+        tasks[asyncio.ensure_future(func())] = name
+
+    launch()
+    while pending and hedge_delay == 0:
+        launch()
+
+    try:
+        while True:
+            running = {t for t in tasks if tasks[t] not in results}
+            if not running:
+                if not pending:
+                    break
+                launch()
+                continue
+
+            wait_for = hedge_delay if pending else None
+            if deadline is not None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+            done, _ = await asyncio.wait(running, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                try:
+                    results[name] = task.result()
+                except Exception as e:
+                    logger.warning(f"Hedged provider {name} raised: {e}")
+                    results[name] = None
+                if success(results[name]):
+                    return name, results[name]
+
+            if deadline is not None and loop.time() >= deadline:
+                break
+            if pending:
+                launch()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    fallback = next((results[name] for name in reversed(order) if results.get(name)), None)
+    return None, fallback
@@ -0,0 +1,227 @@
+# http_client.py
+
+import os
+import time
+import logging
+import threading
+import certifi
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import metrics
+import timeout_policy
+from rate_limiter import TokenBucket, OutboundRateLimited
+
+logger = logging.getLogger(__name__)
+
+PROXY_URL = os.environ.get('PROXY_URL')
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+DEFAULT_RETRIES = int(os.environ.get('HTTP_RETRIES', 1))
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+# How long a call may queue for an outbound rate-limit token before it is shed
+DEFAULT_RATE_WAIT = float(os.environ.get('UPSTREAM_RATE_WAIT', 1))
+
+# host -> upstream settings, filled in by register_upstream()
+_upstreams = {}
+# host -> (HTTPAdapter, shared Session)
+_pools = {}
+_lock = threading.Lock()
+
+
+def _rate_limit_from_env(name, rate, burst):
+    # UPSTREAM_RATE_<NAME>="rate:burst" (calls per second) overrides the code default; "off" disables it
+    value = os.environ.get(f"UPSTREAM_RATE_{name.upper()}")
+    if not value:
+        return rate, burst
+    if value.lower() == "off":
+        return None, None
+    rate, _, burst = value.partition(":")
+    return float(rate), float(burst) if burst else None
+
+
+def register_upstream(name, host, headers=None, use_proxy=False, pool_maxsize=None, retries=None, timeout=DEFAULT_TIMEOUT,
+                      rate=None, burst=None, rate_wait=DEFAULT_RATE_WAIT):
+    """
+    Declares an upstream host and the defaults every request to it should carry.
+    rate/burst cap outbound calls across all workers (see rate_limiter.TokenBucket); a call
+    queues up to rate_wait seconds for a token, and rate_wait=0 sheds it straight away.
+    """
+    rate, burst = _rate_limit_from_env(name, rate, burst)
+    with _lock:
+        _upstreams[host] = {
+            "name": name,
+            "headers": headers or {},
+            "use_proxy": use_proxy,
+            "pool_maxsize": pool_maxsize or DEFAULT_POOL_MAXSIZE,
+            "retries": DEFAULT_RETRIES if retries is None else retries,
+            "timeout": timeout,
+            "bucket": TokenBucket(name, rate, burst) if rate else None,
+            "rate_wait": rate_wait,
+        }
+        # Drop any pool built with the old settings
+        _pools.pop(host, None)
+
+
+def _host(url):
+    return urlparse(url).hostname if "://" in url else url
+
+
+def get_upstream(url):
+    host = _host(url)
+    return _upstreams.get(host) or {
+        "name": host,
+        "headers": {},
+        "use_proxy": False,
+        "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+        "retries": DEFAULT_RETRIES,
+        "timeout": DEFAULT_TIMEOUT,
+        "bucket": None,
+        "rate_wait": DEFAULT_RATE_WAIT,
+    }
+
+
+def upstream_name(url):
+    return get_upstream(url)["name"]
+
+
+def get_timeout_policy(url):
+    """The adaptive TimeoutPolicy for this upstream; its configured timeout is the ceiling."""
+    upstream = get_upstream(url)
+    return timeout_policy.get_policy(upstream["name"], upstream["timeout"])
+
+
+def build_adapter(pool_maxsize=DEFAULT_POOL_MAXSIZE, retries=DEFAULT_RETRIES, backoff_factor=0.1,
+                  status_methods=("GET", "HEAD")):
+    # Connection failures are retried for any method (nothing reached the server);
+    # 502/503/504 only for status_methods, which must be idempotent for this upstream.
+    # Empty status_methods turns status retries off: urllib3 reads an empty
+    # allowed_methods as "any verb", so that case must not rely on it.
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries if status_methods else 0,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504) if status_methods else (),
+        allowed_methods=frozenset(status_methods) if status_methods else Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
+
+
+def build_session(adapter=None, headers=None, proxies=None):
+    session = requests.Session()
+    adapter = adapter or build_adapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+    if proxies:
+        session.proxies.update(proxies)
+    session.verify = certifi.where()
+    return session
+
+
+def _pool_for(host):
+    pool = _pools.get(host)
+    if pool:
+        return pool
+    with _lock:
+        pool = _pools.get(host)
+        if not pool:
+            upstream = get_upstream(host)
+            proxies = {"http": PROXY_URL, "https": PROXY_URL} if upstream["use_proxy"] and PROXY_URL else None
+            adapter = build_adapter(upstream["pool_maxsize"], upstream["retries"])
+            session = build_session(adapter, upstream["headers"], proxies)
+            # The shared session serves every customer; never carry cookies from one lookup into the next
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            pool = (adapter, session)
+            _pools[host] = pool
+    return pool
+
+
+def get_session(url):
+    """Returns the shared keep-alive session for the url's host."""
+    return _pool_for(_host(url))[1]
+
+
+def new_session(url):
+    """A session with its own cookie jar that still shares the host's connection pool."""
+    adapter, shared = _pool_for(_host(url))
+    return build_session(adapter, shared.headers, shared.proxies)
+
+
+def request(method, url, **kwargs):
+    upstream = get_upstream(url)
+    policy = get_timeout_policy(url)
+    # An explicit timeout wins; otherwise use what this upstream's recent latency supports
+    kwargs.setdefault("timeout", policy.timeouts())
+    if upstream["bucket"] and not upstream["bucket"].acquire(upstream["rate_wait"]):
+        raise OutboundRateLimited(upstream["name"])
+    # Timed from here, so waiting on our own limiter doesn't count as upstream latency
+    start = time.monotonic()
+    with metrics.timed_upstream(upstream["name"]) as timer:
+        try:
+            timer.response = get_session(url).request(method, url, **kwargs)
+        except requests.exceptions.Timeout:
+            timeout = kwargs["timeout"]
+            policy.record_timeout(timeout[1] if isinstance(timeout, tuple) else timeout)
+            raise
+    policy.record(time.monotonic() - start)
+    return timer.response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+class UpstreamRequest:
+    """One outbound call yielded by a validator flow (see run_flow)."""
+
+    def __init__(self, method, url, **kwargs):
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+
+
+API_ERROR = {"status": "error", "message": "API Error"}
+# Our own outbound limiter shed the call; the upstream itself was never asked
+RATE_LIMITED = {"status": "error", "message": "Validator Busy"}
+
+
+def run_flow(flow, error_result=API_ERROR):
+    """
+    Drives a validator flow: a generator that yields UpstreamRequests, gets each response sent
+    back, and returns its result. Any network or parsing failure becomes error_result.
+    """
+    req = None
+    try:
+        req = next(flow)
+        while True:
+            response = request(req.method, req.url, **req.kwargs)
+            req = flow.send(response)
+    except StopIteration as stop:
+        return stop.value
+    except OutboundRateLimited as e:
+        logger.info(str(e))
+        return dict(RATE_LIMITED)
+    except Exception as e:
+        upstream = upstream_name(req.url) if req else "validator"
+        logger.warning(f"{upstream} check failed: {e}")
+        return dict(error_result)
+
+
+def close_all():
+    with _lock:
+        for _, session in _pools.values():
+            session.close()
+        _pools.clear()
@@ -0,0 +1,63 @@
+# id_rules.py
+#
+# Local sanity checks on (uid, server) before a validator is called. Rules are plain
+# dicts so they can come from app.HANDLER_ID_RULES or a games row's validation_rules JSON:
+#
+#   uid_pattern          regex the whole uid must match
+#   uid_length           [min, max] characters
+#   server_required      a server/zone must be given
+#   server_pattern       regex the whole server must match
+#   servers              allowed server values
+#   uid_prefix_servers   {uid_prefix: server}; a uid starting with a listed prefix must be
+#                        paired with that server (longest prefix wins)
+#
+# A games row's rules are merged over the handler defaults; setting a key to null there
+# switches that check off for the game.
+
+import re
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def _compiled(pattern):
+    return re.compile(pattern)
+
+
+def merge_rules(*rule_sets):
+    merged = {}
+    for rules in rule_sets:
+        if isinstance(rules, dict):
+            merged.update(rules)
+    return {key: value for key, value in merged.items() if value is not None}
+
+
+def check_id_format(rules, uid, server_id):
+    """Returns an error message if uid/server_id can't be valid under rules, else None."""
+    if not rules:
+        return None
+    uid = str(uid)
+
+    length = rules.get("uid_length")
+    if length and not (length[0] <= len(uid) <= length[1]):
+        return "Invalid ID"
+    pattern = rules.get("uid_pattern")
+    if pattern and not _compiled(pattern).fullmatch(uid):
+        return "Invalid ID"
+
+    if not server_id:
+        return "Invalid Server" if rules.get("server_required") else None
+    server_id = str(server_id)
+
+    pattern = rules.get("server_pattern")
+    if pattern and not _compiled(pattern).fullmatch(server_id):
+        return "Invalid Server"
+    servers = rules.get("servers")
+    if servers and server_id not in servers:
+        return "Invalid Server"
+
+    prefixes = rules.get("uid_prefix_servers")
+    if prefixes:
+        prefix = max((p for p in prefixes if uid.startswith(p)), key=len, default=None)
+        if prefix is not None and prefixes[prefix] != server_id:
+            return "ID does not match server"
+    return None
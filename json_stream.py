@@ -0,0 +1,73 @@
+# json_stream.py
+
+import os
+import zlib
+from flask import Response, current_app, request, stream_with_context
+
+# Items per yielded chunk; keeps per-chunk overhead low without holding much in memory
+BATCH_SIZE = 100
+GZIP_ENABLED = os.environ.get('STREAM_GZIP', 'true').lower() == 'true'
+GZIP_LEVEL = int(os.environ.get('STREAM_GZIP_LEVEL', 5))
+
+
+def iter_json_array(items, batch_size=BATCH_SIZE):
+    """Encodes an iterable as a JSON array a batch at a time, with the app's JSON settings."""
+    dumps = current_app.json.dumps
+    yield "["
+    batch, first = [], True
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= batch_size:
+            yield ("" if first else ",") + ",".join(batch)
+            batch, first = [], False
+    if batch:
+        yield ("" if first else ",") + ",".join(batch)
+    yield "]"
+
+
+def iter_json_envelope(items, fields, key="data", batch_size=BATCH_SIZE):
+    """{**fields, key: [items...]} with the list streamed, for the {"status", "data"} responses."""
+    dumps = current_app.json.dumps
+    head = dumps(fields)[:-1]
+    yield head + ("," if fields else "") + dumps(key) + ":"
+    yield from iter_json_array(items, batch_size)
+    yield "}"
+
+
+def gzip_chunks(chunks, level=GZIP_LEVEL):
+    """Gzips a stream of str/bytes chunks, flushing each one so the client gets bytes early."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+        data += compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def wants_gzip():
+    # Quality, not membership: 'gzip;q=0' is listed but refused
+    return GZIP_ENABLED and request.accept_encodings['gzip'] > 0
+
+
+def stream_response(chunks, mimetype, headers=None, status=200):
+    """
+    A streamed Response over chunks, gzipped on the fly when the client accepts it. The
+    generator runs inside the request context (stream_with_context), like the CSV export.
+    """
+    headers = dict(headers or {})
+    headers.setdefault("Cache-Control", "no-cache")
+    if wants_gzip():
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return Response(stream_with_context(chunks), status=status, mimetype=mimetype, headers=headers)
+
+
+def stream_json(items, headers=None, status=200, envelope=None, key="data"):
+    """
+    Streams items as a JSON array, or as {**envelope, key: [...]} when envelope is given,
+    instead of building the whole body with jsonify first.
+    """
+    body = iter_json_envelope(items, envelope, key) if envelope is not None else iter_json_array(items)
+    return stream_response(body, "application/json", headers, status)
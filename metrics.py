@@ -0,0 +1,98 @@
+# metrics.py
+#
+# Prometheus metrics for upstream calls, routes and timed operations.
+#
+# Under gunicorn every worker is its own process, so samples are written to
+# PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py sets and cleans it) and merged when /metrics
+# is scraped. Without that variable the default in-process registry is used.
+
+import os
+import time
+from flask import request, g
+from prometheus_client import CollectorRegistry, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 12, 20, 30)
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_seconds",
+    "Outbound call latency by upstream, HTTP status class and error class",
+    ["upstream", "status", "error"],
+    buckets=LATENCY_BUCKETS,
+)
+ROUTE_LATENCY = Histogram(
+    "http_request_seconds",
+    "Request duration by route and status",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+OPERATION_LATENCY = Histogram(
+    "operation_seconds",
+    "Duration of operations wrapped in log_execution_time",
+    ["operation", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def status_class(status_code):
+    return f"{int(status_code) // 100}xx" if status_code else "none"
+
+
+def observe_upstream(upstream, elapsed, status_code=None, error=None):
+    """Records one outbound call. error is the exception raised, if any."""
+    UPSTREAM_LATENCY.labels(
+        upstream=upstream,
+        status=status_class(status_code),
+        error=type(error).__name__ if error else "",
+    ).observe(elapsed)
+
+
+class timed_upstream:
+    """Context manager around an outbound call; set .response (or let it raise) inside."""
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.response = None
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        status_code = getattr(self.response, "status_code", None)
+        observe_upstream(self.upstream, time.monotonic() - self.start, status_code, exc)
+        return False
+
+
+def observe_route(method, route, status_code, elapsed):
+    ROUTE_LATENCY.labels(method=method, route=route, status=str(status_code)).observe(elapsed)
+
+
+def init_app(app):
+    """Times every Flask request, labelled by URL rule rather than raw path."""
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.monotonic()
+
+    @app.after_request
+    def record_request_duration(response):
+        started = getattr(g, "request_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            observe_route(request.method, route, response.status_code, time.monotonic() - started)
+        return response
+
+
+def render():
+    """Returns (body, content_type) in Prometheus text format."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,54 @@
+# pizzoshop_parser.py
+#
+# Pulls the nickname and region out of a pizzoshop.com ID-check page without building a
+# DOM. The page is ~50 KB of storefront markup around a small result block, so instead of a
+# full BeautifulSoup parse we find the success heading and read the <th>/<td> rows after it.
+# Text is normalised the way BeautifulSoup's get_text(strip=True) does it, so results match
+# the old parser (see test_pizzoshop_parser.py, benchmarks/bench_pizzoshop_parser.py).
+
+import re
+from html import unescape
+
+_H4_OPEN = re.compile(r"<h4\b([^>]*)>", re.I)
+_CLASS_ATTR = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+_ROW = re.compile(r"<tr\b[^>]*>(.*?)</tr\s*>", re.I | re.S)
+_TH = re.compile(r"<th\b[^>]*>(.*?)</th\s*>", re.I | re.S)
+_TD = re.compile(r"<td\b[^>]*>(.*?)</td\s*>", re.I | re.S)
+# Comments first, so a '>' inside one doesn't end the match early
+_MARKUP = re.compile(r"<!--.*?-->|<[^>]*>", re.S)
+
+
+def _text(fragment):
+    """get_text(strip=True): every text node stripped, empties dropped, joined without spaces."""
+    pieces = (unescape(piece).strip() for piece in _MARKUP.split(fragment))
+    return "".join(piece for piece in pieces if piece)
+
+
+def _success_heading_end(html):
+    for match in _H4_OPEN.finditer(html):
+        class_attr = _CLASS_ATTR.search(match.group(1))
+        if class_attr and "text-success" in next(v for v in class_attr.groups() if v is not None).split():
+            return match.end()
+    return None
+
+
+def parse_check_result(html):
+    """
+    Returns {"nickname": ..., "region": ...} when the page reports a found account, else None.
+    Missing rows fall back to "Unknown" / "Global", as before.
+    """
+    start = _success_heading_end(html)
+    if start is None:
+        return None
+
+    nickname, region = "Unknown", "Global"
+    for row in _ROW.finditer(html, start):
+        th, td = _TH.search(row.group(1)), _TD.search(row.group(1))
+        if not (th and td):
+            continue
+        header_text = _text(th.group(1))
+        if "Nickname" in header_text:
+            nickname = _text(td.group(1))
+        elif "Region ID" in header_text:
+            region = _text(td.group(1))
+    return {"nickname": nickname, "region": region}
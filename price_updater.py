@@ -3,9 +3,9 @@
 import os
 import logging
 from supabase import create_client, Client
-from gamepoint_service import GamePointService
-from redis_cache import cache
-import concurrent.futures
+import gamepoint_service
+from gamepoint_service import get_gamepoint_service
+from catalog_sync import CatalogSync, sold_product_ids
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -19,42 +19,23 @@ if not all([SUPABASE_URL, SUPABASE_SERVICE_KEY]):
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
 def fetch_and_cache_prices():
-    """Fetches the full GamePoint catalog and caches each package price in Redis."""
+    """
+    The catalog job: syncs the shared GamePoint catalog snapshot (see catalog_sync.py), then
+    caches each package price in Redis from it. The admin catalog and CSV read that snapshot.
+    """
     logging.info("Starting GamePoint price update job...")
     
     try:
-        gp = GamePointService(supabase_client=supabase)
+        gp = get_gamepoint_service(supabase)
         
-        # This function needs to fetch the full catalog with packages
-        # We can reuse the logic from your admin endpoint, but simplified.
-        token = gp.get_token()
-        list_resp = gp._request("product/list", {"token": token})
-        products = list_resp.get('detail', [])
-
-        if not products:
-            logging.warning("No products found in GamePoint catalog.")
+        sync = CatalogSync(gp)
+        diff = sync.sync(hot_ids=sold_product_ids(supabase), progress=gamepoint_service.log_progress("Price update"))
+        if diff is None:
             return
+        for pkg in diff['repriced']:
+            logging.info(f"Repriced GamePoint package {pkg['package_id']} ({pkg['name']}): {pkg['old_price']} -> {pkg['price']}")
 
-        total_packages = 0
-
-        def process_product(product):
-            try:
-                detail_resp = gp._request("product/detail", {"token": token, "productid": product['id']})
-                if detail_resp.get('code') == 200:
-                    packages = detail_resp.get('package', [])
-                    for pkg in packages:
-                        # Key: "gp_price:12345", Value: "10.50"
-                        cache.set(f"gp_price:{pkg['id']}", str(pkg['price']), expire_seconds=7200) # Cache for 2 hours
-                    return len(packages)
-            except Exception as e:
-                logging.error(f"Failed to process product {product.get('id')}: {e}")
-            return 0
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            package_counts = executor.map(process_product, products)
-            total_packages = sum(package_counts)
-
-        logging.info(f"Price update job complete. Cached prices for {total_packages} packages.")
+        logging.info(f"Price update job complete. Cached prices for {diff['prices_published']} packages.")
 
     except Exception as e:
         logging.error(f"Critical error in price update job: {e}")
@@ -0,0 +1,91 @@
+# rate_limiter.py
+
+import time
+import asyncio
+import logging
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Refill and take in one step so every worker draws from the same bucket.
+# ARGV: rate (tokens/s), burst, now (s), tokens wanted. Returns {taken, seconds to wait}.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local wanted = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local taken = 0
+local wait = 0
+if tokens >= wanted then
+    tokens = tokens - wanted
+    taken = 1
+else
+    wait = (wanted - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {taken, tostring(wait)}
+"""
+
+
+class OutboundRateLimited(Exception):
+    """Raised when an upstream's bucket is empty and waiting longer isn't allowed."""
+
+    def __init__(self, upstream):
+        super().__init__(f"Outbound rate limit reached for {upstream}")
+        self.upstream = upstream
+
+
+class TokenBucket:
+    """
+    Redis token bucket shared by every worker: `rate` calls per second sustained, bursts
+    of up to `burst`. acquire() waits up to max_wait for a token (0 sheds immediately).
+    If Redis is unreachable calls are let through rather than blocked.
+    """
+
+    def __init__(self, name, rate, burst=None, redis_client=None):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self._redis = redis_client
+        self._script = None
+        self.key = f"rl:{name}"
+
+    @property
+    def redis(self):
+        return self._redis or cache.redis_client
+
+    def try_acquire(self):
+        """Returns (taken, seconds until a token is available)."""
+        try:
+            if self._script is None:
+                self._script = self.redis.register_script(TOKEN_BUCKET_LUA)
+            taken, wait = self._script(keys=[self.key], args=[self.rate, self.burst, time.time(), 1])
+            return bool(int(taken)), float(wait)
+        except Exception as e:
+            logger.debug(f"Rate limiter {self.name} unavailable, allowing call: {e}")
+            return True, 0.0
+
+    def acquire(self, max_wait=0):
+        deadline = time.monotonic() + max_wait
+        while True:
+            taken, wait = self.try_acquire()
+            if taken:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait=0):
+        deadline = time.monotonic() + max_wait
+        while True:
+            taken, wait = await asyncio.to_thread(self.try_acquire)
+            if taken:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
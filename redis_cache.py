@@ -1,10 +1,66 @@
 import redis
 import pickle
+import json
+import zlib
 import hashlib
+import uuid
 from functools import wraps
 import os
 from urllib.parse import urlparse
 
+# Values are stored as <marker><payload>. Pickles carry no extra marker: their own header
+# byte (0x80) is the marker, so plain-pickle values stay byte-for-byte what they always were
+# and older entries still read back.
+PICKLE_MARKER = b'\x80'
+COMPRESSED_MARKER = b'Z'
+# Encoded values larger than this are zlib-compressed before they're stored
+COMPRESS_THRESHOLD = int(os.environ.get('REDIS_COMPRESS_THRESHOLD', 4096))
+COMPRESS_LEVEL = int(os.environ.get('REDIS_COMPRESS_LEVEL', 1))
+DEFAULT_CODEC = os.environ.get('REDIS_DEFAULT_CODEC', 'pickle')
+# Keys per pipeline / MGET in set_many and get_many
+BULK_BATCH_SIZE = 500
+
+# Deletes a lock only while it still holds the caller's token. KEYS[1]: lock, ARGV[1]: token
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+CODECS = {}
+_CODECS_BY_MARKER = {}
+
+
+def register_codec(name, marker, dumps, loads):
+    """Adds a codec: dumps(value) -> bytes, loads(bytes) -> value, stored behind a one-byte marker."""
+    if marker in (PICKLE_MARKER, COMPRESSED_MARKER) and name != 'pickle':
+        raise ValueError(f"Marker {marker!r} is reserved")
+    CODECS[name] = (marker, dumps, loads)
+    _CODECS_BY_MARKER[marker] = (name, dumps, loads)
+
+
+register_codec('pickle', PICKLE_MARKER, lambda value: pickle.dumps(value)[1:], lambda data: pickle.loads(PICKLE_MARKER + data))
+# Compact JSON for plain dict/list data; smaller than pickle for catalog-shaped values and readable from other tools
+register_codec('json', b'J', lambda value: json.dumps(value, separators=(',', ':'), default=str).encode(), json.loads)
+
+
+def encode(value, codec=None, compress_threshold=COMPRESS_THRESHOLD):
+    marker, dumps, _ = CODECS[codec or DEFAULT_CODEC]
+    data = marker + dumps(value)
+    if compress_threshold is not None and len(data) > compress_threshold:
+        data = COMPRESSED_MARKER + zlib.compress(data, COMPRESS_LEVEL)
+    return data
+
+
+def decode(data):
+    if data[:1] == COMPRESSED_MARKER:
+        data = zlib.decompress(data[1:])
+    codec = _CODECS_BY_MARKER.get(data[:1])
+    if codec is None:
+        raise ValueError(f"Unknown cache codec marker {data[:1]!r}")
+    return codec[2](data[1:])
+
 class RedisCache:
     def __init__(self):
         redis_url = os.environ.get('REDIS_URL')
@@ -34,19 +90,86 @@ class RedisCache:
     def get(self, key):
         try:
             cached = self.redis_client.get(key)
-            return pickle.loads(cached) if cached else None
+            return decode(cached) if cached else None
         except Exception as e:
             print(f"Redis get error: {e}")
             return None
     
-    def set(self, key, value, expire_seconds=3600):
+    def set(self, key, value, expire_seconds=3600, codec=None):
         try:
-            serialized = pickle.dumps(value)
+            serialized = encode(value, codec)
             self.redis_client.setex(key, expire_seconds, serialized)
             return True
         except Exception as e:
             print(f"Redis set error: {e}")
             return False
+
+    def set_many(self, mapping, expire_seconds=3600, codec=None, batch_size=BULK_BATCH_SIZE):
+        """
+        Sets every {key: value} with its own TTL, batch_size SETs per pipelined round trip
+        (MSET can't carry a TTL). Returns the number of keys written.
+        """
+        written = 0
+        try:
+            items = list(mapping.items())
+            for start in range(0, len(items), batch_size):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in items[start:start + batch_size]:
+                    pipe.set(key, encode(value, codec), ex=expire_seconds)
+                pipe.execute()
+                written += len(items[start:start + batch_size])
+            return written
+        except Exception as e:
+            print(f"Redis set_many error: {e}")
+            return written
+
+    def get_many(self, keys, batch_size=BULK_BATCH_SIZE):
+        """{key: value} for the keys that exist, one MGET per batch_size keys."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        try:
+            for start in range(0, len(keys), batch_size):
+                batch = keys[start:start + batch_size]
+                for key, raw in zip(batch, self.redis_client.mget(batch)):
+                    if raw is not None:
+                        found[key] = decode(raw)
+            return found
+        except Exception as e:
+            print(f"Redis get_many error: {e}")
+            return found
+
+    def set_hash(self, key, mapping, expire_seconds=3600, codec=None):
+        """
+        Stores a {field: value} collection as one Redis hash with each value encoded on its
+        own, so get_hash() can read a few fields without decoding the rest. Replaces the
+        whole hash atomically.
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.delete(key)
+            if mapping:
+                pipe.hset(key, mapping={str(field): encode(value, codec) for field, value in mapping.items()})
+                pipe.expire(key, expire_seconds)
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Redis set_hash error: {e}")
+            return False
+
+    def get_hash(self, key, fields=None):
+        """{field: value} for the given fields that exist (all fields when fields is None)."""
+        try:
+            if fields is None:
+                raw = self.redis_client.hgetall(key)
+                return {field.decode(): decode(value) for field, value in raw.items()}
+            fields = [str(field) for field in fields]
+            if not fields:
+                return {}
+            values = self.redis_client.hmget(key, fields)
+            return {field: decode(value) for field, value in zip(fields, values) if value is not None}
+        except Exception as e:
+            print(f"Redis get_hash error: {e}")
+            return {}
     
     def delete(self, key):
         try:
@@ -56,6 +179,22 @@ class RedisCache:
             print(f"Redis delete error: {e}")
             return False
     
+    def acquire_lock(self, key, expire_seconds):
+        """
+        Takes key as a lock with a fresh token (SET NX EX). Returns the token, or None if
+        another process holds it. Redis errors propagate, so callers decide whether to go ahead.
+        """
+        token = uuid.uuid4().hex
+        return token if self.redis_client.set(key, token, nx=True, ex=expire_seconds) else None
+
+    def release_lock(self, key, token):
+        """Releases a lock taken with acquire_lock, unless it expired and another process took it since."""
+        try:
+            return bool(self.redis_client.eval(RELEASE_LOCK_LUA, 1, key, token))
+        except Exception as e:
+            print(f"Redis release lock error: {e}")
+            return False
+
     def clear_pattern(self, pattern):
         try:
             # Note: decode_responses is False, so keys are bytes.
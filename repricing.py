@@ -0,0 +1,203 @@
+# repricing.py
+#
+# Repricing pass over every GamePoint-backed product. Supplier costs come from the gp_price:*
+# keys the catalog job publishes (MYR), our prices from the products table. Cost in SGD,
+# margin and a suggested sell price are computed for all products at once in pandas.
+#
+#   python repricing.py                        # dry run: summary + below-cost report
+#   python repricing.py --apply                # write changed costs (original_price)
+#   python repricing.py --apply --apply-sell-prices
+#                                              # also raise sell prices that are under MIN_MARGIN
+#   python repricing.py --report below_cost.csv
+#
+# Margins, the below-cost report and sell price raises need REPRICE_SELL_COLUMN, the
+# products column holding our sell price; without it only costs are priced and written.
+
+import os
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MYR_SGD_RATE = 0.31
+# Suggested prices aim for this margin on the sell price...
+TARGET_MARGIN = float(os.environ.get('REPRICE_TARGET_MARGIN', 0.10))
+# ...and with --apply-sell-prices anything under this margin is raised to its suggestion
+MIN_MARGIN = float(os.environ.get('REPRICE_MIN_MARGIN', 0.03))
+# Suggested prices are rounded up to a multiple of this (SGD)
+PRICE_STEP = float(os.environ.get('REPRICE_PRICE_STEP', 0.05))
+# Cost moves smaller than this (SGD) aren't written back
+COST_TOLERANCE = 0.005
+COST_COLUMN = 'original_price'
+SELL_COLUMN = os.environ.get('REPRICE_SELL_COLUMN') or None
+PAGE_SIZE = 1000
+# Product ids per update request; updates with the same values share requests
+UPDATE_BATCH = 500
+
+
+def load_columns():
+    """Only what pricing reads, so a run never holds (or writes back) anything else."""
+    return ','.join(dict.fromkeys(c for c in ['id', 'name', SELL_COLUMN, COST_COLUMN, 'supplier_config', 'gamepoint_package_id'] if c))
+
+
+def check_sell_column(supabase_client):
+    """Fails up front, with the setting to fix, if REPRICE_SELL_COLUMN isn't a products column."""
+    if not SELL_COLUMN:
+        return
+    try:
+        supabase_client.table('products').select(SELL_COLUMN).limit(1).execute()
+    except Exception as e:
+        raise RuntimeError(f"REPRICE_SELL_COLUMN={SELL_COLUMN!r} can't be read from products: {e}")
+
+
+def myr_to_sgd_rate(supabase_client):
+    try:
+        rate_setting = supabase_client.table('settings').select('value').eq('key', 'myr_sgd_rate').single().execute()
+        if rate_setting.data and rate_setting.data.get('value'):
+            return float(rate_setting.data['value'])
+    except Exception:
+        pass
+    logger.warning(f"MYR_SGD_RATE not found in settings. Using default {DEFAULT_MYR_SGD_RATE} for price check.")
+    return DEFAULT_MYR_SGD_RATE
+
+
+def supplier_packages(product):
+    """GamePoint package ids a product is fulfilled with: its supplier_config bundle, else its single package."""
+    if product.get('supplier_config'):
+        return [str(item['packageId']) for item in product['supplier_config'] if item.get('packageId')]
+    if product.get('gamepoint_package_id'):
+        return [str(product['gamepoint_package_id'])]
+    return []
+
+
+def load_products(supabase_client):
+    products, start = [], 0
+    while True:
+        page = supabase_client.table('products').select(load_columns()).range(start, start + PAGE_SIZE - 1).execute().data or []
+        products.extend(page)
+        if len(page) < PAGE_SIZE:
+            return [p for p in products if supplier_packages(p)]
+        start += PAGE_SIZE
+
+
+def load_costs(package_ids):
+    """{package id: MYR cost} from the gp_price:* keys; packages without a price are left out."""
+    found = cache.get_many(f"gp_price:{pid}" for pid in package_ids)
+    return {key.split(':', 1)[1]: value for key, value in found.items()}
+
+
+def price_products(products, costs, rate, target_margin=TARGET_MARGIN, step=PRICE_STEP):
+    """
+    One vectorised pass over every product. Adds cost_myr (sum of its packages; NaN if any
+    package has no price), cost_sgd, margin, suggested_price and below_cost columns.
+    """
+    frame = pd.DataFrame(products)
+    if frame.empty:
+        return frame
+    packages = pd.DataFrame({'id': frame['id'], 'package_id': [supplier_packages(p) for p in products]}).explode('package_id')
+    packages['cost_myr'] = pd.to_numeric(packages['package_id'].map(costs), errors='coerce')
+    by_product = packages.groupby('id', sort=False)['cost_myr']
+    cost_myr = by_product.sum(min_count=1).where(by_product.count() == by_product.size())
+
+    frame['cost_myr'] = frame['id'].map(cost_myr)
+    frame['cost_sgd'] = (frame['cost_myr'] * rate).round(4)
+    sell = pd.to_numeric(frame[SELL_COLUMN], errors='coerce') if SELL_COLUMN and SELL_COLUMN in frame else pd.Series(np.nan, index=frame.index)
+    frame['margin'] = ((sell - frame['cost_sgd']) / sell.where(sell > 0)).round(4)
+    # Tiny epsilon so exact multiples of step don't round up a whole step
+    frame['suggested_price'] = (np.ceil(frame['cost_sgd'] / (1 - target_margin) / step - 1e-9) * step).round(2)
+    frame['below_cost'] = sell < frame['cost_sgd']
+    return frame
+
+
+def plan_updates(frame, apply_sell_prices=False, min_margin=MIN_MARGIN):
+    """
+    {id, original_price[, sell price]} per product whose cost moved or, optionally, whose
+    sell price is raised. Just the changed columns, so edits made during the run survive.
+    """
+    current_cost = pd.to_numeric(frame[COST_COLUMN], errors='coerce') if COST_COLUMN in frame else pd.Series(np.nan, index=frame.index)
+    priced = frame['cost_sgd'].notna()
+    cost_changed = priced & (current_cost.isna() | ((current_cost - frame['cost_sgd']).abs() > COST_TOLERANCE))
+    raise_sell = priced & (frame['margin'] < min_margin) if apply_sell_prices else pd.Series(False, index=frame.index)
+
+    updates = []
+    for row in frame.loc[cost_changed | raise_sell, ['id', 'cost_sgd']].itertuples(index=False):
+        updates.append({'id': row.id, COST_COLUMN: round(float(row.cost_sgd), 2)})
+    if apply_sell_prices:
+        suggested = frame.loc[raise_sell].set_index('id')['suggested_price']
+        for product in updates:
+            if product['id'] in suggested.index:
+                product[SELL_COLUMN] = float(suggested[product['id']])
+    return updates
+
+
+def update_products(supabase_client, updates, batch_size=UPDATE_BATCH):
+    """
+    Writes the updates' columns to their existing rows (never inserts). Updates setting the
+    same values go out together, one request per batch_size ids.
+    """
+    groups = {}
+    for update in updates:
+        values = tuple(sorted((key, value) for key, value in update.items() if key != 'id'))
+        groups.setdefault(values, []).append(update['id'])
+    for values, ids in groups.items():
+        for start in range(0, len(ids), batch_size):
+            supabase_client.table('products').update(dict(values)).in_('id', ids[start:start + batch_size]).execute()
+    return len(updates)
+
+
+def below_cost_report(frame):
+    if frame.empty:
+        return frame
+    columns = [c for c in ['id', 'name', SELL_COLUMN, 'cost_sgd', 'margin', 'suggested_price'] if c and c in frame]
+    return frame.loc[frame['below_cost'], columns].sort_values('margin')
+
+
+def run(supabase_client, apply=False, apply_sell_prices=False, report_path=None):
+    if not SELL_COLUMN:
+        logger.warning("REPRICE_SELL_COLUMN not set: pricing costs only, no margins or below-cost report")
+    check_sell_column(supabase_client)
+    products = load_products(supabase_client)
+    package_ids = {pid for p in products for pid in supplier_packages(p)}
+    costs = load_costs(package_ids)
+    rate = myr_to_sgd_rate(supabase_client)
+
+    frame = price_products(products, costs, rate)
+    updates = plan_updates(frame, apply_sell_prices) if not frame.empty else []
+    report = below_cost_report(frame)
+    if report_path:
+        report.to_csv(report_path, index=False)
+    for row in report.itertuples(index=False):
+        logger.warning(f"Below cost: product {row.id} ({row.name}) sells at {getattr(row, SELL_COLUMN)} for cost {row.cost_sgd:.2f} SGD")
+
+    written = update_products(supabase_client, updates) if apply else 0
+    summary = {
+        "products": len(products),
+        "unpriced": int(frame['cost_sgd'].isna().sum()) if not frame.empty else 0,
+        "below_cost": len(report),
+        "changes": len(updates),
+        "written": written,
+        "rate": rate,
+    }
+    logger.info(f"Repricing {'applied' if apply else 'dry run'}: {summary}")
+    return summary
+
+
+def main():
+    from supabase import create_client
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apply", action="store_true", help="write the changes (default is a dry run)")
+    parser.add_argument("--apply-sell-prices", action="store_true", help=f"raise sell prices under {MIN_MARGIN:.0%} margin")
+    parser.add_argument("--report", help="write the below-cost report to this CSV")
+    args = parser.parse_args()
+    if args.apply_sell_prices and not SELL_COLUMN:
+        parser.error("--apply-sell-prices needs REPRICE_SELL_COLUMN")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    supabase = create_client(os.environ.get('SUPABASE_URL'), os.environ.get('SUPABASE_SERVICE_KEY'))
+    run(supabase, apply=args.apply, apply_sell_prices=args.apply_sell_prices, report_path=args.report)
+
+
+if __name__ == "__main__":
+    main()
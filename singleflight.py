@@ -0,0 +1,179 @@
+# singleflight.py
+
+import os
+import time
+import pickle
+import asyncio
+import logging
+import threading
+from redis_cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker coalescing through a Redis lock is opt-in; in-process sharing is always on
+DISTRIBUTED = os.environ.get('SINGLEFLIGHT_REDIS', 'false').lower() in ('1', 'true', 'yes')
+LOCK_SECONDS = int(os.environ.get('SINGLEFLIGHT_LOCK_SECONDS', 30))
+RESULT_SECONDS = int(os.environ.get('SINGLEFLIGHT_RESULT_SECONDS', 5))
+POLL_SECONDS = 0.05
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Makes concurrent calls with the same key share one execution and its result.
+
+    Within a process the first caller runs func() and the rest wait for it. With
+    distributed=True the leader also takes a Redis lock and publishes its result for a
+    few seconds, so identical calls in other workers wait for it instead of going upstream.
+    Nothing is cached beyond that: once a call finishes, the next one runs again.
+    """
+
+    def __init__(self, name, redis_cache=None, distributed=DISTRIBUTED, lock_seconds=LOCK_SECONDS,
+                 result_seconds=RESULT_SECONDS):
+        self.name = name
+        self.cache = redis_cache or cache
+        self.distributed = distributed
+        self.lock_seconds = lock_seconds
+        self.result_seconds = result_seconds
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def _lock_key(self, key):
+        return f"sf:{self.name}:{key}:lock"
+
+    def _result_key(self, key):
+        return f"sf:{self.name}:{key}:result"
+
+    def do(self, key, func):
+        """Returns func() for this key, sharing the call with any identical one in flight."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_distributed(key, func) if self.distributed else func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    # --- Cross-worker ---
+
+    def _acquire(self, key):
+        """Returns our lock token if we lead, None if another worker does, False if Redis is unusable."""
+        try:
+            return self.cache.acquire_lock(self._lock_key(key), self.lock_seconds)
+        except Exception as e:
+            logger.debug(f"Single-flight {self.name} lock unavailable: {e}")
+            return False
+
+    def _publish(self, key, result, token):
+        """Publishes the result, then releases the lock unless it expired and another leader took it."""
+        try:
+            if result is not None:
+                self.cache.redis_client.set(self._result_key(key), pickle.dumps(result), ex=self.result_seconds)
+        except Exception as e:
+            logger.debug(f"Single-flight {self.name} publish error: {e}")
+        self.cache.release_lock(self._lock_key(key), token)
+
+    def _poll(self, key):
+        """Returns (finished, result) for a call another worker is leading."""
+        try:
+            pipe = self.cache.redis_client.pipeline()
+            pipe.get(self._result_key(key))
+            pipe.exists(self._lock_key(key))
+            raw, locked = pipe.execute()
+        except Exception as e:
+            logger.debug(f"Single-flight {self.name} poll error: {e}")
+            return True, None
+        if raw is not None:
+            return True, pickle.loads(raw)
+        # No result and no lock: the leader failed or its result expired
+        return not locked, None
+
+    def _run_distributed(self, key, func):
+        deadline = time.monotonic() + self.lock_seconds
+        while True:
+            token = self._acquire(key)
+            if token is False:
+                return func()
+            if token:
+                result = None
+                try:
+                    result = func()
+                    return result
+                finally:
+                    self._publish(key, result, token)
+            while time.monotonic() < deadline:
+                time.sleep(POLL_SECONDS)
+                finished, result = self._poll(key)
+                if result is not None:
+                    return result
+                if finished:
+                    break
+            else:
+                return func()
+
+    # --- asyncio ---
+
+    async def do_async(self, key, coro_func):
+        """
+        do() for coroutines, coalescing within the event loop. A caller that is cancelled
+        (e.g. a hedged request that lost) leaves the shared call running for the others, and
+        the call is cancelled once nobody is waiting on it.
+        """
+        entry = self._async_calls.get(key)
+        if entry is None:
+            entry = self._async_calls[key] = {"task": asyncio.ensure_future(self._run_async(key, coro_func)), "waiters": 0}
+            entry["task"].add_done_callback(lambda _task: self._async_calls.pop(key, None))
+        entry["waiters"] += 1
+        try:
+            return await asyncio.shield(entry["task"])
+        finally:
+            entry["waiters"] -= 1
+            if entry["waiters"] == 0 and not entry["task"].done():
+                entry["task"].cancel()
+
+    async def _run_async(self, key, coro_func):
+        if not self.distributed:
+            return await coro_func()
+        deadline = time.monotonic() + self.lock_seconds
+        while True:
+            token = await asyncio.to_thread(self._acquire, key)
+            if token is False:
+                return await coro_func()
+            if token:
+                result = None
+                try:
+                    result = await coro_func()
+                    return result
+                finally:
+                    await asyncio.to_thread(self._publish, key, result, token)
+            while time.monotonic() < deadline:
+                await asyncio.sleep(POLL_SECONDS)
+                finished, result = await asyncio.to_thread(self._poll, key)
+                if result is not None:
+                    return result
+                if finished:
+                    break
+            else:
+                return await coro_func()
@@ -0,0 +1,49 @@
+# test_async_validation.py
+
+import asyncio
+import httpx
+from unittest.mock import patch
+import app as core
+import async_validation
+from asgi import match_check_id
+
+def fake_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+def test_match_check_id_routes():
+    """Only GET /check-id/<game>/<uid>[/<server>] is taken off the Flask app."""
+    assert match_check_id({"method": "GET", "path": "/check-id/mlbb/123/"}) == ("mlbb", "123", None)
+    assert match_check_id({"method": "GET", "path": "/check-id/mlbb/123/4001"}) == ("mlbb", "123", "4001")
+    assert match_check_id({"method": "POST", "path": "/check-id/batch"}) is None
+    assert match_check_id({"method": "GET", "path": "/check-id/mlbb//4001"}) is None
+    assert match_check_id({"method": "GET", "path": "/api/admin/config/handlers"}) is None
+
+def test_async_flow_matches_sync_parsing():
+    """The async driver runs the same flow as the sync handler and parses it the same way."""
+    client = fake_client(lambda request: httpx.Response(200, json={"result": 0, "data": {"nick_name": "Bigo"}}))
+    with patch.object(async_validation, "get_client", lambda url: client):
+        result = asyncio.run(async_validation.run_flow_async(core.bigo_native_flow("123")))
+    assert result == {"status": "success", "username": "Bigo"}
+
+def test_async_flow_network_error_is_api_error():
+    """Transport failures surface as the usual 'API Error' result."""
+    def boom(request):
+        raise httpx.ConnectError("down")
+    client = fake_client(boom)
+    with patch.object(async_validation, "get_client", lambda url: client):
+        result = asyncio.run(async_validation.run_flow_async(core.razer_flow("x/y", "1", "2")))
+    assert result == {"status": "error", "message": "API Error"}
+
+def test_garena_flow_sends_login_cookie():
+    """The roles call carries the cookie set by the login step."""
+    seen = []
+    def handler(request):
+        seen.append(request)
+        if request.url.path.endswith("player_id_login"):
+            return httpx.Response(200, json={}, headers={"set-cookie": "session_key=abc; Path=/"})
+        return httpx.Response(200, json={"100151": [{"role": "Operator"}]})
+    client = fake_client(handler)
+    with patch.object(async_validation, "get_client", lambda url: client):
+        result = asyncio.run(async_validation.run_flow_async(core.garena_flow("100151", "42")))
+    assert result == {"status": "success", "username": "Operator"}
+    assert seen[1].headers["cookie"] == "session_key=abc"
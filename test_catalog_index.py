@@ -0,0 +1,76 @@
+# test_catalog_index.py
+
+import pytest
+from catalog_index import CatalogIndex
+
+def product(pid, name, *packages):
+    return {"id": pid, "name": name, "packages": [{"id": pkg_id, "name": n, "price": price} for pkg_id, n, price in packages]}
+
+class FakeSync:
+    snapshot_key = "gp_catalog:sandbox:snapshot"
+
+    def __init__(self, products):
+        self.fetched = []
+        self.publish(products, 1.0)
+
+    def publish(self, products, synced_at, hashes=None):
+        self.products = {p["id"]: p for p in products}
+        self.hashes = hashes or {p["id"]: repr(p) for p in products}
+        self.synced_at = synced_at
+
+    def meta(self):
+        return {"order": list(self.products), "hashes": self.hashes, "synced_at": self.synced_at}
+
+    def get_products(self, ids):
+        self.fetched.extend(ids)
+        return [self.products[pid] for pid in ids]
+
+CATALOG = [
+    product(1, "Mobile Legends", (11, "86 Diamonds", "1.50"), (12, "172 Diamonds", "3.00"), (13, "Weekly Pass", "1.80")),
+    product(2, "Free Fire", (21, "100 Diamonds", "0.90"), (22, "Membership", "9.00")),
+    product(10, "Genshin Impact", (101, "Blessing", "4.50")),
+]
+
+@pytest.fixture
+def sync():
+    return FakeSync(CATALOG)
+
+@pytest.fixture
+def index(sync):
+    return CatalogIndex(lambda: sync, check_seconds=0)
+
+def test_prefix_tokens_must_all_match(index):
+    result = index.search("mob diam")
+    assert [item["package_id"] for item in result["items"]] == [11, 12]
+    assert index.search("dia")["total"] == 3
+    assert index.search("nothing")["items"] == []
+
+def test_filters(index):
+    assert [i["package_id"] for i in index.search(min_price=1.5, max_price=4.5)["items"]] == [11, 12, 13, 101]
+    assert [i["package_id"] for i in index.search(product_id="2")["items"]] == [21, 22]
+
+def test_cursor_pagination_covers_everything_once(index):
+    seen, cursor = [], None
+    while True:
+        page = index.search(limit=2, cursor=cursor)
+        seen += [i["package_id"] for i in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [11, 12, 13, 21, 22, 101]
+    # Ids sort numerically, so product 10 comes after product 2
+    with pytest.raises(ValueError):
+        index.search(cursor="garbage")
+
+def test_only_changed_products_reindexed(index, sync):
+    index.search()
+    sync.fetched.clear()
+    repriced = product(2, "Free Fire", (21, "110 Diamonds", "0.95"))
+    hashes = {1: sync.hashes[1], 2: "changed"}
+    sync.publish([CATALOG[0], repriced], 2.0, hashes=hashes)
+
+    result = index.search("free")
+    assert sync.fetched == [2]
+    assert [(i["package_id"], i["price"]) for i in result["items"]] == [(21, "0.95")]
+    assert index.search("genshin")["total"] == 0 and index.search("membership")["total"] == 0
+    assert index.status()["packages"] == 4
@@ -0,0 +1,113 @@
+# test_catalog_sync.py
+
+from unittest.mock import MagicMock
+import pytest
+from catalog_sync import CatalogSync, content_hash, iter_csv
+
+fakeredis = pytest.importorskip("fakeredis")
+
+def product(pid, *prices):
+    return {"id": pid, "name": f"Game {pid}", "fields": ["uid"],
+            "packages": [{"id": pid * 10 + i, "name": f"P{i}", "price": price} for i, price in enumerate(prices)]}
+
+class FakeGamePoint:
+    def __init__(self, catalog):
+        self.config = {"mode": "sandbox"}
+        self.catalog = catalog
+        self.detail_calls = []
+
+    def list_products(self):
+        return [{"id": p["id"], "name": p["name"]} for p in self.catalog]
+
+    def iter_full_catalog(self, products, progress=None):
+        by_id = {p["id"]: p for p in self.catalog}
+        for p in products:
+            self.detail_calls.append(p["id"])
+            yield dict(by_id[p["id"]])
+
+@pytest.fixture
+def redis_cache():
+    from redis_cache import RedisCache
+    store = RedisCache.__new__(RedisCache)
+    store.redis_client = fakeredis.FakeRedis()
+    return store
+
+def test_only_due_products_are_refetched(redis_cache):
+    """After the first full run, cold unchanged products are not fetched again; hot ones are."""
+    gp = FakeGamePoint([product(1, "1.00"), product(2, "2.00"), product(3, "3.00")])
+    sync = CatalogSync(gp, redis_cache, hot_seconds=0, cold_seconds=3600, recent_change_seconds=0)
+    first = sync.run()
+    assert len(first["new"]) == 3 and gp.detail_calls == [1, 2, 3]
+
+    gp.detail_calls.clear()
+    diff = sync.run(hot_ids={"2"})
+    assert gp.detail_calls == [2]
+    assert diff["new"] == diff["removed"] == diff["repriced"] == []
+    assert [p["id"] for p in sync.products()] == [1, 2, 3]
+
+def test_diff_reports_new_removed_and_repriced(redis_cache):
+    gp = FakeGamePoint([product(1, "1.00", "5.00"), product(2, "2.00")])
+    sync = CatalogSync(gp, redis_cache)
+    sync.run()
+    before = sync.load()["entries"][1]
+
+    gp.catalog = [product(1, "1.50", "5.00"), product(3, "3.00")]
+    diff = sync.run(full=True)
+
+    assert diff["repriced"] == [{"product_id": 1, "package_id": 10, "name": "P0", "price": "1.50", "old_price": "1.00"}]
+    assert [p["package_id"] for p in diff["new"]] == [30]
+    assert [p["package_id"] for p in diff["removed"]] == [20]
+    after = sync.load()["entries"][1]
+    assert after["hash"] == content_hash(product(1, "1.50", "5.00")) != before["hash"]
+    assert redis_cache.get(sync.diff_key)["changed_products"] == 2
+
+def test_failed_detail_keeps_previous_entry(redis_cache):
+    gp = FakeGamePoint([product(1, "1.00"), product(2, "2.00")])
+    sync = CatalogSync(gp, redis_cache)
+    sync.run()
+    gp.iter_full_catalog = MagicMock(return_value=iter([product(2, "2.00")]))
+
+    diff = sync.run(full=True)
+
+    assert diff["removed"] == [] and [p["id"] for p in sync.products()] == [1, 2]
+
+def test_empty_product_list_keeps_snapshot(redis_cache):
+    gp = FakeGamePoint([product(1, "1.00")])
+    sync = CatalogSync(gp, redis_cache)
+    sync.run()
+    gp.catalog = []
+    with pytest.raises(RuntimeError):
+        sync.run()
+    assert [p["id"] for p in sync.products()] == [1]
+
+def test_sync_publishes_prices_from_snapshot(redis_cache):
+    gp = FakeGamePoint([product(1, "1.00", "5.00")])
+    sync = CatalogSync(gp, redis_cache)
+    diff = sync.sync()
+    assert diff["prices_published"] == 2
+    assert redis_cache.get("gp_price:11") == "5.00"
+    assert sync.status()["packages"] == 2 and not sync.status()["syncing"]
+
+def test_sync_skipped_while_another_holds_the_lock(redis_cache):
+    gp = FakeGamePoint([product(1, "1.00")])
+    sync = CatalogSync(gp, redis_cache)
+    redis_cache.redis_client.set(sync.lock_key, 123)
+    assert sync.sync() is None
+    assert gp.detail_calls == []
+
+def test_sync_leaves_a_lock_another_worker_took_over(redis_cache):
+    """If our lock expired mid-run and another worker took it, finishing must not release theirs."""
+    gp = FakeGamePoint([product(1, "1.00")])
+    sync = CatalogSync(gp, redis_cache)
+    run = sync.run
+    def slow_run(**kwargs):
+        redis_cache.redis_client.set(sync.lock_key, "other-worker")
+        return run(**kwargs)
+    sync.run = slow_run
+    assert sync.sync() is not None
+    assert redis_cache.redis_client.get(sync.lock_key) == b"other-worker"
+
+def test_csv_export():
+    lines = list(iter_csv([{"id": 1, "name": "Game, One", "packages": [{"id": 10, "name": "P", "price": "1.00"}]}]))
+    assert lines[1] == "Product ID,Product Name,Package ID,Package Name,Cost Price\n"
+    assert lines[2] == "1,Game  One,10,P,1.00\n"
@@ -0,0 +1,60 @@
+# test_check_id_batch.py
+
+import json
+from unittest.mock import Mock, patch
+import app as core
+from game_config import GameConfigSnapshot
+
+GAMES = [
+    {"game_key": "bigo", "api_handler": "bigo_live", "supplier": None, "supplier_pid": None, "validation_param": None, "requires_user_id": True},
+    {"game_key": "steam-card", "api_handler": None, "supplier": None, "supplier_pid": None, "validation_param": None, "requires_user_id": False},
+]
+
+def fake_game_config():
+    return GameConfigSnapshot(Mock(return_value=GAMES), redis_cache=Mock(), listen=False)
+
+def fake_handler(handler_key, target, uid, server_id):
+    if uid == "bad":
+        return {"status": "error", "message": "Invalid Bigo ID"}
+    return {"status": "success", "username": f"user-{uid}"}
+
+def post_batch(items, query=""):
+    core.limiter.enabled = False
+    client = core.app.test_client()
+    with patch.object(core, "game_config", fake_game_config()) as game_config, \
+         patch.object(core, "run_validation_handler", fake_handler):
+        response = client.post(f"/check-id/batch{query}", json={"items": items})
+        body = response.get_data(as_text=True)
+    return response, body, game_config.loader
+
+def test_batch_returns_results_in_input_order():
+    """Games come from one snapshot load and results line up with the request items."""
+    items = [
+        {"game_slug": "bigo", "uid": "1"},
+        {"game_slug": "steam-card", "uid": "x"},
+        {"game_slug": "bigo", "uid": "bad"},
+        {"game_slug": "unknown", "uid": "2"},
+        {"game_slug": "bigo", "uid": ""},
+    ]
+    response, body, loader = post_batch(items)
+    results = json.loads(body)["results"]
+    assert response.status_code == 200
+    assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+    assert [r["status_code"] for r in results] == [200, 200, 400, 400, 400]
+    assert results[0]["result"]["username"] == "user-1"
+    assert loader.call_count == 1
+
+def test_batch_stream_emits_ndjson():
+    """?stream=1 sends one JSON line per item."""
+    items = [{"game_slug": "bigo", "uid": str(i)} for i in range(3)]
+    response, body, _ = post_batch(items, "?stream=1")
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+
+def test_batch_rejects_oversized_requests():
+    """Batches over the item cap are refused before any lookup."""
+    items = [{"game_slug": "bigo", "uid": "1"}] * (core.CHECK_ID_BATCH_MAX_ITEMS + 1)
+    response, _, loader = post_batch(items)
+    assert response.status_code == 400
+    loader.assert_not_called()
@@ -0,0 +1,69 @@
+# test_circuit_breaker.py
+
+import time
+import pytest
+from circuit_breaker import CircuitBreaker, OPEN, CLOSED, HALF_OPEN
+
+fakeredis = pytest.importorskip("fakeredis")
+
+OK = {"status": "success"}
+DOWN = {"status": "error", "message": "API Error"}
+
+def is_failure(result):
+    return result is DOWN
+
+def make_breaker(**kwargs):
+    return CircuitBreaker("test", redis_client=fakeredis.FakeRedis(), min_calls=4, open_seconds=30, **kwargs)
+
+def test_opens_after_failure_rate():
+    """The circuit opens once the window's error rate crosses the threshold, then fails fast."""
+    breaker = make_breaker()
+    for result in [OK, DOWN, DOWN, DOWN]:
+        breaker.call(lambda: result, is_failure, lambda: "fallback")
+    assert breaker.status()["state"] == OPEN
+    calls = []
+    assert breaker.call(lambda: calls.append(1), is_failure, lambda: "fallback") == "fallback"
+    assert calls == []
+
+def test_slow_calls_open_the_circuit():
+    """Calls over the latency threshold count against the provider even when they succeed."""
+    breaker = make_breaker(slow_call_seconds=0.01, slow_call_rate=0.5)
+    for _ in range(4):
+        breaker.call(lambda: time.sleep(0.02) or OK, is_failure, lambda: "fallback")
+    assert breaker.status()["state"] == OPEN
+
+def test_half_open_probe_closes_on_success():
+    """After open_seconds one probe is let through and a success closes the circuit."""
+    breaker = make_breaker()
+    breaker._open("test")
+    breaker.redis.hset(breaker.state_key, "opened_at", 0)
+
+    allowed, is_probe = breaker.allow()
+    assert allowed and is_probe
+    assert breaker.status()["state"] == HALF_OPEN
+    assert breaker.allow() == (False, False)
+
+    breaker.record(False, 0.1, is_probe=True)
+    assert breaker.status()["state"] == CLOSED
+    assert breaker.status()["calls"] == 0
+
+def test_shed_probe_keeps_circuit_open():
+    """A probe our own limiter shed never reached the provider, so it can't close the circuit."""
+    busy = {"status": "error", "message": "Validator Busy"}
+    breaker = make_breaker()
+    breaker._open("test")
+    breaker.redis.hset(breaker.state_key, "opened_at", 0)
+
+    result = breaker.call(lambda: busy, is_failure, lambda: "fallback", lambda r: r is busy)
+    assert result is busy
+    assert breaker.status()["state"] != CLOSED
+    assert breaker.status()["calls"] == 0
+
+    # The probe slot was handed back, so the next real call gets to probe
+    assert breaker.call(lambda: OK, is_failure, lambda: "fallback", lambda r: r is busy) is OK
+    assert breaker.status()["state"] == CLOSED
+
+def test_redis_outage_lets_calls_through():
+    """A broken Redis connection must never block validations."""
+    breaker = CircuitBreaker("test", redis_client=fakeredis.FakeRedis(connected=False))
+    assert breaker.call(lambda: OK, is_failure, lambda: "fallback") is OK
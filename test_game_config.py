@@ -0,0 +1,43 @@
+# test_game_config.py
+
+from unittest.mock import Mock
+from game_config import GameConfigSnapshot
+
+ROWS = [{"game_key": "bigo", "api_handler": "bigo_live"}, {"game_key": "hok", "api_handler": "honor_of_kings"}]
+
+def make_snapshot(**kwargs):
+    redis_cache = Mock()
+    return GameConfigSnapshot(Mock(return_value=ROWS), redis_cache=redis_cache, listen=False, **kwargs), redis_cache
+
+def test_lookups_share_one_load():
+    """Repeated lookups are served from memory after the first load."""
+    snapshot, _ = make_snapshot()
+    assert snapshot.get("bigo")["api_handler"] == "bigo_live"
+    assert snapshot.get_many(["bigo", "hok", "nope"]).keys() == {"bigo", "hok"}
+    assert snapshot.loader.call_count == 1
+    assert snapshot.version == 1
+
+def test_stale_snapshot_reloads_and_survives_errors():
+    """An expired snapshot reloads; if the reload fails the old rows keep being served."""
+    snapshot, _ = make_snapshot(refresh_seconds=0)
+    snapshot.get("bigo")
+    snapshot.get("bigo")
+    assert snapshot.version == 2
+    snapshot.loader.side_effect = Exception("supabase down")
+    assert snapshot.get("hok")["api_handler"] == "honor_of_kings"
+    assert snapshot.version == 2
+
+def test_unknown_game_reload_is_throttled():
+    """An unknown slug only forces a reload once the miss interval has passed."""
+    snapshot, _ = make_snapshot(miss_reload_seconds=60)
+    assert snapshot.get("new-game") is None
+    assert snapshot.get("new-game") is None
+    assert snapshot.loader.call_count == 1
+
+def test_invalidate_reloads_and_broadcasts():
+    """Admin invalidation reloads locally and publishes to the other workers."""
+    snapshot, redis_cache = make_snapshot()
+    snapshot.get("bigo")
+    snapshot.invalidate()
+    assert snapshot.version == 2
+    assert redis_cache.redis_client.publish.call_args.args[0] == "game_config:invalidate"
@@ -0,0 +1,85 @@
+# test_gamepoint_catalog.py
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+import pytest
+import gamepoint_service
+from gamepoint_service import GamePointThrottled
+
+fakeredis = pytest.importorskip("fakeredis")
+
+PRODUCTS = [{"id": i, "name": f"Game {i}"} for i in range(1, 9)]
+
+@pytest.fixture
+def gp():
+    service = gamepoint_service.GamePointService.__new__(gamepoint_service.GamePointService)
+    service.get_token = MagicMock(return_value="t")
+    with patch.object(gamepoint_service.cache, "redis_client", fakeredis.FakeRedis()), \
+         patch.object(gamepoint_service, "THROTTLE_BACKOFF_SECONDS", 0.01):
+        yield service
+
+def detail(productid):
+    return {"code": 200, "package": [{"id": productid * 10, "name": "P", "price": "1.00"}], "fields": ["uid"]}
+
+def test_catalog_keeps_list_order_and_structure(gp):
+    """Details arrive out of order but the catalog comes back in product/list order."""
+    def request(endpoint, data):
+        if endpoint == "product/list":
+            return {"code": 200, "detail": PRODUCTS}
+        time.sleep(0.01 * (9 - data["productid"]))
+        return detail(data["productid"])
+    gp._request = request
+    progress = []
+
+    catalog = gp.get_full_catalog(progress=lambda done, total: progress.append((done, total)), rate=1000)
+
+    assert [p["id"] for p in catalog] == [p["id"] for p in PRODUCTS]
+    assert catalog[0]["name"] == "Game 1" and catalog[0]["fields"] == ["uid"]
+    assert catalog[0]["packages"][0]["id"] == 10
+    assert progress[-1] == (8, 8) and len(progress) == 8
+
+def test_in_flight_requests_capped(gp):
+    """No more than `concurrency` product/detail calls run at once."""
+    lock, state = threading.Lock(), {"now": 0, "peak": 0}
+    def request(endpoint, data):
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.02)
+        with lock:
+            state["now"] -= 1
+        return detail(data["productid"])
+    gp._request = request
+
+    assert len(list(gp.iter_full_catalog(PRODUCTS, rate=1000, concurrency=3))) == 8
+    assert state["peak"] == 3
+
+def test_throttled_detail_retried_with_backoff(gp):
+    """A 429 is retried; a product still throttled after the retries is skipped."""
+    calls = {}
+    def request(endpoint, data):
+        pid = data["productid"]
+        calls[pid] = calls.get(pid, 0) + 1
+        if pid == 1 and calls[pid] == 1:
+            raise GamePointThrottled(retry_after=0.01)
+        if pid == 2:
+            raise GamePointThrottled()
+        return detail(pid)
+    gp._request = request
+
+    catalog = list(gp.iter_full_catalog(PRODUCTS[:3], rate=1000, retries=2))
+
+    assert sorted(p["id"] for p in catalog) == [1, 3]
+    assert calls == {1: 2, 2: 3, 3: 1}
+
+def test_send_raises_throttled_on_429():
+    """_send turns a 429 on a read endpoint into GamePointThrottled with its Retry-After."""
+    service = gamepoint_service.GamePointService.__new__(gamepoint_service.GamePointService)
+    service.base_url, service.secret_key, service.proxies = "https://gp", "s", None
+    service.config = {"mode": "sandbox"}
+    service.session = MagicMock()
+    service.session.post.return_value = MagicMock(status_code=429, headers={"Retry-After": "2"})
+    with pytest.raises(GamePointThrottled) as exc:
+        service._send("product/detail", {"token": "t", "productid": 1})
+    assert exc.value.retry_after == 2.0
@@ -0,0 +1,87 @@
+# test_gamepoint_config.py
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock, patch
+import pytest
+import gamepoint_service
+
+fakeredis = pytest.importorskip("fakeredis")
+
+SETTINGS = [{"key": "gamepoint_mode", "value": "sandbox"}, {"key": "gamepoint_partner_id_sandbox", "value": "p1"},
+            {"key": "gamepoint_secret_key_sandbox", "value": "s"}]
+
+@pytest.fixture
+def supabase():
+    client = MagicMock()
+    client.table.return_value.select.return_value.in_.return_value.execute.return_value.data = SETTINGS
+    gamepoint_service._service["instance"] = None
+    with patch.object(gamepoint_service.cache, "redis_client", fakeredis.FakeRedis()):
+        yield client
+
+def test_settings_loaded_once_per_version(supabase):
+    """The factory reuses one service until the config is invalidated."""
+    first = gamepoint_service.get_gamepoint_service(supabase)
+    assert gamepoint_service.get_gamepoint_service(supabase) is first
+    assert supabase.table.call_count == 1
+    assert first.partner_id == "p1"
+
+    gamepoint_service.invalidate_config()
+    second = gamepoint_service.get_gamepoint_service(supabase)
+    assert second is not first
+    assert supabase.table.call_count == 2
+
+def test_version_bump_from_another_process_reloads(supabase):
+    """Another worker bumping the version is enough for this one to reload."""
+    first = gamepoint_service.get_gamepoint_service(supabase)
+    gamepoint_service.cache.redis_client.incr(gamepoint_service.CONFIG_VERSION_KEY)
+    assert gamepoint_service.get_gamepoint_service(supabase) is not first
+
+def test_replaced_service_closes_its_session(supabase):
+    """A reload doesn't leave the old instance's pooled connections open."""
+    first = gamepoint_service.get_gamepoint_service(supabase)
+    with patch.object(first.session, "close") as close:
+        gamepoint_service.cache.redis_client.incr(gamepoint_service.CONFIG_VERSION_KEY)
+        gamepoint_service.get_gamepoint_service(supabase)
+    close.assert_called_once()
+
+def test_requests_share_one_pooled_session(supabase):
+    """Every call goes through the service's keep-alive session, not a bare requests.post."""
+    gp = gamepoint_service.get_gamepoint_service(supabase)
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"code": 200, "balance": 5}
+    with patch.object(gp.session, "post", return_value=response) as post, \
+         patch("gamepoint_service.requests.post") as bare_post:
+        gp._send("merchant/balance", {"token": "t"})
+        gp._send("product/detail", {"token": "t", "productid": 1})
+    assert post.call_count == 2
+    bare_post.assert_not_called()
+    assert gp.session.headers["partnerid"] == "p1"
+
+@pytest.fixture
+def unavailable_server():
+    """Local server answering every POST with 503; yields (base url, {path: POST count})."""
+    posts = {}
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            posts[self.path] = posts.get(self.path, 0) + 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        def log_message(self, *args):
+            pass
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", posts
+    server.shutdown()
+
+def test_order_create_not_retried_on_status(supabase, unavailable_server, monkeypatch):
+    """Read endpoints retry 502/503/504; order/create is POSTed once, so a 503 can't duplicate an order."""
+    monkeypatch.setattr(gamepoint_service, "RETRIES", 2)
+    gp = gamepoint_service.get_gamepoint_service(supabase)
+    gp.base_url, posts = unavailable_server
+    gp.session = gp._build_session()
+    for endpoint in ("product/detail", "order/create"):
+        assert gp.session.post(f"{gp.base_url}/{endpoint}", data="{}", timeout=5).status_code == 503
+    assert posts == {"/product/detail": 3, "/order/create": 1}
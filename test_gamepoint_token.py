@@ -0,0 +1,75 @@
+# test_gamepoint_token.py
+
+import time
+import concurrent.futures
+from unittest.mock import Mock, patch
+import pytest
+import gamepoint_service
+from gamepoint_service import GamePointService, token_key
+
+fakeredis = pytest.importorskip("fakeredis")
+
+CONFIG = {"mode": "sandbox", "partner_id_sandbox": "p1", "secret_key_sandbox": "s", "partner_id_live": "p2",
+          "secret_key_live": "s", "proxy_url": None}
+
+@pytest.fixture
+def redis_client():
+    client = fakeredis.FakeRedis()
+    gamepoint_service._token_cache.clear()
+    with patch.object(gamepoint_service.cache, "redis_client", client):
+        yield client
+
+def make_service(token_calls):
+    with patch.object(GamePointService, "_load_config", return_value=dict(CONFIG)):
+        gp = GamePointService(supabase_client=Mock())
+    def fake_request(endpoint, data):
+        token_calls.append(time.monotonic())
+        time.sleep(0.1)
+        return {"code": 200, "token": f"tok{len(token_calls)}"}
+    gp._request = fake_request
+    return gp
+
+def test_workers_share_one_token_fetch(redis_client):
+    """Concurrent callers in different 'processes' trigger a single merchant/token call."""
+    calls = []
+    services = [make_service(calls) for _ in range(4)]
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        tokens = list(pool.map(lambda gp: gp.get_token(), services))
+    assert tokens == ["tok1"] * 4
+    assert len(calls) == 1
+    assert redis_client.exists(token_key("sandbox"))
+
+def test_token_refreshed_in_background_before_expiry(redis_client):
+    """A token near expiry is still served while a replacement is fetched."""
+    calls = []
+    gp = make_service(calls)
+    entry = {"token": "old", "expires": time.time() + 60, "partner_id": "p1"}
+    gamepoint_service.cache.set(token_key("sandbox"), entry, expire_seconds=60)
+    assert gp.get_token() == "old"
+    deadline = time.monotonic() + 2
+    while gp.get_token() == "old" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert gp.get_token() == "tok1"
+    assert len(calls) == 1
+
+def test_invalidate_drops_both_modes(redis_client):
+    """Changing GamePoint settings clears the shared tokens for live and sandbox."""
+    for mode in ("live", "sandbox"):
+        gamepoint_service.cache.set(token_key(mode), {"token": "x", "expires": time.time() + 999, "partner_id": "p1"})
+    gamepoint_service.invalidate_tokens()
+    assert not redis_client.exists(token_key("live"), token_key("sandbox"))
+
+def test_token_lock_released_only_by_its_holder(redis_client):
+    """The token lock is freed after a fetch, but not if it has since passed to another process."""
+    lock_key = f"{token_key('sandbox')}:lock"
+    make_service([])._refresh_token(wait=False)
+    assert not redis_client.exists(lock_key)
+
+    gp = make_service([])
+    fetch = gp._fetch_token
+    def slow_fetch():
+        redis_client.set(lock_key, "other-process")
+        return fetch()
+    gp._fetch_token = slow_fetch
+    gp._refresh_token(wait=False)
+    assert redis_client.get(lock_key) == b"other-process"
@@ -0,0 +1,69 @@
+# test_garena_client.py
+
+from unittest.mock import Mock, patch
+import requests
+import http_client
+from http_client import run_flow
+from garena_client import GarenaClient
+
+LOGIN_URL = "https://shop.garena.sg/api/auth/player_id_login"
+ROLES_URL = "https://shop.garena.sg/api/shop/apps/roles"
+
+def response(status=200, payload=None, cookies=None):
+    resp = Mock(status_code=status)
+    resp.json.return_value = payload or {}
+    resp.cookies = requests.cookies.cookiejar_from_dict(cookies or {})
+    return resp
+
+def run(client, handler):
+    calls = []
+    def fake_request(method, url, **kwargs):
+        calls.append((method, url, kwargs))
+        return handler(method, url, kwargs)
+    with patch.object(http_client, "request", fake_request):
+        result = run_flow(client.flow("100151", "42"))
+    return result, calls
+
+def test_repeat_lookups_skip_login_and_roles():
+    """A found player is answered from the role cache; after it expires only the roles call is made."""
+    client = GarenaClient(LOGIN_URL, ROLES_URL)
+    def handler(method, url, kwargs):
+        if url == LOGIN_URL:
+            return response(cookies={"session_key": "abc"})
+        return response(payload={"100151": [{"role": "Operator"}]})
+
+    result, calls = run(client, handler)
+    assert result == {"status": "success", "username": "Operator"}
+    assert [c[1] for c in calls] == [LOGIN_URL, ROLES_URL]
+
+    assert run(client, handler)[1] == []
+
+    client.roles.delete(("100151", "42"))
+    result, calls = run(client, handler)
+    assert result["username"] == "Operator"
+    assert [c[1] for c in calls] == [ROLES_URL]
+    assert calls[0][2]["headers"]["Cookie"] == "session_key=abc"
+
+def test_stale_session_falls_back_to_login():
+    """If the remembered cookie no longer works the client logs in again."""
+    client = GarenaClient(LOGIN_URL, ROLES_URL)
+    client.sessions.set(("100151", "42"), "session_key=old")
+    def handler(method, url, kwargs):
+        if url == LOGIN_URL:
+            return response(cookies={"session_key": "new"})
+        if kwargs["headers"]["Cookie"] == "session_key=old":
+            return response(status=401)
+        return response(payload={"100151": [{"role": "Operator"}]})
+
+    result, calls = run(client, handler)
+    assert result == {"status": "success", "username": "Operator"}
+    assert [c[1] for c in calls] == [ROLES_URL, LOGIN_URL, ROLES_URL]
+    assert client.sessions.get(("100151", "42")) == "session_key=new"
+
+def test_unknown_player_is_not_cached():
+    """Failed lookups leave nothing behind, so a later retry goes upstream."""
+    client = GarenaClient(LOGIN_URL, ROLES_URL)
+    result, _ = run(client, lambda method, url, kwargs: response(status=400))
+    assert result == {"status": "error", "message": "Invalid ID"}
+    assert client.sessions.get(("100151", "42")) is None
+    assert client.roles.get(("100151", "42")) is None
@@ -0,0 +1,84 @@
+# test_hedging.py
+
+import time
+import asyncio
+from hedging import first_success, first_success_async
+
+def provider(result, delay=0.0, calls=None, name=None):
+    def call():
+        if calls is not None:
+            calls.append(name)
+        time.sleep(delay)
+        return result
+    return call
+
+OK = {"status": "success", "username": "Player"}
+INVALID = {"status": "error", "message": "Invalid ID"}
+
+def test_sequential_falls_through_in_order():
+    """With no hedge delay the providers run one after another, like the old chain."""
+    calls = []
+    winner, result = first_success([
+        ("a", provider(None, calls=calls, name="a")),
+        ("b", provider(OK, calls=calls, name="b")),
+        ("c", provider(OK, calls=calls, name="c")),
+    ])
+    assert winner == "b" and result == OK
+    assert calls == ["a", "b"]
+
+def test_hedge_starts_backup_when_primary_hangs():
+    """A hung primary only costs the hedge delay before the backup answers."""
+    start = time.monotonic()
+    winner, result = first_success([
+        ("slow", provider(OK, delay=1.0)),
+        ("fast", provider({"status": "success", "username": "Backup"})),
+    ], hedge_delay=0.05)
+    assert winner == "fast"
+    assert time.monotonic() - start < 0.5
+
+def test_race_returns_first_success():
+    """Race mode launches everything at once and the fastest success wins."""
+    winner, _ = first_success([
+        ("a", provider(OK, delay=0.3)),
+        ("b", provider(OK, delay=0.01)),
+    ], hedge_delay=0)
+    assert winner == "b"
+
+def test_no_success_returns_last_answer():
+    """When nobody succeeds the most authoritative (last) answer is passed back."""
+    winner, result = first_success([
+        ("a", provider(None)),
+        ("b", provider(INVALID)),
+    ], hedge_delay=0)
+    assert winner is None and result == INVALID
+
+def test_timeout_gives_up():
+    """The overall timeout bounds the wait even if every provider hangs."""
+    start = time.monotonic()
+    winner, result = first_success([("a", provider(OK, delay=1.0))], timeout=0.1)
+    assert winner is None and result is None
+    assert time.monotonic() - start < 0.5
+
+def test_async_race_cancels_loser():
+    """The asyncio variant cancels the providers that lost."""
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+        return OK
+
+    async def fast():
+        return {"status": "success", "username": "Fast"}
+
+    async def run():
+        result = await first_success_async([("slow", slow), ("fast", fast)], hedge_delay=0)
+        await asyncio.sleep(0)
+        return result
+
+    winner, _ = asyncio.run(run())
+    assert winner == "fast"
+    assert cancelled == ["slow"]
@@ -0,0 +1,50 @@
+# test_http_client.py
+
+from unittest.mock import patch
+import http_client
+
+def test_one_session_per_host():
+    """Every call to the same host reuses a single pooled session with the upstream's headers."""
+    http_client.register_upstream("example", "api.example.test", headers={"Origin": "https://example.test"}, pool_maxsize=7)
+    s1 = http_client.get_session("https://api.example.test/a")
+    s2 = http_client.get_session("https://api.example.test/b?x=1")
+    assert s1 is s2
+    assert s1.headers["Origin"] == "https://example.test"
+    assert s1.get_adapter("https://api.example.test")._pool_maxsize == 7
+    assert http_client.get_session("https://other.example.test/") is not s1
+
+@patch.object(http_client, "PROXY_URL", "http://proxy.test:3128")
+def test_proxy_only_for_flagged_upstreams():
+    """Only upstreams registered with use_proxy are routed through PROXY_URL."""
+    http_client.register_upstream("proxied", "proxied.example.test", use_proxy=True)
+    http_client.register_upstream("direct", "direct.example.test")
+    assert http_client.get_session("https://proxied.example.test/").proxies["https"] == "http://proxy.test:3128"
+    assert "https" not in http_client.get_session("https://direct.example.test/").proxies
+
+def test_new_session_shares_pool_not_cookies():
+    """new_session() keeps its own cookie jar but reuses the host's connection pool."""
+    http_client.register_upstream("cookies", "cookies.example.test")
+    shared = http_client.get_session("https://cookies.example.test/")
+    private = http_client.new_session("https://cookies.example.test/")
+    assert private is not shared
+    assert private.cookies is not shared.cookies
+    assert private.get_adapter("https://cookies.example.test") is shared.get_adapter("https://cookies.example.test")
+
+def test_request_applies_upstream_timeout():
+    """Calls without an explicit timeout get the upstream's default until latency has been observed."""
+    http_client.register_upstream("slow", "slow.example.test", timeout=3)
+    with patch("requests.Session.request") as mock_request:
+        http_client.get("https://slow.example.test/x")
+    assert mock_request.call_args.kwargs["timeout"] == (3, 3)
+
+def test_request_timeout_adapts_to_latency():
+    """Once an upstream has a latency history, its timeout follows p99 x factor."""
+    http_client.register_upstream("fast", "fast.example.test", timeout=10)
+    policy = http_client.get_timeout_policy("https://fast.example.test/")
+    for _ in range(policy.min_samples):
+        policy.record(2.0)
+    with patch("requests.Session.request") as mock_request:
+        http_client.get("https://fast.example.test/x")
+        http_client.get("https://fast.example.test/x", timeout=7)
+    assert mock_request.call_args_list[0].kwargs["timeout"] == (policy.connect_ceiling, 2.0 * policy.factor)
+    assert mock_request.call_args_list[1].kwargs["timeout"] == 7
@@ -0,0 +1,75 @@
+# test_id_rules.py
+
+import asyncio
+from unittest.mock import MagicMock, patch
+import app as core
+import asgi
+import async_validation
+from id_rules import check_id_format, merge_rules
+
+GENSHIN = core.HANDLER_ID_RULES["genshin_impact"]
+
+def test_format_rules():
+    """Bad characters, lengths, servers and prefix/server pairs are rejected; good input passes."""
+    mlbb = core.HANDLER_ID_RULES["universal_mlbb"]
+    assert check_id_format(mlbb, "12345678", "2001") is None
+    assert check_id_format(mlbb, "1234567a", "2001") == "Invalid ID"
+    assert check_id_format(mlbb, "12345678", None) == "Invalid Server"
+    assert check_id_format(GENSHIN, "812345678", "Asia") is None
+    assert check_id_format(GENSHIN, "1812345678", "Asia") is None
+    assert check_id_format(GENSHIN, "612345678", "Asia") == "ID does not match server"
+    assert check_id_format(GENSHIN, "812345678", "Mars") == "Invalid Server"
+    assert check_id_format({}, "anything", None) is None
+
+def test_games_row_overrides_handler_rules():
+    """validation_rules on the games row extend the defaults, and null switches a check off."""
+    rules = merge_rules(GENSHIN, {"uid_prefix_servers": None, "uid_length": [9, 9]})
+    assert check_id_format(rules, "612345678", "Asia") is None
+    assert check_id_format(rules, "8123456789", "Asia") == "Invalid ID"
+
+def test_check_id_answers_locally_without_spending_rate_limit(monkeypatch):
+    """An impossible ID never reaches the validator and doesn't use up the client's quota."""
+    game = {"game_key": "genshin", "api_handler": "genshin_impact", "requires_user_id": True}
+    monkeypatch.setattr(core.limiter, "enabled", True)
+    core.limiter.reset()
+    client = core.app.test_client()
+    with patch.object(core.game_config, "get", return_value=game), \
+         patch.object(core, "run_validation_handler") as handler:
+        statuses = [client.get("/check-id/genshin/6123/Asia").status_code for _ in range(12)]
+    handler.assert_not_called()
+    assert statuses == [400] * 12
+
+def asgi_get(path):
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": b""}
+    async def send(message):
+        sent.append(message)
+    scope = {"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b"", "client": ("10.0.0.1", 1)}
+    asyncio.run(asgi.app(scope, receive, send))
+    return sent[0]["status"]
+
+def test_asgi_check_id_answers_locally_without_spending_rate_limit(monkeypatch):
+    """The ASGI fast path doesn't charge the quota for an ID it rejects locally either."""
+    game = {"game_key": "genshin", "api_handler": "genshin_impact", "requires_user_id": True}
+    monkeypatch.setattr(core.limiter, "enabled", True)
+    core.limiter.reset()
+    with patch.object(core.game_config, "get", return_value=game), \
+         patch.object(async_validation, "run_validation_handler") as handler:
+        statuses = [asgi_get("/check-id/genshin/6123/Asia") for _ in range(12)]
+    handler.assert_not_called()
+    assert statuses == [400] * 12
+
+def test_games_without_validation_rules_column_still_load():
+    """Before the games.validation_rules migration the snapshot loads without it."""
+    rows = [{"game_key": "genshin", "api_handler": "genshin_impact"}]
+    def select(columns):
+        query = MagicMock()
+        if "validation_rules" in columns:
+            query.execute.side_effect = Exception("column games.validation_rules does not exist")
+        else:
+            query.execute.return_value.data = rows
+        return query
+    with patch.object(core, "supabase") as supabase:
+        supabase.table.return_value.select.side_effect = select
+        assert core.load_check_games() == rows
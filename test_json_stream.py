@@ -0,0 +1,49 @@
+# test_json_stream.py
+
+import gzip
+import json
+import pytest
+from flask import Flask
+from json_stream import stream_json, iter_json_array
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/items/<int:count>')
+    def items(count):
+        return stream_json(({"id": i, "name": f"item {i}"} for i in range(count)), headers={"X-Test": "1"})
+
+    @app.route('/envelope')
+    def envelope():
+        return stream_json(iter([1, 2]), envelope={"status": "success"}, status=201)
+
+    return app.test_client()
+
+@pytest.mark.parametrize("count", [0, 1, 100, 250])
+def test_streams_valid_json_array(client, count):
+    response = client.get(f'/items/{count}')
+    assert response.is_streamed and response.headers["X-Test"] == "1"
+    assert json.loads(response.data) == [{"id": i, "name": f"item {i}"} for i in range(count)]
+
+def test_envelope(client):
+    response = client.get('/envelope')
+    assert response.status_code == 201
+    assert json.loads(response.data) == {"status": "success", "data": [1, 2]}
+
+def test_gzip_when_accepted(client):
+    response = client.get('/items/300', headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data))[299]["id"] == 299
+    assert "Content-Encoding" not in client.get('/items/3').headers
+
+def test_no_gzip_when_refused(client):
+    response = client.get('/items/3', headers={"Accept-Encoding": "gzip;q=0, deflate"})
+    assert "Content-Encoding" not in response.headers
+    assert len(json.loads(response.data)) == 3
+
+def test_array_is_yielded_in_batches():
+    app = Flask(__name__)
+    with app.app_context():
+        chunks = list(iter_json_array(range(250), batch_size=100))
+    assert len(chunks) == 5 and json.loads("".join(chunks)) == list(range(250))
@@ -0,0 +1,38 @@
+# test_metrics.py
+
+import pytest
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+import app as core
+import metrics
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_timed_upstream_records_status_and_error():
+    """Responses are labelled by status class, exceptions by their class name."""
+    before_ok = sample("upstream_request_seconds_count", upstream="test_up", status="2xx", error="")
+    before_err = sample("upstream_request_seconds_count", upstream="test_up", status="none", error="TimeoutError")
+    with metrics.timed_upstream("test_up") as timer:
+        timer.response = type("Response", (), {"status_code": 200})()
+    with pytest.raises(TimeoutError):
+        with metrics.timed_upstream("test_up"):
+            raise TimeoutError()
+    assert sample("upstream_request_seconds_count", upstream="test_up", status="2xx", error="") == before_ok + 1
+    assert sample("upstream_request_seconds_count", upstream="test_up", status="none", error="TimeoutError") == before_err + 1
+
+def test_routes_are_timed_by_rule():
+    """Flask requests are recorded under their URL rule, not the raw path."""
+    labels = {"method": "GET", "route": "/api/admin/config/handlers", "status": "200"}
+    before = sample("http_request_seconds_count", **labels)
+    core.app.test_client().get("/api/admin/config/handlers")
+    assert sample("http_request_seconds_count", **labels) == before + 1
+
+def test_metrics_endpoint_requires_auth():
+    """/metrics refuses anonymous scrapes and accepts the static METRICS_TOKEN."""
+    client = core.app.test_client()
+    assert client.get("/metrics").status_code == 401
+    with patch.object(core, "METRICS_TOKEN", "scrape-secret"):
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
+    assert b"upstream_request_seconds" in response.data
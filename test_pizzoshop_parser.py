@@ -0,0 +1,45 @@
+# test_pizzoshop_parser.py
+
+import os
+import glob
+import pytest
+from bs4 import BeautifulSoup
+from pizzoshop_parser import parse_check_result
+
+SAMPLES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "benchmarks", "samples", "pizzoshop_*.html")))
+
+def soup_parse(html):
+    """The BeautifulSoup extraction check_mlbb_pizzoshop used before pizzoshop_parser."""
+    soup = BeautifulSoup(html, 'html.parser')
+    if not soup.find("h4", class_="text-success"):
+        return None
+    nickname, region = "Unknown", "Global"
+    for row in soup.find_all("tr"):
+        th, td = row.find("th"), row.find("td")
+        if th and td:
+            header_text, value_text = th.get_text(strip=True), td.get_text(strip=True)
+            if "Nickname" in header_text:
+                nickname = value_text
+            elif "Region ID" in header_text:
+                region = value_text
+    return {"nickname": nickname, "region": region}
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_matches_beautifulsoup_on_samples(path):
+    """The scanner returns exactly what the BeautifulSoup version did on saved pages."""
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    assert parse_check_result(html) == soup_parse(html)
+
+def test_sample_values():
+    """Nickname markup and entities are flattened like get_text(strip=True)."""
+    with open([p for p in SAMPLES if p.endswith("success_markup.html")][0], encoding="utf-8") as f:
+        assert parse_check_result(f.read()) == {"nickname": "Rizky&Co™", "region": "PH"}
+
+@pytest.mark.parametrize("html", [
+    '<h4 class="text-success-light">x</h4><table><tr><th>Nickname</th><td>A</td></tr></table>',
+    '<h4 class=text-success>ok</h4><table><tr><th>Nickname</th><td> A <!-- x --> B </td></tr></table>',
+    '<h4 class="mb-2 text-success">ok</h4><p>no table</p>',
+])
+def test_edge_cases_match_beautifulsoup(html):
+    assert parse_check_result(html) == soup_parse(html)
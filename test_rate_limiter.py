@@ -0,0 +1,49 @@
+# test_rate_limiter.py
+
+import time
+from unittest.mock import patch
+import pytest
+import http_client
+from rate_limiter import TokenBucket
+
+fakeredis = pytest.importorskip("fakeredis")
+
+def make_bucket(rate, burst):
+    return TokenBucket("test", rate, burst, redis_client=fakeredis.FakeRedis())
+
+def test_burst_then_shed():
+    """A full bucket allows `burst` calls at once, then sheds when waiting isn't allowed."""
+    bucket = make_bucket(rate=1, burst=3)
+    assert [bucket.acquire(max_wait=0) for _ in range(4)] == [True, True, True, False]
+    taken, wait = bucket.try_acquire()
+    assert not taken and 0 < wait <= 1
+
+def test_wait_policy_queues_for_refill():
+    """With max_wait the caller sleeps until a token has refilled."""
+    bucket = make_bucket(rate=20, burst=1)
+    assert bucket.acquire()
+    start = time.monotonic()
+    assert bucket.acquire(max_wait=1)
+    assert 0.02 < time.monotonic() - start < 0.5
+
+def test_shed_call_becomes_validator_busy():
+    """A shed call never reaches the upstream and is reported as Validator Busy."""
+    http_client.register_upstream("limited", "limited.example.test", rate=1, burst=1, rate_wait=0)
+    http_client.get_upstream("limited.example.test")["bucket"]._redis = fakeredis.FakeRedis()
+    def flow():
+        yield http_client.UpstreamRequest("GET", "https://limited.example.test/")
+        return {"status": "success"}
+    with patch("requests.Session.request") as mock_request:
+        assert http_client.run_flow(flow()) == {"status": "success"}
+        assert http_client.run_flow(flow()) == {"status": "error", "message": "Validator Busy"}
+    assert mock_request.call_count == 1
+
+def test_limiter_wait_is_not_upstream_latency():
+    """Time spent queueing for a token stays out of the timeout policy's latency samples."""
+    http_client.register_upstream("queued", "queued.example.test", rate=1, burst=1, rate_wait=1)
+    bucket = http_client.get_upstream("queued.example.test")["bucket"]
+    policy = http_client.get_timeout_policy("https://queued.example.test/")
+    with patch.object(bucket, "acquire", side_effect=lambda wait: time.sleep(0.2) or True), \
+            patch.object(policy, "record") as record, patch("requests.Session.request"):
+        http_client.get("https://queued.example.test/")
+    assert record.call_args[0][0] < 0.1
@@ -0,0 +1,69 @@
+# test_redis_codecs.py
+
+import pickle
+import pytest
+import redis_cache
+from redis_cache import RedisCache, encode, decode
+
+fakeredis = pytest.importorskip("fakeredis")
+
+CATALOG = {"id": 1, "name": "Game", "packages": [{"id": i, "name": f"Pack {i}", "price": "1.00"} for i in range(300)]}
+
+@pytest.fixture
+def store():
+    store = RedisCache.__new__(RedisCache)
+    store.redis_client = fakeredis.FakeRedis()
+    return store
+
+@pytest.mark.parametrize("codec", ["pickle", "json"])
+def test_codecs_round_trip(codec):
+    assert decode(encode(CATALOG, codec)) == CATALOG
+    assert decode(encode({"small": 1}, codec)) == {"small": 1}
+
+def test_pickle_codec_matches_plain_pickle():
+    """Small pickles are stored exactly as before, so old entries and raw readers keep working."""
+    value = {"token": "abc", "expires": 1.5}
+    assert encode(value) == pickle.dumps(value)
+    assert decode(pickle.dumps(value)) == value
+
+def test_large_values_compressed():
+    data = encode(CATALOG, "json")
+    assert data[:1] == redis_cache.COMPRESSED_MARKER
+    assert len(data) < len(encode(CATALOG, "json", compress_threshold=None)) / 4
+
+def test_unknown_marker_rejected():
+    with pytest.raises(ValueError):
+        decode(b"?junk")
+
+def test_hash_fields_read_individually(store):
+    store.set_hash("catalog", {1: {"name": "a"}, 2: CATALOG}, codec="json")
+    assert store.get_hash("catalog", [1, 3]) == {"1": {"name": "a"}}
+    assert store.get_hash("catalog") == {"1": {"name": "a"}, "2": CATALOG}
+
+    store.set_hash("catalog", {3: {"name": "c"}})
+    assert store.get_hash("catalog") == {"3": {"name": "c"}}
+    assert store.redis_client.ttl("catalog") > 0
+
+def test_get_set_use_codec(store):
+    store.set("k", CATALOG, codec="json")
+    assert store.redis_client.get("k")[:1] == redis_cache.COMPRESSED_MARKER
+    assert store.get("k") == CATALOG
+
+def test_set_many_pipelines_with_ttl(store):
+    pipelines = []
+    real_pipeline = store.redis_client.pipeline
+    def pipeline(**kwargs):
+        pipelines.append(kwargs)
+        return real_pipeline(**kwargs)
+    store.redis_client.pipeline = pipeline
+
+    prices = {f"gp_price:{i}": f"{i}.00" for i in range(1200)}
+    assert store.set_many(prices, expire_seconds=60, batch_size=500) == 1200
+    assert len(pipelines) == 3
+    assert store.get("gp_price:7") == "7.00"
+    assert 0 < store.redis_client.ttl("gp_price:1199") <= 60
+
+def test_get_many_returns_hits_only(store):
+    store.set_many({"a": 1, "b": {"x": 2}})
+    assert store.get_many(["a", "missing", "b", "a"]) == {"a": 1, "b": {"x": 2}}
+    assert store.get_many([]) == {}
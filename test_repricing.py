@@ -0,0 +1,79 @@
+# test_repricing.py
+
+import math
+from unittest.mock import MagicMock
+import pytest
+import repricing
+
+PRODUCTS = [
+    {"id": 1, "name": "86 Diamonds", "price": 2.00, "original_price": 1.55, "gamepoint_package_id": 10},
+    {"id": 2, "name": "Bundle", "price": 5.00, "original_price": 3.00,
+     "supplier_config": [{"packageId": 10, "name": "a"}, {"packageId": 11, "name": "b"}]},
+    {"id": 3, "name": "Loss leader", "price": 1.00, "original_price": 1.00, "gamepoint_package_id": 12},
+    {"id": 4, "name": "No price yet", "price": 3.00, "original_price": 2.00, "gamepoint_package_id": 99},
+]
+COSTS = {"10": "5.00", "11": "10.00", "12": "4.00"}
+RATE = 0.31
+
+@pytest.fixture(autouse=True)
+def sell_column(monkeypatch):
+    monkeypatch.setattr(repricing, "SELL_COLUMN", "price")
+
+def mock_supabase(products):
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.range.return_value.execute.return_value.data = products
+    return supabase
+
+def test_costs_margins_and_suggestions_in_one_pass():
+    frame = repricing.price_products(PRODUCTS, COSTS, RATE, target_margin=0.10, step=0.05).set_index("id")
+    assert frame.loc[1, "cost_sgd"] == pytest.approx(1.55)
+    assert frame.loc[2, "cost_sgd"] == pytest.approx(4.65)          # bundle sums its packages
+    assert frame.loc[1, "margin"] == pytest.approx(0.225)
+    assert frame.loc[1, "suggested_price"] == pytest.approx(1.75)   # 1.55 / 0.9 = 1.722 -> 1.75
+    assert math.isnan(frame.loc[4, "cost_sgd"])                     # missing supplier price
+    assert frame["below_cost"].to_dict() == {1: False, 2: False, 3: True, 4: False}
+
+def test_plan_updates_only_moved_costs_and_raises():
+    frame = repricing.price_products(PRODUCTS, COSTS, RATE)
+    updates = {p["id"]: p for p in repricing.plan_updates(frame)}
+    assert updates == {2: {"id": 2, "original_price": 4.65}, 3: {"id": 3, "original_price": 1.24}}
+
+    raised = {p["id"]: p for p in repricing.plan_updates(frame, apply_sell_prices=True, min_margin=0.03)}
+    assert raised[3]["price"] == pytest.approx(1.40)
+    assert "price" not in raised[2]                                  # 7% margin: left alone
+
+def test_run_dry_run_reports_and_apply_updates_changed_columns(tmp_path, monkeypatch):
+    supabase = mock_supabase(PRODUCTS)
+    monkeypatch.setattr(repricing, "load_costs", lambda ids: COSTS)
+    monkeypatch.setattr(repricing, "myr_to_sgd_rate", lambda client: RATE)
+    report = tmp_path / "below.csv"
+
+    summary = repricing.run(supabase, report_path=str(report))
+    assert summary["below_cost"] == 1 and summary["unpriced"] == 1 and summary["written"] == 0
+    assert "Loss leader" in report.read_text()
+    supabase.table.return_value.update.assert_not_called()
+    supabase.table.return_value.select.assert_called_with("id,name,price,original_price,supplier_config,gamepoint_package_id")
+
+    assert repricing.run(supabase, apply=True)["written"] == 2
+    update = supabase.table.return_value.update
+    assert [c.args[0] for c in update.call_args_list] == [{"original_price": 4.65}, {"original_price": 1.24}]
+    assert [c.args for c in update.return_value.in_.call_args_list] == [("id", [2]), ("id", [3])]
+    supabase.table.return_value.upsert.assert_not_called()
+
+def test_updates_with_the_same_values_share_a_request():
+    supabase = MagicMock()
+    updates = [{"id": i, "original_price": 1.55 if i % 2 else 2.0} for i in range(1, 6)]
+    assert repricing.update_products(supabase, updates, batch_size=2) == 5
+    in_ = supabase.table.return_value.update.return_value.in_
+    assert [c.args for c in in_.call_args_list] == [("id", [1, 3]), ("id", [5]), ("id", [2, 4])]
+
+def test_without_sell_column_only_costs_are_priced(monkeypatch):
+    """No REPRICE_SELL_COLUMN: the column isn't selected, costs still update, nothing is below cost."""
+    monkeypatch.setattr(repricing, "SELL_COLUMN", None)
+    products = [{k: v for k, v in p.items() if k != "price"} for p in PRODUCTS]
+    supabase = mock_supabase(products)
+    monkeypatch.setattr(repricing, "load_costs", lambda ids: COSTS)
+    monkeypatch.setattr(repricing, "myr_to_sgd_rate", lambda client: RATE)
+    summary = repricing.run(supabase)
+    assert summary["below_cost"] == 0 and summary["changes"] == 2
+    supabase.table.return_value.select.assert_called_once_with("id,name,original_price,supplier_config,gamepoint_package_id")
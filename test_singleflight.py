@@ -0,0 +1,100 @@
+# test_singleflight.py
+
+import time
+import asyncio
+import threading
+import concurrent.futures
+from unittest.mock import Mock
+import pytest
+from redis_cache import RedisCache
+from singleflight import SingleFlight
+
+def make_flight(**kwargs):
+    return SingleFlight("test", redis_cache=Mock(), **kwargs)
+
+def fake_cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisCache.__new__(RedisCache)
+    store.redis_client = fakeredis.FakeRedis()
+    return store
+
+def test_concurrent_calls_share_one_execution():
+    """Identical calls in flight at the same time run the function once."""
+    flight = make_flight()
+    calls = []
+    release = threading.Event()
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return {"status": "success"}
+    with concurrent.futures.ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(flight.do, "k", slow) for _ in range(5)]
+        time.sleep(0.1)
+        release.set()
+        results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert all(r == {"status": "success"} for r in results)
+    # Finished calls are not remembered
+    flight.do("k", slow)
+    assert len(calls) == 2
+
+def test_leader_error_reaches_followers():
+    """If the shared call raises, every waiting caller sees the exception."""
+    flight = make_flight()
+    started = threading.Event()
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+    with concurrent.futures.ThreadPoolExecutor(2) as pool:
+        first = pool.submit(flight.do, "k", boom)
+        started.wait(1)
+        second = pool.submit(flight.do, "k", boom)
+        for future in (first, second):
+            with pytest.raises(ValueError):
+                future.result()
+
+def test_async_cancelled_waiter_leaves_call_running():
+    """A cancelled caller doesn't cancel the call another caller is still waiting on."""
+    flight = make_flight()
+    calls = []
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+    async def main():
+        loser = asyncio.ensure_future(flight.do_async("k", slow))
+        winner = asyncio.ensure_future(flight.do_async("k", slow))
+        await asyncio.sleep(0)
+        loser.cancel()
+        return await winner
+    assert asyncio.run(main()) == "ok"
+    assert calls == [1]
+
+def test_distributed_follower_uses_published_result():
+    """With Redis coalescing on, a worker that loses the lock picks up the leader's result."""
+    redis_cache = fake_cache()
+    leader = SingleFlight("test", redis_cache=redis_cache, distributed=True)
+    follower = SingleFlight("test", redis_cache=redis_cache, distributed=True)
+    follower_func = Mock(return_value="follower")
+    pool = concurrent.futures.ThreadPoolExecutor(1)
+    def lead():
+        lead.follower = pool.submit(follower.do, "k", follower_func)
+        time.sleep(0.1)
+        return "leader"
+    assert leader.do("k", lead) == "leader"
+    assert lead.follower.result(timeout=2) == "leader"
+    follower_func.assert_not_called()
+    pool.shutdown()
+
+def test_distributed_leader_leaves_a_newer_leaders_lock():
+    """A leader that outlived its lock doesn't release the lock another worker has taken since."""
+    redis_cache = fake_cache()
+    flight = SingleFlight("test", redis_cache=redis_cache, distributed=True)
+    def slow():
+        redis_cache.redis_client.set(flight._lock_key("k"), "newer-leader")
+        return "ok"
+    assert flight.do("k", slow) == "ok"
+    assert redis_cache.redis_client.get(flight._lock_key("k")) == b"newer-leader"
+    assert flight.do("j", lambda: "ok") == "ok"
+    assert not redis_cache.redis_client.exists(flight._lock_key("j"))
@@ -0,0 +1,37 @@
+# test_timeout_policy.py
+
+from timeout_policy import TimeoutPolicy
+
+def make_policy(**kwargs):
+    return TimeoutPolicy("test", ceiling=10, floor=1, factor=3, connect_ceiling=3, window=50, min_samples=5, **kwargs)
+
+def test_ceiling_until_enough_samples():
+    """A new upstream gets its configured timeout until min_samples calls are seen."""
+    policy = make_policy()
+    for _ in range(4):
+        policy.record(0.1)
+    assert policy.timeouts() == (3, 10)
+
+def test_timeout_tracks_p99_within_bounds():
+    """The read timeout is p99 x factor, clamped to floor and ceiling."""
+    policy = make_policy()
+    for _ in range(20):
+        policy.record(0.1)
+    assert policy.timeouts() == (1, 1)
+    for _ in range(20):
+        policy.record(2.0)
+    assert policy.timeouts() == (3, 6.0)
+    for _ in range(50):
+        policy.record(8.0)
+    assert policy.timeouts() == (3, 10)
+
+def test_timeouts_push_the_limit_up():
+    """Timed-out calls count at their timeout, so a slowing upstream isn't cut off ever sooner."""
+    policy = make_policy()
+    for _ in range(45):
+        policy.record(0.5)
+    assert policy.timeouts()[1] == 1.5
+    policy.record_timeout()
+    assert policy.timeouts()[1] == 4.5
+    policy.record_timeout()
+    assert policy.timeouts()[1] == 10
@@ -0,0 +1,50 @@
+# test_validation_cache.py
+
+from unittest.mock import Mock
+from validation_cache import ValidationCache, classify_result, ERROR_TTL, INVALID_TTL, SUCCESS_TTL
+
+def make_cache():
+    redis_cache = Mock()
+    redis_cache.get.return_value = None
+    return ValidationCache(redis_cache=redis_cache), redis_cache
+
+def test_classify_result():
+    """Success, rejected IDs and upstream failures are told apart."""
+    assert classify_result({"status": "success", "username": "Player"}) == "success"
+    assert classify_result({"status": "error", "message": "Invalid ID"}) == "invalid"
+    assert classify_result({"status": "error", "message": "API Error"}) == "error"
+    assert classify_result(None) == "error"
+
+def test_ttl_depends_on_outcome():
+    """Each outcome is stored with its own TTL."""
+    vc, redis_cache = make_cache()
+    vc.set("bigo_live", "bigo_live", "123", None, {"status": "success", "username": "A"})
+    vc.set("bigo_live", "bigo_live", "124", None, {"status": "error", "message": "Invalid Bigo ID"})
+    vc.set("bigo_live", "bigo_live", "125", None, {"status": "error", "message": "API Error"})
+    ttls = [c.kwargs['expire_seconds'] for c in redis_cache.set.call_args_list]
+    assert ttls == [SUCCESS_TTL, INVALID_TTL, ERROR_TTL]
+
+def test_get_or_call_hits_cache():
+    """A cached result is returned without calling the upstream handler."""
+    vc, redis_cache = make_cache()
+    handler = Mock(return_value={"status": "success", "username": "A"})
+
+    assert vc.get_or_call("universal_razer", "x", "1", "2", handler)["username"] == "A"
+    redis_cache.get.return_value = {"status": "success", "username": "A"}
+    assert vc.get_or_call("universal_razer", "x", "1", "2", handler)["username"] == "A"
+
+    handler.assert_called_once()
+    fields = [c.args[1] for c in redis_cache.redis_client.hincrby.call_args_list]
+    assert fields == ["misses", "hits"]
+
+def test_key_includes_every_part():
+    """Different targets, uids and servers never share a cache entry."""
+    vc, _ = make_cache()
+    keys = {
+        vc.make_key("h", "t", "1", "2"),
+        vc.make_key("h", "t", "12", None),
+        vc.make_key("h", "u", "1", "2"),
+        vc.make_key("g", "t", "1", "2"),
+    }
+    assert len(keys) == 4
+    assert vc.make_key("h", "t", "1", "2").startswith("check_id:h:")
@@ -0,0 +1,90 @@
+# timeout_policy.py
+
+import os
+import threading
+from collections import deque
+
+FACTOR = float(os.environ.get('TIMEOUT_P99_FACTOR', 3))
+FLOOR_SECONDS = float(os.environ.get('TIMEOUT_FLOOR_SECONDS', 1.5))
+CONNECT_SECONDS = float(os.environ.get('TIMEOUT_CONNECT_SECONDS', 3.05))
+WINDOW = int(os.environ.get('TIMEOUT_WINDOW', 200))
+MIN_SAMPLES = int(os.environ.get('TIMEOUT_MIN_SAMPLES', 20))
+
+
+class TimeoutPolicy:
+    """
+    Per-upstream timeouts derived from the latency of its last `window` calls in this worker.
+
+    The read timeout is p99 x factor, clamped to [floor, ceiling]; the connect timeout is the
+    read timeout capped at connect_ceiling. Until min_samples calls have been seen the
+    ceiling (the upstream's configured timeout) is used. Calls that time out are recorded at
+    the timeout they were given, so a degrading upstream pushes its own timeout up towards
+    the ceiling instead of being cut off ever earlier.
+    """
+
+    def __init__(self, name, ceiling, floor=FLOOR_SECONDS, factor=FACTOR, connect_ceiling=CONNECT_SECONDS,
+                 window=WINDOW, min_samples=MIN_SAMPLES):
+        self.name = name
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.factor = factor
+        self.connect_ceiling = connect_ceiling
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._timeouts = None
+
+    def record(self, elapsed):
+        with self._lock:
+            self._samples.append(elapsed)
+            self._timeouts = None
+
+    def record_timeout(self, timeout=None):
+        self.record(timeout if timeout is not None else self.timeouts()[1])
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+    def timeouts(self):
+        """Returns (connect_timeout, read_timeout) in seconds."""
+        timeouts = self._timeouts
+        if timeouts is None:
+            if len(self._samples) < self.min_samples:
+                read = self.ceiling
+            else:
+                read = min(self.ceiling, max(self.floor, self.percentile(0.99) * self.factor))
+            timeouts = self._timeouts = (min(read, self.connect_ceiling), read)
+        return timeouts
+
+    def status(self):
+        connect, read = self.timeouts()
+        p50, p99 = self.percentile(0.5), self.percentile(0.99)
+        return {
+            "upstream": self.name,
+            "samples": len(self._samples),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p99": round(p99, 3) if p99 is not None else None,
+            "connect_timeout": round(connect, 3),
+            "read_timeout": round(read, 3),
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+        }
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(name, ceiling):
+    with _policies_lock:
+        if name not in _policies:
+            _policies[name] = TimeoutPolicy(name, ceiling)
+        return _policies[name]
+
+
+def all_policies():
+    return [_policies[name] for name in sorted(_policies)]
@@ -0,0 +1,119 @@
+# validation_cache.py
+
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from redis_cache import cache
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# TTLs (seconds) per outcome. Upstream errors are only held long enough to absorb a burst of retries.
+SUCCESS_TTL = int(os.environ.get('CHECK_ID_CACHE_SUCCESS_TTL', 600))
+INVALID_TTL = int(os.environ.get('CHECK_ID_CACHE_INVALID_TTL', 120))
+ERROR_TTL = int(os.environ.get('CHECK_ID_CACHE_ERROR_TTL', 5))
+
+# Messages the check_* handlers return when the upstream failed, rather than rejecting the ID
+UPSTREAM_ERROR_MESSAGES = {"API Error", "API Format Error", "Validator Unavailable", "Validator Busy"}
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_INVALID = "invalid"
+OUTCOME_ERROR = "error"
+
+
+def classify_result(result):
+    """Maps a handler result dict onto success / invalid / error."""
+    if not isinstance(result, dict) or not result.get("status"):
+        return OUTCOME_ERROR
+    if result.get("status") == "success":
+        return OUTCOME_SUCCESS
+    if result.get("message") in UPSTREAM_ERROR_MESSAGES:
+        return OUTCOME_ERROR
+    return OUTCOME_INVALID
+
+
+class ValidationCache:
+    """Caches /check-id handler results in Redis, keyed by handler + target + uid + server."""
+
+    STATS_KEY = "check_id_cache:stats"
+
+    def __init__(self, redis_cache=None, prefix="check_id", flight=None):
+        self.cache = redis_cache or cache
+        self.prefix = prefix
+        # Identical lookups already in flight share one upstream call
+        self.flight = flight or SingleFlight(prefix, redis_cache=self.cache)
+        self.ttls = {
+            OUTCOME_SUCCESS: SUCCESS_TTL,
+            OUTCOME_INVALID: INVALID_TTL,
+            OUTCOME_ERROR: ERROR_TTL,
+        }
+
+    def make_key(self, handler_key, target, uid, server_id):
+        # Hash the variable parts so user-typed IDs can't collide through separators
+        raw = json.dumps([str(target or ''), str(uid), str(server_id or '')])
+        return f"{self.prefix}:{handler_key}:{hashlib.md5(raw.encode()).hexdigest()}"
+
+    def _count(self, field):
+        try:
+            self.cache.redis_client.hincrby(self.STATS_KEY, field, 1)
+        except Exception as e:
+            logger.debug(f"Validation cache stats error: {e}")
+
+    def get(self, handler_key, target, uid, server_id):
+        result = self.cache.get(self.make_key(handler_key, target, uid, server_id))
+        self._count("hits" if result is not None else "misses")
+        return result
+
+    def set(self, handler_key, target, uid, server_id, result):
+        outcome = classify_result(result)
+        ttl = self.ttls[outcome]
+        if ttl <= 0:
+            return False
+        return self.cache.set(self.make_key(handler_key, target, uid, server_id), result, expire_seconds=ttl)
+
+    def get_or_call(self, handler_key, target, uid, server_id, func):
+        """Returns the cached result for this lookup, or calls func() and caches what it returns."""
+        cached_result = self.get(handler_key, target, uid, server_id)
+        if cached_result is not None:
+            return cached_result
+        def call_and_store():
+            result = func()
+            self.set(handler_key, target, uid, server_id, result)
+            return result
+        return self.flight.do(self.make_key(handler_key, target, uid, server_id), call_and_store)
+
+    async def get_or_call_async(self, handler_key, target, uid, server_id, coro_func):
+        """get_or_call for coroutines; Redis access runs in a worker thread."""
+        cached_result = await asyncio.to_thread(self.get, handler_key, target, uid, server_id)
+        if cached_result is not None:
+            return cached_result
+        async def call_and_store():
+            result = await coro_func()
+            await asyncio.to_thread(self.set, handler_key, target, uid, server_id, result)
+            return result
+        return await self.flight.do_async(self.make_key(handler_key, target, uid, server_id), call_and_store)
+
+    def invalidate(self, handler_key=None):
+        pattern = f"{self.prefix}:{handler_key}:*" if handler_key else f"{self.prefix}:*"
+        return self.cache.clear_pattern(pattern)
+
+    def stats(self):
+        try:
+            raw = self.cache.redis_client.hgetall(self.STATS_KEY)
+        except Exception as e:
+            logger.error(f"Validation cache stats error: {e}")
+            raw = {}
+        counts = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in raw.items()}
+        hits, misses = counts.get("hits", 0), counts.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "ttls": self.ttls,
+        }
+
+
+validation_cache = ValidationCache()